@@ -0,0 +1,90 @@
+"""Cold-start cost: importing the app, building it, and time to first connection.
+
+Each measurement runs in a fresh interpreter. Run with
+``uv run python benchmarks/cold_start.py``.
+"""
+
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import socketio
+
+RUNS = 5
+
+IMPORT_ONLY = """
+import time
+start = time.perf_counter()
+import app.main
+print(time.perf_counter() - start)
+"""
+
+FIRST_APP = """
+import time
+start = time.perf_counter()
+from app.main import app
+print(time.perf_counter() - start)
+"""
+
+
+def run_snippet(code: str) -> float:
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True, env=os.environ
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def first_connection() -> float:
+    port = free_port()
+    env = {**os.environ, "SOCKETIO_PORT": str(port), "SOCKETIO_LOGGER_LEVEL": "WARNING"}
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "app.main"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        # Wait for the listening socket, then time a real Socket.IO handshake.
+        while True:
+            try:
+                _, writer = await asyncio.open_connection("127.0.0.1", port)
+            except OSError:
+                await asyncio.sleep(0.002)
+                continue
+            writer.close()
+            break
+        client = socketio.AsyncClient()
+        await client.connect(f"http://127.0.0.1:{port}", transports=["websocket"])
+        elapsed = time.perf_counter() - start
+        await client.disconnect()
+        return elapsed
+    finally:
+        server.kill()
+        server.wait()
+
+
+def main() -> None:
+    cases = [
+        ("import app.main", lambda: run_snippet(IMPORT_ONLY)),
+        ("first app object", lambda: run_snippet(FIRST_APP)),
+        ("spawn to first connect", lambda: asyncio.run(first_connection())),
+    ]
+    print(f"{'case':<26}{'median ms':>10}{'min ms':>10}")
+    for name, measure in cases:
+        samples = [measure() * 1000 for _ in range(RUNS)]
+        print(f"{name:<26}{statistics.median(samples):>10.1f}{min(samples):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Outbound traffic for high-frequency room state updates, direct vs. conflated.
+
+Run with ``uv run python benchmarks/conflation.py``.
+"""
+
+import asyncio
+import time
+
+import socketio
+
+from app.connections import manager
+from app.events import register_events
+from app.tenants import tenants
+
+MEMBERS = 200
+SENDERS = 20
+RATE = 200  # updates per second per sender
+SECONDS = 1.0
+
+
+class Transport:
+    def __init__(self) -> None:
+        self.packets = 0
+        self.bytes = 0
+
+    async def send_packet(self, eio_sid: str, pkt) -> None:
+        self.packets += 1
+        self.bytes += len(pkt.encode())
+
+
+async def run(conflate: bool) -> tuple[int, int, float]:
+    manager.clear()
+    sio = socketio.AsyncServer(async_mode="asgi")
+    register_events(sio)
+    transport = Transport()
+    sio.eio.send_packet = transport.send_packet
+    handler = sio.handlers["/"]["room_message"]
+    sids = []
+    for i in range(MEMBERS):
+        sid = await sio.manager.connect(f"eio-{i}", "/")
+        manager.add(sid)
+        manager.add_room(sid, "game")
+        await sio.enter_room(sid, "game")
+        sids.append(sid)
+
+    async def sender(sid: str) -> None:
+        for n in range(int(RATE * SECONDS)):
+            data = {"room": "game", "message": {"x": n, "y": n}}
+            if conflate:
+                data["conflate"] = f"pos-{sid}"
+            await handler(sid, data)
+            await asyncio.sleep(1 / RATE)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(sender(sid) for sid in sids[:SENDERS]))
+    # Let the last batch go out.
+    await asyncio.sleep(tenants["/"].conflator.interval * 2)
+    elapsed = time.perf_counter() - start
+    return transport.packets, transport.bytes, elapsed
+
+
+async def main_async() -> None:
+    interval_ms = tenants["/"].conflator.interval * 1000
+    print(f"{SENDERS} senders x {RATE}/s, room of {MEMBERS}, flush every {interval_ms:.0f} ms")
+    print(f"{'case':<12}{'packets':>12}{'KB':>12}{'seconds':>10}")
+    for name, conflate in (("direct", False), ("conflated", True)):
+        packets, sent, elapsed = await run(conflate)
+        print(f"{name:<12}{packets:>12}{sent / 1024:>12.0f}{elapsed:>10.2f}")
+
+
+def main() -> None:
+    asyncio.run(main_async())
+
+
+if __name__ == "__main__":
+    main()
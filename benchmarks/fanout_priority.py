@@ -0,0 +1,73 @@
+"""Control-event latency during a large fan-out, unsliced vs. scheduled.
+
+Run with ``uv run python benchmarks/fanout_priority.py``.
+"""
+
+import asyncio
+import time
+
+import socketio
+
+from app.fanout import FanoutScheduler, encode_event
+
+RECIPIENTS = 50_000
+PINGS = 20
+
+
+class Transport:
+    def __init__(self) -> None:
+        self.queues: dict[str, list[str]] = {}
+
+    async def send_packet(self, eio_sid: str, pkt) -> None:
+        # Roughly what engine.io does per packet: encode and queue for the writer.
+        self.queues.setdefault(eio_sid, []).append(pkt.encode())
+
+
+async def control_latency(bulk) -> tuple[float, float, float]:
+    # A ping handler arriving every millisecond while the bulk send runs.
+    latencies = []
+
+    async def pinger() -> None:
+        for _ in range(PINGS):
+            sent = time.perf_counter()
+            await asyncio.sleep(0)
+            latencies.append((time.perf_counter() - sent) * 1000)
+            await asyncio.sleep(0.001)
+
+    start = time.perf_counter()
+    task = asyncio.create_task(pinger())
+    await asyncio.sleep(0)
+    await bulk()
+    total = (time.perf_counter() - start) * 1000
+    await task
+    return max(latencies), sorted(latencies)[len(latencies) // 2], total
+
+
+async def run() -> None:
+    sio = socketio.AsyncServer(async_mode="asgi")
+    transport = Transport()
+    sio.eio.send_packet = transport.send_packet
+    events = [encode_event(sio, "broadcast", {"from": "sid", "data": "x" * 100})]
+    eio_sids = [f"eio-{i}" for i in range(RECIPIENTS)]
+
+    async def unsliced() -> None:
+        await asyncio.gather(*(sio.eio.send_packet(e, events[0].packets[0]) for e in eio_sids))
+
+    scheduler = FanoutScheduler(slice_size=500)
+
+    async def scheduled() -> None:
+        await scheduler.send(sio, events, eio_sids, lane="all")
+
+    print(f"{RECIPIENTS} recipients, a control event every 1 ms")
+    print(f"{'case':<16}{'max ms':>10}{'median ms':>12}{'bulk ms':>10}")
+    for name, bulk in (("unsliced", unsliced), ("scheduled", scheduled)):
+        worst, median, total = await control_latency(bulk)
+        print(f"{name:<16}{worst:>10.2f}{median:>12.2f}{total:>10.1f}")
+
+
+def main() -> None:
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
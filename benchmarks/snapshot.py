@@ -0,0 +1,73 @@
+"""Checkpoint and restore cost: full base vs. incremental delta vs. JSON.
+
+Run with ``uv run python benchmarks/snapshot.py``.
+"""
+
+import asyncio
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from app.auth import Identity
+from app.snapshot import Snapshotter
+from app.tenants import tenants
+
+USERS = 10_000
+ROOMS_PER_USER = 3
+CHANGED = 100
+
+
+async def run(directory: Path) -> None:
+    tenant = tenants["/"]
+    manager = tenant.manager
+    for i in range(USERS):
+        sid = f"sid-{i}"
+        manager.add(sid, identity=Identity(f"user-{i}"))
+        for r in range(ROOMS_PER_USER):
+            manager.add_room(sid, f"room-{(i + r) % 500}")
+    for i in range(500):
+        tenant.logs.log("room_message", f"sid-{i}", f"room-{i}", {"text": f"message {i}"})
+
+    snapshots = Snapshotter(directory)
+    start = time.perf_counter()
+    base = await snapshots.checkpoint()
+    base_ms = (time.perf_counter() - start) * 1000
+
+    for i in range(CHANGED):
+        manager.add_room(f"sid-{i}", "late-room")
+        tenant.logs.log("message", f"sid-{i}", None, {"text": "late"})
+    start = time.perf_counter()
+    delta = await snapshots.checkpoint()
+    delta_ms = (time.perf_counter() - start) * 1000
+
+    as_json = len(
+        json.dumps(
+            {
+                "rooms": {c.user: sorted(c.rooms) for c in manager.all()},
+                "logs": [[e.event, e.from_sid, e.to_room, e.data] for e in tenant.logs.all()],
+            }
+        )
+    )
+    manager.clear()
+    tenant.logs.clear()
+    start = time.perf_counter()
+    restored = Snapshotter(directory)
+    restored.restore()
+    restore_ms = (time.perf_counter() - start) * 1000
+
+    print(f"{USERS} users in {ROOMS_PER_USER} rooms each, {CHANGED} changed between checkpoints")
+    print(f"{'case':<24}{'ms':>10}{'bytes':>12}")
+    print(f"{'base checkpoint':<24}{base_ms:>10.1f}{base:>12}")
+    print(f"{'delta checkpoint':<24}{delta_ms:>10.1f}{delta:>12}")
+    print(f"{'restore':<24}{restore_ms:>10.1f}{restored.path('/').stat().st_size:>12}")
+    print(f"{'same state as JSON':<24}{'':>10}{as_json:>12}")
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(run(Path(directory)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Topic matching cost: trie index vs. testing every subscription.
+
+Run with ``uv run python benchmarks/topics.py``.
+"""
+
+import time
+
+from app.topics import TopicIndex
+
+REGIONS = ["eu", "us", "ap", "sa"]
+LEAGUES = 50
+PUBLISHES = 2_000
+
+
+def scan_match(subscriptions: list[tuple[str, list[str]]], topic: str) -> set[str]:
+    segments = topic.split("/")
+    matched = set()
+    for sid, pattern in subscriptions:
+        for i, part in enumerate(pattern):
+            if part == "#":
+                matched.add(sid)
+                break
+            if i >= len(segments) or (part != "*" and part != segments[i]):
+                break
+        else:
+            if len(pattern) == len(segments):
+                matched.add(sid)
+    return matched
+
+
+def run(subscribers: int) -> tuple[float, float, int]:
+    index = TopicIndex()
+    subscriptions = []
+    for i in range(subscribers):
+        region = REGIONS[i % len(REGIONS)]
+        pattern = [
+            f"region/{region}/#",
+            f"region/*/scores/league-{i % LEAGUES}",
+            f"region/{region}/scores/league-{i % LEAGUES}",
+        ][i % 3]
+        index.subscribe(f"sid-{i}", pattern)
+        subscriptions.append((f"sid-{i}", pattern.split("/")))
+    topics = [
+        f"region/{REGIONS[n % len(REGIONS)]}/scores/league-{n % LEAGUES}" for n in range(PUBLISHES)
+    ]
+    start = time.perf_counter()
+    matched = sum(len(index.match(topic)) for topic in topics)
+    trie = (time.perf_counter() - start) / PUBLISHES * 1e6
+    start = time.perf_counter()
+    for topic in topics[:200]:
+        scan_match(subscriptions, topic)
+    scan = (time.perf_counter() - start) / 200 * 1e6
+    return trie, scan, matched // PUBLISHES
+
+
+def main() -> None:
+    print(f"{'subscribers':<14}{'matched':>10}{'trie us':>12}{'scan us':>12}")
+    for subscribers in (1_000, 10_000, 100_000):
+        trie, scan, matched = run(subscribers)
+        print(f"{subscribers:<14}{matched:>10}{trie:>12.1f}{scan:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
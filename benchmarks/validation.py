@@ -0,0 +1,50 @@
+"""Per-payload cost of inbound event validation.
+
+Run with ``uv run python benchmarks/validation.py``.
+"""
+
+import time
+from typing import Any
+
+from app import schemas
+from app.pipeline import EventError
+
+ROUNDS = 5
+
+
+def measure(validate: Any, data: Any, iterations: int) -> float:
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            try:
+                validate(data)
+            except EventError:
+                pass
+        best = min(best, time.perf_counter() - start)
+    return best / iterations * 1e6
+
+
+def main() -> None:
+    chat = {"text": "hello there", "user": {"id": 42, "name": "ada"}, "tags": ["a", "b"]}
+    many_items = list(range(1_000_000))
+    deep: list[Any] = []
+    for _ in range(10_000):
+        deep = [deep]
+    cases = [
+        ("payload, chat message", schemas.payload, chat, 20_000),
+        ("join_room, string", schemas.join_room, "lobby", 20_000),
+        ("join_room, options", schemas.join_room, {"room": "lobby", "since": 10}, 20_000),
+        ("room_message", schemas.room_message, {"room": "lobby", "message": chat}, 20_000),
+        ("reject: 1 MB string", schemas.payload, "x" * 1_000_000, 20_000),
+        ("reject: 1M-item list", schemas.payload, many_items, 100),
+        ("reject: 10k deep nesting", schemas.payload, deep, 10_000),
+        ("reject: bad room_message", schemas.room_message, {"room": ""}, 20_000),
+    ]
+    print(f"{'case':<28}{'us/payload':>12}")
+    for name, validate, data, iterations in cases:
+        print(f"{name:<28}{measure(validate, data, iterations):>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
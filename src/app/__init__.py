@@ -1,3 +1,10 @@
-from importlib.metadata import version
+from typing import Any
 
-__version__ = version("vibeweb-socketio")
+
+def __getattr__(name: str) -> Any:
+    # Package metadata lookups are slow; only pay for them when asked.
+    if name == "__version__":
+        from importlib.metadata import version
+
+        return version("vibeweb-socketio")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,111 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Iterable
+from typing import Any
+
+import socketio
+
+from app.config import settings
+from app.connections import ConnectionManager, manager
+from app.logging_config import logger
+from app.tenants import DEFAULT_NAMESPACE, tenants
+
+
+async def run_batched(
+    items: Iterable[str],
+    action: Callable[[str], Awaitable[None]],
+    batch_size: int = settings.admin_batch_size,
+    manager: ConnectionManager = manager,
+) -> dict[str, Any]:
+    items = list(dict.fromkeys(items))
+    summary: dict[str, Any] = {"requested": len(items), "succeeded": 0, "missing": 0, "failed": 0}
+    batch_size = max(1, batch_size)
+    for i in range(0, len(items), batch_size):
+        batch = [sid for sid in items[i : i + batch_size] if manager.get(sid) is not None]
+        summary["missing"] += min(batch_size, len(items) - i) - len(batch)
+        results = await asyncio.gather(*(action(sid) for sid in batch), return_exceptions=True)
+        for sid, result in zip(batch, results, strict=True):
+            if isinstance(result, BaseException):
+                logger.warning(f"Admin action failed for {sid}: {result!r}")
+                summary["failed"] += 1
+            else:
+                summary["succeeded"] += 1
+    return summary
+
+
+def select_sids(
+    sids: Iterable[str] = (),
+    client_ip: str | None = None,
+    room: str | None = None,
+    namespace: str = DEFAULT_NAMESPACE,
+) -> list[str]:
+    manager = tenants[namespace].manager
+    selected = list(sids)
+    if client_ip:
+        selected.extend(manager.sids_by_ip(client_ip))
+    if room:
+        selected.extend(manager.sids_in_room(room))
+    return selected
+
+
+async def disconnect_many(
+    sio: socketio.AsyncServer, sids: Iterable[str], namespace: str = DEFAULT_NAMESPACE
+) -> dict[str, Any]:
+    async def disconnect(sid: str) -> None:
+        await sio.disconnect(sid, namespace=namespace)
+
+    summary = await run_batched(sids, disconnect, manager=tenants[namespace].manager)
+    logger.info(f"Admin disconnect ({namespace}): {summary}")
+    return {"status": "ok", "action": "disconnect", **summary}
+
+
+async def force_leave(
+    sio: socketio.AsyncServer,
+    room: str,
+    sids: Iterable[str] | None = None,
+    namespace: str = DEFAULT_NAMESPACE,
+) -> dict[str, Any]:
+    tenant = tenants[namespace]
+    members = set(tenant.manager.sids_in_room(room))
+    targets = [sid for sid in sids if sid in members] if sids is not None else list(members)
+    removed: list[str] = []
+
+    async def leave(sid: str) -> None:
+        await sio.leave_room(sid, room, namespace=namespace)
+        tenant.manager.remove_room(sid, room)
+        tenant.presence.leave(sid, room)
+        removed.append(sid)
+        await sio.emit(
+            "room_left", {"room": room, "sid": sid, "forced": True}, to=sid, namespace=namespace
+        )
+
+    summary = await run_batched(targets, leave, manager=tenant.manager)
+    tenant.deltas.schedule(sio)
+    tenant.presence.schedule(sio)
+    if removed:
+        await sio.emit("room_kicked", {"room": room, "sids": removed}, to=room, namespace=namespace)
+    logger.info(f"Admin force-leave {room} ({namespace}): {summary}")
+    return {"status": "ok", "action": "leave", "room": room, **summary}
+
+
+async def close_room(
+    sio: socketio.AsyncServer, room: str, namespace: str = DEFAULT_NAMESPACE
+) -> dict[str, Any]:
+    tenant = tenants[namespace]
+    members = tenant.manager.sids_in_room(room)
+    await sio.emit("room_closed", {"room": room}, to=room, namespace=namespace)
+    await sio.close_room(room, namespace=namespace)
+    for sid in members:
+        tenant.manager.remove_room(sid, room)
+        tenant.presence.leave(sid, room)
+    tenant.deltas.schedule(sio)
+    tenant.presence.schedule(sio)
+    logger.info(f"Admin closed room {room} ({namespace}) with {len(members)} members")
+    return {
+        "status": "ok",
+        "action": "close",
+        "room": room,
+        "requested": len(members),
+        "succeeded": len(members),
+        "missing": 0,
+        "failed": 0,
+    }
@@ -0,0 +1,98 @@
+import gzip
+import hashlib
+from dataclasses import dataclass
+from typing import Any
+
+try:
+    import brotli
+except ImportError:  # optional: pip install "vibeweb-socketio[compression]"
+    brotli = None
+
+from app.routing import Request
+
+NO_CACHE = b"no-cache"
+IMMUTABLE = b"public, max-age=31536000, immutable"
+
+
+@dataclass(frozen=True, slots=True)
+class Asset:
+    digest: bytes
+    bodies: dict[bytes, bytes]
+    headers: dict[bytes, list[list[bytes]]]
+    not_modified_headers: dict[bytes, list[list[bytes]]]
+
+    def negotiate(self, accept_encoding: bytes) -> bytes:
+        accepted = parse_accept_encoding(accept_encoding)
+        for encoding in (b"br", b"gzip"):
+            if encoding in self.bodies and encoding in accepted:
+                return encoding
+        return b"identity"
+
+
+def parse_accept_encoding(header: bytes) -> set[bytes]:
+    accepted = set()
+    for part in header.split(b","):
+        name, _, params = part.partition(b";")
+        quality = params.replace(b" ", b"").partition(b"q=")[2]
+        try:
+            if quality and float(quality) == 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+def build_asset(body: bytes, content_type: bytes, cache_control: bytes = NO_CACHE) -> Asset:
+    digest = hashlib.sha256(body).hexdigest()[:32].encode()
+    bodies = {b"identity": body}
+    compressed = gzip.compress(body, compresslevel=9, mtime=0)
+    if len(compressed) < len(body):
+        bodies[b"gzip"] = compressed
+    if brotli is not None:
+        compressed = brotli.compress(body, quality=11)
+        if len(compressed) < len(body):
+            bodies[b"br"] = compressed
+    headers = {}
+    not_modified_headers = {}
+    for encoding, payload in bodies.items():
+        # Strong ETags must differ between content codings of the same resource.
+        etag = b'"' + digest + (b"" if encoding == b"identity" else b"-" + encoding) + b'"'
+        common = [
+            [b"etag", etag],
+            [b"cache-control", cache_control],
+            [b"vary", b"accept-encoding"],
+        ]
+        not_modified_headers[encoding] = common
+        headers[encoding] = [
+            [b"content-type", content_type],
+            [b"content-length", str(len(payload)).encode()],
+            *common,
+        ]
+        if encoding != b"identity":
+            headers[encoding].append([b"content-encoding", encoding])
+    return Asset(
+        digest=digest,
+        bodies=bodies,
+        headers=headers,
+        not_modified_headers=not_modified_headers,
+    )
+
+
+async def send_asset(request: Request, send: Any, asset: Asset) -> None:
+    encoding = asset.negotiate(request.header(b"accept-encoding"))
+    if_none_match = request.header(b"if-none-match")
+    etag = asset.not_modified_headers[encoding][0][1]
+    if if_none_match and (etag in if_none_match or if_none_match.strip() == b"*"):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 304,
+                "headers": asset.not_modified_headers[encoding],
+            }
+        )
+        await send({"type": "http.response.body", "body": b""})
+        return
+    await send({"type": "http.response.start", "status": 200, "headers": asset.headers[encoding]})
+    body = b"" if request.method == "HEAD" else asset.bodies[encoding]
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,188 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any
+
+from app.config import settings
+
+MAX_TOKEN_LENGTH = 4096
+USER_MAX_LENGTH = 256
+EVICT_SCAN = 16
+
+
+class AuthError(Exception):
+    pass
+
+
+@dataclass(frozen=True, slots=True)
+class Identity:
+    user: str
+    admin: bool = False
+    expires: float | None = None
+
+
+# A verifier turns a token into an ``Identity`` or raises ``AuthError``.
+Verifier = Callable[[str], Identity]
+
+
+def _b64decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+_HS256_HEADER = _b64encode(b'{"alg":"HS256","typ":"JWT"}')
+
+
+def sign_token(claims: dict[str, Any], secret: str) -> str:
+    payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+    signing_input = f"{_HS256_HEADER}.{payload}".encode()
+    signature = hmac.new(secret.encode(), signing_input, hashlib.sha256).digest()
+    return f"{_HS256_HEADER}.{payload}.{_b64encode(signature)}"
+
+
+class HMACVerifier:
+    def __init__(self, secret: str, leeway: float = 0.0) -> None:
+        self._key = secret.encode()
+        self.leeway = leeway
+
+    def __call__(self, token: str) -> Identity:
+        try:
+            header, payload, signature = token.split(".")
+            expected = hmac.new(self._key, f"{header}.{payload}".encode(), hashlib.sha256).digest()
+            if not hmac.compare_digest(expected, _b64decode(signature)):
+                raise AuthError("invalid signature")
+            if json.loads(_b64decode(header)).get("alg") != "HS256":
+                raise AuthError("unsupported algorithm")
+            claims = json.loads(_b64decode(payload))
+        except (ValueError, AttributeError):
+            raise AuthError("malformed token") from None
+        if not isinstance(claims, dict):
+            raise AuthError("malformed token")
+        now = time.time()
+        expires = claims.get("exp")
+        if expires is not None:
+            if type(expires) not in (int, float):
+                raise AuthError("malformed token")
+            if expires + self.leeway <= now:
+                raise AuthError("token expired")
+        not_before = claims.get("nbf")
+        if type(not_before) in (int, float) and not_before - self.leeway > now:
+            raise AuthError("token not yet valid")
+        user = claims.get("sub")
+        if not isinstance(user, str) or not 0 < len(user) <= USER_MAX_LENGTH:
+            raise AuthError("token has no subject")
+        return Identity(user, admin=claims.get("admin") is True, expires=expires)
+
+
+class TokenCache:
+    def __init__(self, max_size: int = 10000, ttl: float = 300.0) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        # token -> (identity, deadline); the deadline never outlives the token
+        self._entries: OrderedDict[str, tuple[Identity, float]] = OrderedDict()
+
+    def get(self, token: str) -> Identity | None:
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+        if entry[1] <= time.time():
+            del self._entries[token]
+            return None
+        self._entries.move_to_end(token)
+        return entry[0]
+
+    def put(self, token: str, identity: Identity) -> None:
+        if self.max_size <= 0:
+            return
+        now = time.time()
+        deadline = now + self.ttl
+        if identity.expires is not None:
+            deadline = min(deadline, identity.expires)
+        entries = self._entries
+        entries[token] = (identity, deadline)
+        entries.move_to_end(token)
+        if len(entries) > self.max_size:
+            # Expired entries near the cold end go first, so one overflow can
+            # free several slots; otherwise the least recently used one goes.
+            for stale in [
+                key for key, (_, until) in islice(entries.items(), EVICT_SCAN) if until <= now
+            ]:
+                del entries[stale]
+            if len(entries) > self.max_size:
+                entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class Authenticator:
+    def __init__(
+        self, verifier: Verifier | None = None, cache_size: int = 10000, cache_ttl: float = 300.0
+    ) -> None:
+        self.verifier = verifier
+        self.cache = TokenCache(cache_size, cache_ttl)
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.verifier is not None
+
+    def set_verifier(self, verifier: Verifier | None) -> None:
+        self.verifier = verifier
+        self.cache.clear()
+
+    def authenticate(self, token: Any) -> Identity:
+        if self.verifier is None:
+            raise AuthError("authentication is not configured")
+        if not isinstance(token, str) or not 0 < len(token) <= MAX_TOKEN_LENGTH:
+            self.failures += 1
+            raise AuthError("missing token")
+        identity = self.cache.get(token)
+        if identity is not None:
+            self.hits += 1
+            return identity
+        self.misses += 1
+        try:
+            identity = self.verifier(token)
+        except AuthError:
+            self.failures += 1
+            raise
+        self.cache.put(token, identity)
+        return identity
+
+    def authenticate_header(self, authorization: bytes) -> Identity:
+        scheme, _, token = authorization.decode("latin-1").partition(" ")
+        if scheme.lower() != "bearer":
+            self.failures += 1
+            raise AuthError("missing token")
+        return self.authenticate(token.strip())
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "cached": len(self.cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "failures": self.failures,
+        }
+
+
+authenticator = Authenticator(
+    HMACVerifier(settings.auth_secret, settings.auth_leeway) if settings.auth_secret else None,
+    cache_size=settings.auth_cache_size,
+    cache_ttl=settings.auth_cache_ttl,
+)
@@ -0,0 +1,69 @@
+from typing import Any
+
+import socketio
+
+from app.connections import ADMIN_ROOM
+from app.fanout import encode_event, resolve_recipients, scheduler
+from app.logging_config import logger
+from app.tenants import DEFAULT_NAMESPACE, tenants
+
+RESERVED_EVENTS = {"connect", "disconnect", "connect_error"}
+
+
+class BroadcastError(ValueError):
+    pass
+
+
+def parse_messages(messages: Any) -> list[tuple[str, Any]]:
+    if not isinstance(messages, list) or not messages:
+        raise BroadcastError("messages must be a non-empty list")
+    parsed = []
+    for message in messages:
+        if not isinstance(message, dict):
+            raise BroadcastError("each message must be an object")
+        event = message.get("event")
+        if not isinstance(event, str) or not event:
+            raise BroadcastError("each message needs an event name")
+        if event in RESERVED_EVENTS or event.startswith("admin:"):
+            raise BroadcastError(f"event {event!r} is reserved")
+        parsed.append((event, message.get("data")))
+    return parsed
+
+
+async def publish(
+    sio: socketio.AsyncServer,
+    messages: Any,
+    room: str | None = None,
+    sids: list[str] | None = None,
+    namespace: str = DEFAULT_NAMESPACE,
+) -> dict[str, Any]:
+    parsed = parse_messages(messages)
+    encoded = [encode_event(sio, event, data, namespace) for event, data in parsed]
+    recipients = resolve_recipients(sio, room=room, sids=sids, namespace=namespace)
+    target = room or ("sids" if sids is not None else "all")
+    slices = await scheduler.send(sio, encoded, recipients, lane=(namespace, target))
+    logger.info(
+        f"Admin broadcast of {len(parsed)} messages to {len(recipients)} clients"
+        f" ({namespace} {target})"
+    )
+    for event, data in parsed:
+        entry = tenants[namespace].logs.log(
+            event="admin_broadcast", to_room=room, data={"event": event, "data": data}
+        )
+        await sio.emit(
+            "admin:message",
+            {
+                "event": "admin_broadcast",
+                "room": room,
+                "data": {"event": event, "data": data},
+                "timestamp": entry.timestamp.isoformat(),
+            },
+            to=ADMIN_ROOM,
+            namespace=namespace,
+        )
+    return {
+        "status": "ok",
+        "messages": len(parsed),
+        "recipients": len(recipients),
+        "slices": slices,
+    }
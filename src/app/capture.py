@@ -0,0 +1,217 @@
+import asyncio
+import contextlib
+import hashlib
+import marshal
+import re
+import secrets
+import struct
+import time
+import zlib
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+from pydantic import BaseModel
+
+from app.config import settings
+from app.logging_config import logger
+
+# A capture file is MAGIC (the last byte is the format version) followed by
+# frames of (length, crc32) + zlib-compressed marshal data, like snapshots.
+# The first frame is a header dict; each later one is a list of records.
+MAGIC = b"SIOCAP\x01"
+FRAME = struct.Struct(">II")
+# (seconds since capture start, namespace, sid, event, payload size, payload)
+Record = tuple[float, str, str, str, int, Any]
+CONNECT = "connect"
+DISCONNECT = "disconnect"
+
+_WORD = re.compile(r"\w+")
+# Deeper than any payload the validators accept
+REDACT_MAX_DEPTH = 64
+
+
+def _size(data: Any) -> int:
+    try:
+        return len(marshal.dumps(data))
+    except ValueError:
+        return len(str(data))
+
+
+class Redactor:
+    # Replaces every word with a keyed hash of the same length and keeps
+    # punctuation, numbers and dict keys: payloads keep their shape, size and
+    # which values are equal (the same room, topic or id), but not their text.
+    def __init__(self, key: bytes | None = None) -> None:
+        self.key = key or secrets.token_bytes(16)
+
+    def _word(self, match: re.Match[str]) -> str:
+        word = match.group()
+        digest = hashlib.blake2b(word.encode(), digest_size=16, key=self.key).hexdigest()
+        return (digest * (len(word) // 32 + 1))[: len(word)]
+
+    def redact(self, data: Any, depth: int = 0) -> Any:
+        if depth > REDACT_MAX_DEPTH:
+            return None
+        if isinstance(data, str):
+            return _WORD.sub(self._word, data)
+        if isinstance(data, dict):
+            return {key: self.redact(value, depth + 1) for key, value in data.items()}
+        if isinstance(data, list | tuple):
+            return [self.redact(value, depth + 1) for value in data]
+        if isinstance(data, bytes | bytearray):
+            return bytes(len(data))
+        if data is None or isinstance(data, bool | int | float):
+            return data
+        return _WORD.sub(self._word, str(data))
+
+
+def _encode(payload: Any) -> bytes:
+    try:
+        data = marshal.dumps(payload)
+    except ValueError:
+        # Anything marshal can't take was already redacted to a string.
+        data = marshal.dumps(
+            [(*record[:5], str(record[5])) for record in payload]
+            if isinstance(payload, list)
+            else str(payload)
+        )
+    blob = zlib.compress(data)
+    return FRAME.pack(len(blob), zlib.crc32(blob)) + blob
+
+
+def _append(path: Path, block: bytes) -> None:
+    with path.open("ab") as f:
+        f.write(block)
+
+
+def read_capture(path: Path) -> tuple[dict[str, Any], Iterator[Record]]:
+    raw = path.read_bytes()
+    if not raw.startswith(MAGIC):
+        raise ValueError(f"{path} is not a capture file")
+
+    def frames() -> Iterator[Any]:
+        offset = len(MAGIC)
+        while offset + FRAME.size <= len(raw):
+            length, crc = FRAME.unpack_from(raw, offset)
+            blob = raw[offset + FRAME.size : offset + FRAME.size + length]
+            if len(blob) != length or zlib.crc32(blob) != crc:
+                # A capture cut off mid-write keeps everything before the tear.
+                return
+            yield marshal.loads(zlib.decompress(blob))
+            offset += FRAME.size + length
+
+    decoded = frames()
+    header = next(decoded, None)
+    if not isinstance(header, dict):
+        raise ValueError(f"{path} has no capture header")
+    return header, (tuple(record) for block in decoded for record in block)  # type: ignore[misc]
+
+
+class TrafficCapture:
+    def __init__(
+        self,
+        path: Path | None = None,
+        sample_rate: float = 1.0,
+        max_bytes: int = 67108864,
+        payloads: bool = False,
+        interval: float = 1.0,
+    ) -> None:
+        self.path = path
+        self.sample_rate = sample_rate
+        self.max_bytes = max_bytes
+        self.payloads = payloads
+        self.interval = interval
+        self.records = 0
+        self.dropped = 0
+        self.bytes_written = 0
+        self.full = False
+        # Sampling is per sid, so a sampled client's whole session is kept.
+        self._threshold = min(max(sample_rate, 0.0), 1.0) * 2**32
+        self._redactor = Redactor()
+        self._origin: float | None = None
+        self._pending: list[Record] = []
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def sampled(self, sid: str) -> bool:
+        return zlib.crc32(sid.encode()) < self._threshold
+
+    def record(self, namespace: str, sid: str, event: str, data: Any = None) -> None:
+        if self._origin is None or self.full or not self.sampled(sid):
+            return
+        if isinstance(data, BaseModel):
+            # Validated events arrive as models; record them as plain data.
+            data = data.model_dump(exclude_none=True)
+        payload = data if self.payloads else self._redactor.redact(data)
+        offset = round(time.monotonic() - self._origin, 6)
+        self._pending.append((offset, namespace, sid, event, _size(data), payload))
+        self.records += 1
+
+    async def flush(self) -> int:
+        if self.path is None or not self._pending:
+            return 0
+        pending, self._pending = self._pending, []
+        block = await asyncio.to_thread(_encode, pending)
+        if self.bytes_written + len(block) > self.max_bytes:
+            self.full = True
+            self.dropped += len(pending)
+            logger.warning(f"Traffic capture reached {self.max_bytes} bytes; recording stopped")
+            return 0
+        await asyncio.to_thread(_append, self.path, block)
+        self.bytes_written += len(block)
+        return len(block)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except OSError as exc:
+                logger.warning(f"Traffic capture write failed: {exc}")
+
+    def start(self) -> None:
+        if self.path is None or self._task is not None:
+            return
+        header = {
+            "version": 1,
+            "started": time.time(),
+            "sample_rate": self.sample_rate,
+            "payloads": self.payloads,
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        block = MAGIC + _encode(header)
+        self.path.write_bytes(block)
+        self.bytes_written = len(block)
+        self._origin = time.monotonic()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Capturing traffic to {self.path} (sample rate {self.sample_rate})")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self.flush()
+        self._origin = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "records": self.records,
+            "dropped": self.dropped,
+            "bytes_written": self.bytes_written,
+            "full": self.full,
+        }
+
+
+capture = TrafficCapture(
+    path=Path(settings.capture_file) if settings.capture_file else None,
+    sample_rate=settings.capture_sample_rate,
+    max_bytes=settings.capture_max_bytes,
+    payloads=settings.capture_payloads,
+)
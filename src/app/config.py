@@ -20,6 +20,67 @@ class Settings(BaseSettings):
     json_serializer: str | None = None
     always_connect: bool = False
     namespaces: str = "/"
+    namespace_max_connections: int = 0
+    room_history_size: int = 100
+    room_history_bytes: int = 262144
+    room_history_rooms: int = 1000
+    trace_sample_rate: float = 0.0
+    trace_probes: int = 4
+    trace_max_outstanding: int = 1
+    max_connections: int = 0
+    max_loop_lag_ms: float = 250.0
+    health_interval: float = 0.5
+    admin_batch_size: int = 100
+    rate_limit_events: float = 0.0
+    rate_limit_burst: int = 20
+    dedup_size: int = 10000
+    dedup_ttl: float = 120.0
+    dedup_scope: str = "user"
+    event_metrics: bool = True
+    max_event_bytes: int = 65536
+    max_event_depth: int = 32
+    fanout_slice_size: int = 500
+    fanout_slice_pause: float = 0.0
+    fanout_fairness: str = "round_robin"
+    fanout_quantum: int = 1
+    fanout_control_wait: float = 0.05
+    presence_debounce: float = 0.25
+    typing_timeout: float = 5.0
+    presence_max_users: int = 100000
+    auth_secret: str = ""
+    auth_leeway: float = 0.0
+    auth_cache_size: int = 10000
+    auth_cache_ttl: float = 300.0
+    mailbox_enabled: bool = False
+    mailbox_size: int = 100
+    mailbox_bytes: int = 262144
+    mailbox_ttl: float = 86400.0
+    mailbox_memory_bytes: int = 67108864
+    mailbox_users: int = 10000
+    mailbox_spill_dir: str = ""
+    transfer_dir: str = ""
+    transfer_chunk_size: int = 65536
+    transfer_window: int = 8
+    transfer_max_size: int = 104857600
+    transfer_max_bytes: int = 1073741824
+    transfer_max_active: int = 4
+    transfer_ttl: float = 3600.0
+    topic_separator: str = "/"
+    topic_max_subscriptions: int = 100
+    conflate_interval: float = 0.05
+    conflate_rooms: str = ""
+    conflate_max_keys: int = 10000
+    snapshot_dir: str = ""
+    snapshot_interval: float = 5.0
+    snapshot_max_deltas: int = 50
+    snapshot_restore_window: float = 300.0
+    capture_file: str = ""
+    capture_sample_rate: float = 1.0
+    capture_max_bytes: int = 67108864
+    capture_payloads: bool = False
+    drain_window: float = 10.0
+    drain_batch_size: int = 200
+    drain_reconnect_jitter_ms: int = 5000
 
     @property
     def cors_origins_list(self) -> list[str]:
@@ -27,5 +88,16 @@ class Settings(BaseSettings):
             return ["*"]
         return [origin.strip() for origin in self.cors_origins.split(",")]
 
+    @property
+    def namespaces_list(self) -> list[str]:
+        namespaces = ["/"]
+        for namespace in self.namespaces.split(","):
+            namespace = namespace.strip()
+            if namespace:
+                namespace = "/" + namespace.lstrip("/")
+                if namespace not in namespaces:
+                    namespaces.append(namespace)
+        return namespaces
+
 
 settings = Settings()
@@ -0,0 +1,104 @@
+import asyncio
+from typing import Any
+
+import socketio
+
+from app.config import settings
+from app.fanout import encode_event, resolve_recipients, scheduler
+
+UPDATES_EVENT = "room_updates"
+
+
+class Conflator:
+    # Holds the latest update per (room, key) and flushes each room's batch
+    # as one emit every interval, so a recipient sees at most one value per
+    # key per interval however fast senders publish.
+    def __init__(
+        self,
+        namespace: str = "/",
+        interval: float = 0.05,
+        rooms: tuple[str, ...] = (),
+        max_keys: int = 10000,
+    ) -> None:
+        self.namespace = namespace
+        self.interval = interval
+        # Room name prefixes whose messages are conflated by sender when they
+        # carry no key of their own
+        self.rooms = rooms
+        self.max_keys = max_keys
+        self.received = 0
+        self.coalesced = 0
+        self.sent = 0
+        self.flushes = 0
+        self._pending: dict[str, dict[str, dict[str, Any]]] = {}
+        self._keys = 0
+        self._task: asyncio.Task[None] | None = None
+
+    def conflated(self, room: str) -> bool:
+        return room.startswith(self.rooms) if self.rooms else False
+
+    def put(self, room: str, key: str, update: dict[str, Any]) -> bool:
+        pending = self._pending.setdefault(room, {})
+        if key in pending:
+            pending[key] = update
+            self.received += 1
+            self.coalesced += 1
+            return True
+        if self._keys >= self.max_keys:
+            if not pending:
+                del self._pending[room]
+            return False
+        pending[key] = update
+        self._keys += 1
+        self.received += 1
+        return True
+
+    def take(self) -> dict[str, list[dict[str, Any]]]:
+        pending, self._pending = self._pending, {}
+        self._keys = 0
+        return {room: list(updates.values()) for room, updates in pending.items()}
+
+    def schedule(self, sio: socketio.AsyncServer) -> None:
+        if self._task is None and self._pending:
+            self._task = asyncio.create_task(self._flush(sio))
+
+    async def _flush(self, sio: socketio.AsyncServer) -> None:
+        try:
+            while self._pending:
+                await asyncio.sleep(self.interval)
+                for room, updates in self.take().items():
+                    encoded = encode_event(
+                        sio, UPDATES_EVENT, {"room": room, "updates": updates}, self.namespace
+                    )
+                    recipients = resolve_recipients(sio, room=room, namespace=self.namespace)
+                    # Shares the room's lane, so a batch never overtakes a
+                    # bulk room_message still going out.
+                    await scheduler.send(sio, [encoded], recipients, lane=(self.namespace, room))
+                    self.sent += len(updates)
+                    self.flushes += 1
+        finally:
+            self._task = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "interval": self.interval,
+            "pending": self._keys,
+            "received": self.received,
+            "coalesced": self.coalesced,
+            "sent": self.sent,
+            "flushes": self.flushes,
+        }
+
+    def clear(self) -> None:
+        self._pending.clear()
+        self._keys = 0
+
+
+def create_conflator(namespace: str) -> Conflator:
+    prefixes = tuple(room.strip() for room in settings.conflate_rooms.split(",") if room.strip())
+    return Conflator(
+        namespace,
+        interval=settings.conflate_interval,
+        rooms=prefixes,
+        max_keys=settings.conflate_max_keys,
+    )
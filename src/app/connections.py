@@ -1,7 +1,13 @@
+from collections import deque
 from dataclasses import dataclass, field
 from datetime import UTC, datetime
+from itertools import islice
+from typing import Any
+
+from app.auth import Identity
 
 ADMIN_ROOM = "admin_room"
+JOURNAL_SIZE = 10000
 
 
 @dataclass
@@ -10,32 +16,95 @@ class Connection:
     client_ip: str = ""
     connected_at: datetime = field(default_factory=lambda: datetime.now(UTC))
     rooms: set[str] = field(default_factory=set)
+    # Shared with the auth cache, so sockets of one token hold one object.
+    identity: Identity | None = None
+
+    @property
+    def user(self) -> str | None:
+        return self.identity.user if self.identity else None
+
+    @property
+    def admin(self) -> bool:
+        return self.identity is not None and self.identity.admin
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "sid": self.sid,
+            "client_ip": self.client_ip,
+            "connected_at": self.connected_at.isoformat(),
+            "rooms": list(self.rooms),
+            "user": self.user,
+        }
+
+
+def _discard(index: dict[str, set[str]], key: str, sid: str) -> None:
+    sids = index.get(key)
+    if sids is not None:
+        sids.discard(sid)
+        if not sids:
+            del index[key]
 
 
 class ConnectionManager:
-    def __init__(self) -> None:
+    def __init__(self, journal_size: int = JOURNAL_SIZE) -> None:
         self._connections: dict[str, Connection] = {}
+        self._by_ip: dict[str, set[str]] = {}
+        self._by_room: dict[str, set[str]] = {}
+        self._by_user: dict[str, set[str]] = {}
+        self._version = 0
+        self._journal: deque[dict[str, Any]] = deque(maxlen=journal_size)
+
+    def _record(self, change: dict[str, Any]) -> None:
+        self._version += 1
+        change["v"] = self._version
+        self._journal.append(change)
 
-    def add(self, sid: str, client_ip: str = "") -> Connection:
-        conn = Connection(sid=sid, client_ip=client_ip)
+    def add(self, sid: str, client_ip: str = "", identity: Identity | None = None) -> Connection:
+        if sid in self._connections:
+            self.remove(sid)
+        conn = Connection(sid=sid, client_ip=client_ip, identity=identity)
         self._connections[sid] = conn
+        self._by_ip.setdefault(client_ip, set()).add(sid)
+        if identity is not None:
+            self._by_user.setdefault(identity.user, set()).add(sid)
+        self._record(
+            {
+                "op": "add",
+                "sid": sid,
+                "client_ip": client_ip,
+                "connected_at": conn.connected_at.isoformat(),
+                "user": conn.user,
+            }
+        )
         return conn
 
     def remove(self, sid: str) -> None:
-        self._connections.pop(sid, None)
+        conn = self._connections.pop(sid, None)
+        if conn is None:
+            return
+        _discard(self._by_ip, conn.client_ip, sid)
+        if conn.identity is not None:
+            _discard(self._by_user, conn.identity.user, sid)
+        for room in conn.rooms:
+            _discard(self._by_room, room, sid)
+        self._record({"op": "remove", "sid": sid, "user": conn.user})
 
     def get(self, sid: str) -> Connection | None:
         return self._connections.get(sid)
 
     def add_room(self, sid: str, room: str) -> None:
         conn = self._connections.get(sid)
-        if conn:
+        if conn and room not in conn.rooms:
             conn.rooms.add(room)
+            self._by_room.setdefault(room, set()).add(sid)
+            self._record({"op": "join", "sid": sid, "room": room})
 
     def remove_room(self, sid: str, room: str) -> None:
         conn = self._connections.get(sid)
-        if conn:
+        if conn and room in conn.rooms:
             conn.rooms.discard(room)
+            _discard(self._by_room, room, sid)
+            self._record({"op": "leave", "sid": sid, "room": room})
 
     def all(self) -> list[Connection]:
         return list(self._connections.values())
@@ -43,5 +112,49 @@ class ConnectionManager:
     def count(self) -> int:
         return len(self._connections)
 
+    def sids_by_ip(self, client_ip: str) -> list[str]:
+        return [sid for sid in self._by_ip.get(client_ip, ()) if sid in self._connections]
+
+    def sids_in_room(self, room: str) -> list[str]:
+        return [sid for sid in self._by_room.get(room, ()) if sid in self._connections]
+
+    def sids_for_user(self, user: str) -> list[str]:
+        return [sid for sid in self._by_user.get(user, ()) if sid in self._connections]
+
+    def room_size(self, room: str) -> int:
+        return len(self._by_room.get(room, ()))
+
+    def has_room(self, room: str) -> bool:
+        return room in self._by_room
+
+    def rooms(self) -> dict[str, int]:
+        return {room: len(sids) for room, sids in self._by_room.items()}
+
+    def clear(self) -> None:
+        for sid in list(self._connections):
+            self.remove(sid)
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def changes_since(self, version: int) -> list[dict[str, Any]] | None:
+        # None means the journal no longer covers ``version`` and the caller
+        # has to fall back to a full snapshot.
+        oldest = self._version - len(self._journal)
+        if version > self._version or version < oldest:
+            return None
+        return list(islice(self._journal, version - oldest, None))
+
+    def sync(self, since: int | None = None) -> dict[str, Any]:
+        if since is not None:
+            changes = self.changes_since(since)
+            if changes is not None:
+                return {"version": self._version, "changes": changes}
+        return {
+            "version": self._version,
+            "connections": [c.to_dict() for c in self._connections.values()],
+        }
+
 
 manager = ConnectionManager()
@@ -1,10 +1,33 @@
 import json
+from functools import cache
+from importlib.resources import files
 from typing import Any
 
 import socketio
 
-from app.connections import manager
-from app.message_log import msg_logger
+from app.admin import close_room, disconnect_many, force_leave, select_sids
+from app.assets import IMMUTABLE, Asset, build_asset, send_asset
+from app.auth import AuthError, authenticator
+from app.broadcast import BroadcastError, publish
+from app.capture import capture
+from app.export import log_record, parse_time, stream_logs
+from app.fanout import scheduler
+from app.health import health
+from app.routing import (
+    JSON_HEADERS,
+    HTTPError,
+    Receive,
+    Request,
+    Router,
+    Send,
+    send_error,
+    send_json,
+    send_response,
+)
+from app.schemas import PRESENCE_QUERY_USERS
+from app.snapshot import snapshotter
+from app.tenants import DEFAULT_NAMESPACE, Tenant, tenants
+from app.tracing import tracer
 
 _sio: socketio.AsyncServer | None = None
 
@@ -21,7 +44,7 @@ def get_dashboard_html() -> str:
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>VibeWeb SocketIO Dashboard</title>
-    <script src="https://cdn.socket.io/4.7.2/socket.io.min.js"></script>
+    <script src="/static/socket.io-4.8.1.min.js"></script>
     <style>
         * { box-sizing: border-box; margin: 0; padding: 0; }
         body {
@@ -88,6 +111,11 @@ def get_dashboard_html() -> str:
             border-radius: 4px; display: none;
         }
         .toast.error { background: #e74c3c; }
+        .form-row { display: flex; gap: 10px; margin-bottom: 10px; }
+        .form-row input, .form-row textarea {
+            flex: 1; background: #1a1a2e; color: #eee; border: 1px solid #2a2a4a;
+            border-radius: 4px; padding: 8px; font-family: monospace;
+        }
     </style>
 </head>
 <body>
@@ -107,6 +135,8 @@ def get_dashboard_html() -> str:
         <div class="tabs">
             <button class="tab active" onclick="showTab('connections')">Connections</button>
             <button class="tab" onclick="showTab('logs')">Message Log</button>
+            <button class="tab" onclick="showTab('latency')">Latency</button>
+            <button class="tab" onclick="showTab('broadcast')">Broadcast</button>
         </div>
 
         <div id="connections-tab" class="tab-content active">
@@ -133,17 +163,69 @@ def get_dashboard_html() -> str:
             <div class="panel">
                 <h2>Message Traffic</h2>
                 <button class="clear-btn" onclick="clearLogs()">Clear Logs</button>
+                <button class="clear-btn" onclick="exportLogs()">Export</button>
                 <div class="log-container" id="log-container">
                     <div class="empty" id="empty-logs">No messages logged</div>
                 </div>
             </div>
         </div>
+
+        <div id="latency-tab" class="tab-content">
+            <div class="panel">
+                <h2>Delivery Latency</h2>
+                <button class="clear-btn" onclick="loadTraces()">Refresh</button>
+                <table>
+                    <thead>
+                        <tr>
+                            <th>Event</th>
+                            <th>Room</th>
+                            <th>Samples</th>
+                            <th>Fan-out p50 / p99</th>
+                            <th>Ack p50 / p99</th>
+                        </tr>
+                    </thead>
+                    <tbody id="traces-body">
+                    </tbody>
+                </table>
+                <div class="empty" id="empty-traces">No traces (SOCKETIO_TRACE_SAMPLE_RATE=0)</div>
+            </div>
+        </div>
+
+        <div id="broadcast-tab" class="tab-content">
+            <div class="panel">
+                <h2>Broadcast Message</h2>
+                <div class="form-row">
+                    <input id="broadcast-event" placeholder="Event name" value="announcement">
+                    <input id="broadcast-room" placeholder="Room (empty = all clients)">
+                </div>
+                <div class="form-row">
+                    <textarea id="broadcast-data" rows="4" placeholder='{"text": "..."}'></textarea>
+                </div>
+                <button class="clear-btn" onclick="sendBroadcast()">Send</button>
+            </div>
+        </div>
     </div>
     <div class="toast" id="toast"></div>
     <script>
         let socket;
-        let connections = {};
+        let version = null;
+        // Admin token from the URL fragment (#token=...), which never reaches
+        // server logs; kept for the tab's lifetime.
+        const hashToken = new URLSearchParams(window.location.hash.slice(1)).get('token');
+        if (hashToken) {
+            sessionStorage.setItem('token', hashToken);
+            history.replaceState(null, '', window.location.pathname);
+        }
+        const token = sessionStorage.getItem('token');
+
+        function api(path, options = {}) {
+            if (token) {
+                options.headers = { ...options.headers, Authorization: 'Bearer ' + token };
+            }
+            return fetch(path, options);
+        }
         let logs = [];
+        const rows = new Map();
 
         function showToast(message, isError = false) {
             const toast = document.getElementById('toast');
@@ -158,40 +240,114 @@ def get_dashboard_html() -> str:
             document.querySelectorAll('.tab-content').forEach(c => c.classList.remove('active'));
             document.querySelector('.tab[onclick="showTab(\\''+tabName+'\\')"]').classList.add('active');
             document.getElementById(tabName+'-tab').classList.add('active');
+            if (tabName === 'latency') loadTraces();
         }
 
         function updateConnectionCount() {
-            document.getElementById('conn-count').textContent = Object.keys(connections).length;
+            document.getElementById('conn-count').textContent = rows.size;
+            document.getElementById('empty-msg').style.display = rows.size ? 'none' : 'block';
         }
 
-        function renderConnections() {
+        function cell(className, text) {
+            const td = document.createElement('td');
+            if (className) td.className = className;
+            td.textContent = text;
+            return td;
+        }
+
+        function roomTag(room) {
+            const tag = document.createElement('span');
+            tag.className = 'room-tag';
+            tag.dataset.room = room;
+            tag.textContent = room;
+            return tag;
+        }
+
+        function buildRow(c) {
+            const tr = document.createElement('tr');
+            tr.append(
+                cell('sid', c.sid),
+                cell('ip', c.client_ip || '-'),
+                cell('', new Date(c.connected_at).toLocaleString()),
+            );
+            const roomsTd = document.createElement('td');
+            const rooms = document.createElement('div');
+            rooms.className = 'rooms';
+            (c.rooms || []).forEach(r => rooms.appendChild(roomTag(r)));
+            roomsTd.appendChild(rooms);
+            const actionTd = document.createElement('td');
+            const btn = document.createElement('button');
+            btn.className = 'btn';
+            btn.textContent = 'Disconnect';
+            btn.onclick = () => disconnectClient(c.sid);
+            actionTd.appendChild(btn);
+            tr.append(roomsTd, actionTd);
+            return { tr, rooms };
+        }
+
+        function renderConnections(list) {
             const tbody = document.getElementById('connections-body');
-            const emptyMsg = document.getElementById('empty-msg');
-            const connList = Object.values(connections);
+            const fragment = document.createDocumentFragment();
+            rows.clear();
+            list.forEach(c => {
+                const row = buildRow(c);
+                rows.set(c.sid, row);
+                fragment.appendChild(row.tr);
+            });
+            tbody.replaceChildren(fragment);
+            updateConnectionCount();
+        }
 
-            if (connList.length === 0) {
-                tbody.innerHTML = '';
-                emptyMsg.style.display = 'block';
+        function applyChange(ch) {
+            const row = rows.get(ch.sid);
+            if (ch.op === 'add') {
+                if (row) row.tr.remove();
+                const created = buildRow(ch);
+                rows.set(ch.sid, created);
+                document.getElementById('connections-body').appendChild(created.tr);
+            } else if (!row) {
+                return;
+            } else if (ch.op === 'remove') {
+                row.tr.remove();
+                rows.delete(ch.sid);
+            } else if (ch.op === 'join') {
+                row.rooms.appendChild(roomTag(ch.room));
+            } else if (ch.op === 'leave') {
+                row.rooms.querySelectorAll('.room-tag').forEach(t => {
+                    if (t.dataset.room === ch.room) t.remove();
+                });
+            }
+        }
+
+        function applySync(data) {
+            if (data.connections) {
+                renderConnections(data.connections);
             } else {
-                emptyMsg.style.display = 'none';
-                tbody.innerHTML = connList.map(c => '<tr>' +
-                    '<td class="sid">' + c.sid + '</td>' +
-                    '<td class="ip">' + (c.client_ip || '-') + '</td>' +
-                    '<td>' + new Date(c.connected_at).toLocaleString() + '</td>' +
-                    '<td><div class="rooms">' +
-                    (c.rooms || []).map(r => '<span class="room-tag">'+r+'</span>').join('') +
-                    '</div></td>' +
-                    '<td><button class="btn" onclick="disconnectClient(\\''+c.sid+'\\')">' +
-                    'Disconnect</button></td>' +
-                    '</tr>').join('');
+                data.changes.forEach(ch => { if (ch.v > version) applyChange(ch); });
+                updateConnectionCount();
+            }
+            version = data.version;
+        }
+
+        function resync() {
+            socket.emit('admin:sync', { since: version }, applySync);
+        }
+
+        function applyDelta(data) {
+            if (version === null || data.version <= version) return;
+            if (data.resync || data.from > version) {
+                resync();
+                return;
             }
+            data.changes.forEach(ch => { if (ch.v > version) applyChange(ch); });
+            version = data.version;
             updateConnectionCount();
         }
 
         async function disconnectClient(sid) {
             if (!confirm('Disconnect client ' + sid + '?')) return;
             try {
-                const res = await fetch('/api/disconnect/' + sid, { method: 'POST' });
+                const res = await api('/api/disconnect/' + sid, { method: 'POST' });
                 const data = await res.json();
                 if (data.status === 'disconnected') {
                     showToast('Client ' + sid.substring(0,8) + ' disconnected');
@@ -203,9 +359,23 @@ def get_dashboard_html() -> str:
             }
         }
 
+        async function exportLogs() {
+            try {
+                const res = await api('/api/logs/export');
+                if (!res.ok) throw new Error(res.statusText);
+                const link = document.createElement('a');
+                link.href = URL.createObjectURL(await res.blob());
+                link.download = 'logs.ndjson.gz';
+                link.click();
+                setTimeout(() => URL.revokeObjectURL(link.href), 0);
+            } catch (err) {
+                showToast('Error exporting logs', true);
+            }
+        }
+
         async function clearLogs() {
             try {
-                const res = await fetch('/api/logs/clear', { method: 'POST' });
+                const res = await api('/api/logs/clear', { method: 'POST' });
                 const data = await res.json();
                 if (data.status === 'cleared') {
                     logs = [];
@@ -239,19 +409,71 @@ def get_dashboard_html() -> str:
             }
         }
 
-        async function loadInitialData() {
+        async function sendBroadcast() {
+            const event = document.getElementById('broadcast-event').value.trim();
+            const room = document.getElementById('broadcast-room').value.trim();
+            const raw = document.getElementById('broadcast-data').value.trim();
+            let data;
+            try {
+                data = raw ? JSON.parse(raw) : null;
+            } catch (err) {
+                showToast('Data must be valid JSON', true);
+                return;
+            }
+            const body = { messages: [{ event, data }] };
+            if (room) body.room = room;
+            try {
+                const res = await api('/api/broadcast', {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify(body),
+                });
+                const result = await res.json();
+                if (result.status === 'ok') {
+                    showToast('Sent to ' + result.recipients + ' clients');
+                } else {
+                    showToast(result.message || 'Broadcast failed', true);
+                }
+            } catch (err) {
+                showToast('Error sending broadcast', true);
+            }
+        }
+
+        async function loadTraces() {
             try {
-                const res = await fetch('/api/connections');
+                const res = await api('/api/traces');
                 const data = await res.json();
-                connections = {};
-                data.connections.forEach(c => connections[c.sid] = c);
-                renderConnections();
+                const tbody = document.getElementById('traces-body');
+                const fragment = document.createDocumentFragment();
+                data.traces.forEach(t => {
+                    const tr = document.createElement('tr');
+                    tr.append(
+                        cell('log-event', t.event),
+                        cell('log-room', t.room || '*'),
+                        cell('', t.fanout.count + ' / ' + t.ack.count + ' acks'),
+                        cell('', t.fanout.p50_ms + ' / ' + t.fanout.p99_ms + ' ms'),
+                        cell('', t.ack.p50_ms + ' / ' + t.ack.p99_ms + ' ms'),
+                    );
+                    fragment.appendChild(tr);
+                });
+                tbody.replaceChildren(fragment);
+                document.getElementById('empty-traces').style.display =
+                    data.traces.length ? 'none' : 'block';
+            } catch (err) {
+                console.error('Failed to load traces:', err);
+            }
+        }
+
+        async function loadInitialData() {
+            try {
+                const res = await api('/api/connections');
+                applySync(await res.json());
             } catch (err) {
                 console.error('Failed to load connections:', err);
             }
 
             try {
-                const res = await fetch('/api/logs');
+                const res = await api('/api/logs');
                 const data = await res.json();
                 logs = data.logs || [];
                 renderLogs();
@@ -261,10 +483,14 @@ def get_dashboard_html() -> str:
         }
 
         function connectWebSocket() {
-            socket = io(window.location.origin, { transports: ['websocket', 'polling'] });
+            socket = io(window.location.origin, {
+                transports: ['websocket', 'polling'],
+                auth: token ? { token } : {},
+            });
 
             socket.on('connect', () => {
-                socket.emit('join_room', 'admin_room');
+                // Sync once the join is acknowledged; admin:sync needs membership.
+                socket.emit('join_room', 'admin_room', resync);
                 document.getElementById('ws-status').classList.remove('disconnected');
             });
 
@@ -272,15 +498,17 @@ def get_dashboard_html() -> str:
                 document.getElementById('ws-status').classList.add('disconnected');
             });
 
+            socket.on('server:reconnect', (hint) => {
+                setTimeout(() => socket.connect(), hint.delay_ms);
+            });
+
+            socket.on('admin:delta', applyDelta);
+
             socket.on('admin:connection', (data) => {
-                connections[data.sid] = { ...data, rooms: [] };
-                renderConnections();
                 showToast('Client connected: ' + data.sid.substring(0,8) + '...');
             });
 
             socket.on('admin:disconnection', (data) => {
-                delete connections[data.sid];
-                renderConnections();
                 showToast('Client disconnected: ' + data.sid.substring(0,8) + '...');
             });
 
@@ -297,120 +525,259 @@ def get_dashboard_html() -> str:
 </html>"""
 
 
-def get_connections_json() -> str:
-    connections = [
-        {
-            "sid": c.sid,
-            "client_ip": c.client_ip,
-            "connected_at": c.connected_at.isoformat(),
-            "rooms": list(c.rooms),
-        }
-        for c in manager.all()
-    ]
-    return json.dumps({"count": manager.count(), "connections": connections})
+SOCKETIO_CLIENT_PATH = "/static/socket.io-4.8.1.min.js"
+
+
+@cache
+def get_dashboard_assets() -> dict[str, Asset]:
+    html = build_asset(get_dashboard_html().encode(), b"text/html; charset=utf-8")
+    client = build_asset(
+        files("app").joinpath("static/socket.io.min.js").read_bytes(),
+        b"text/javascript; charset=utf-8",
+        IMMUTABLE,
+    )
+    return {"/": html, "/dashboard": html, SOCKETIO_CLIENT_PATH: client}
 
 
-def get_logs_json() -> str:
-    logs = [
+def get_connections_json(since: int | None = None, namespace: str = DEFAULT_NAMESPACE) -> str:
+    manager = tenants[namespace].manager
+    payload = manager.sync(since)
+    payload["count"] = manager.count()
+    return json.dumps(payload)
+
+
+def get_logs_json(namespace: str = DEFAULT_NAMESPACE) -> str:
+    logs = [log_record(log) for log in tenants[namespace].logs.all()]
+    return json.dumps({"count": len(logs), "logs": logs})
+
+
+def get_namespaces_json() -> str:
+    namespaces = [tenant.to_dict() for tenant in tenants]
+    return json.dumps(
         {
-            "event": log.event,
-            "from": log.from_sid,
-            "room": log.to_room,
-            "data": log.data,
-            "timestamp": log.timestamp.isoformat(),
+            "count": len(namespaces),
+            "namespaces": namespaces,
+            "auth": authenticator.to_dict(),
+            "snapshots": snapshotter.to_dict(),
+            "fanout": scheduler.to_dict(),
+            "capture": capture.to_dict(),
         }
-        for log in msg_logger.all()
-    ]
-    return json.dumps({"count": len(logs), "logs": logs})
+    )
 
 
-async def dashboard_app(scope: dict[str, Any], receive: Any, send: Any) -> None:
-    if scope["type"] != "http":
-        return
+def get_traces_json() -> str:
+    return json.dumps({"sample_rate": tracer.sample_rate, "traces": tracer.snapshot()})
 
-    path = scope["path"]
-    method = scope["method"]
 
-    if path == "/" or path == "/dashboard":
-        response = get_dashboard_html()
-        await send(
-            {
-                "type": "http.response.start",
-                "status": 200,
-                "headers": [[b"content-type", b"text/html; charset=utf-8"]],
-            }
-        )
-        await send({"type": "http.response.body", "body": response.encode()})
-    elif path == "/api/connections":
-        response = get_connections_json()
-        await send(
-            {
-                "type": "http.response.start",
-                "status": 200,
-                "headers": [[b"content-type", b"application/json"]],
-            }
-        )
-        await send({"type": "http.response.body", "body": response.encode()})
-    elif path == "/api/logs":
-        response = get_logs_json()
-        await send(
-            {
-                "type": "http.response.start",
-                "status": 200,
-                "headers": [[b"content-type", b"application/json"]],
-            }
-        )
-        await send({"type": "http.response.body", "body": response.encode()})
-    elif path == "/api/logs/clear" and method == "POST":
-        msg_logger.clear()
-        response = json.dumps({"status": "cleared"})
-        await send(
-            {
-                "type": "http.response.start",
-                "status": 200,
-                "headers": [[b"content-type", b"application/json"]],
-            }
-        )
-        await send({"type": "http.response.body", "body": response.encode()})
-    elif path.startswith("/api/disconnect/") and method == "POST":
-        sid = path.split("/api/disconnect/")[-1]
-        if _sio is None:
-            response = json.dumps({"status": "error", "message": "Server not initialized"})
-            await send(
-                {
-                    "type": "http.response.start",
-                    "status": 500,
-                    "headers": [[b"content-type", b"application/json"]],
-                }
-            )
-            await send({"type": "http.response.body", "body": response.encode()})
-        elif manager.get(sid) is None:
-            response = json.dumps({"status": "error", "message": "Client not found"})
-            await send(
-                {
-                    "type": "http.response.start",
-                    "status": 404,
-                    "headers": [[b"content-type", b"application/json"]],
-                }
-            )
-            await send({"type": "http.response.body", "body": response.encode()})
-        else:
-            await _sio.disconnect(sid)
-            response = json.dumps({"status": "disconnected", "sid": sid})
-            await send(
-                {
-                    "type": "http.response.start",
-                    "status": 200,
-                    "headers": [[b"content-type", b"application/json"]],
-                }
-            )
-            await send({"type": "http.response.body", "body": response.encode()})
+_PROBE_HEADERS = [[b"content-type", b"application/json"], [b"cache-control", b"no-store"]]
+
+router = Router()
+
+
+@router.route("/healthz")
+async def healthz(request: Request, send: Send) -> None:
+    status, body = health.liveness()
+    await send_response(send, body, status, _PROBE_HEADERS)
+
+
+@router.route("/readyz")
+async def readyz(request: Request, send: Send) -> None:
+    status, body = health.readiness()
+    await send_response(send, body, status, _PROBE_HEADERS)
+
+
+async def dashboard_asset(request: Request, send: Send) -> None:
+    await send_asset(request, send, get_dashboard_assets()[request.path])
+
+
+router.add("/", dashboard_asset, ("GET", "HEAD"))
+router.add("/dashboard", dashboard_asset, ("GET", "HEAD"))
+router.add(SOCKETIO_CLIENT_PATH, dashboard_asset, ("GET", "HEAD"))
+
+
+def _tenant(namespace: Any) -> Tenant:
+    if namespace is None:
+        namespace = DEFAULT_NAMESPACE
+    tenant = tenants.get(namespace) if isinstance(namespace, str) else None
+    if tenant is None:
+        raise HTTPError(404, "Unknown namespace")
+    return tenant
+
+
+@router.route("/api/namespaces")
+async def api_namespaces(request: Request, send: Send) -> None:
+    await send_response(send, get_namespaces_json().encode())
+
+
+@router.route("/api/connections")
+async def api_connections(request: Request, send: Send) -> None:
+    tenant = _tenant(request.query.get("namespace"))
+    since = request.query.get("since", "")
+    response = get_connections_json(int(since) if since.isdigit() else None, tenant.namespace)
+    await send_response(send, response.encode())
+
+
+@router.route("/api/logs")
+async def api_logs(request: Request, send: Send) -> None:
+    tenant = _tenant(request.query.get("namespace"))
+    await send_response(send, get_logs_json(tenant.namespace).encode())
+
+
+@router.route("/api/logs/export")
+async def api_logs_export(request: Request, send: Send) -> None:
+    tenant = _tenant(request.query.get("namespace"))
+    since = parse_time(request.query.get("since"))
+    until = parse_time(request.query.get("until"))
+    compress = request.query.get("gzip", "1") != "0"
+    name = tenant.namespace.strip("/") or "default"
+    filename = f"logs-{name}.ndjson" + (".gz" if compress else "")
+    await stream_logs(send, tenant.logs.between(since, until), filename, compress)
+
+
+@router.route("/api/traces")
+async def api_traces(request: Request, send: Send) -> None:
+    await send_response(send, get_traces_json().encode())
+
+
+@router.route("/api/presence")
+async def api_presence(request: Request, send: Send) -> None:
+    presence = _tenant(request.query.get("namespace")).presence
+    room = request.query.get("room")
+    users = request.query.get("users")
+    if not room and not users:
+        raise HTTPError(400, "room or users is required")
+    result: dict[str, Any] = {"online": presence.online_count()}
+    if room:
+        result.update(presence.room(room))
+    if users:
+        result["presence"] = presence.users(users.split(",")[:PRESENCE_QUERY_USERS])
+    await send_json(send, result)
+
+
+@router.route("/api/logs/clear", methods=("POST",))
+async def api_logs_clear(request: Request, send: Send) -> None:
+    _tenant(request.query.get("namespace")).logs.clear()
+    await send_json(send, {"status": "cleared"})
+
+
+@router.route("/api/disconnect/{sid}", methods=("POST",))
+async def api_disconnect(request: Request, send: Send) -> None:
+    sid = request.params["sid"]
+    tenant = _tenant(request.query.get("namespace"))
+    if _sio is None:
+        await send_error(send, 500, "Server not initialized")
+    elif tenant.manager.get(sid) is None:
+        await send_error(send, 404, "Client not found")
     else:
-        await send(
-            {
-                "type": "http.response.start",
-                "status": 404,
-                "headers": [[b"content-type", b"text/plain"]],
-            }
+        with scheduler.control():
+            await _sio.disconnect(sid, namespace=tenant.namespace)
+        await send_json(send, {"status": "disconnected", "sid": sid})
+
+
+def _body_sids(body: dict[str, Any]) -> list[str]:
+    sids = body.get("sids", [])
+    if not isinstance(sids, list) or not all(isinstance(sid, str) for sid in sids):
+        raise HTTPError(400, "sids must be a list of strings")
+    return sids
+
+
+def _body_room(body: dict[str, Any]) -> str:
+    room = body.get("room")
+    if not isinstance(room, str) or not room:
+        raise HTTPError(400, "Missing room")
+    return room
+
+
+def _body_string(body: dict[str, Any], key: str) -> str | None:
+    value = body.get(key)
+    if value is not None and (not isinstance(value, str) or not value):
+        raise HTTPError(400, f"{key} must be a non-empty string")
+    return value
+
+
+def _require_sio() -> socketio.AsyncServer:
+    if _sio is None:
+        raise HTTPError(500, "Server not initialized")
+    return _sio
+
+
+@router.route("/api/bulk/disconnect", methods=("POST",))
+async def api_bulk_disconnect(request: Request, send: Send) -> None:
+    body = await request.json()
+    if not isinstance(body, dict):
+        raise HTTPError(400, "Expected a JSON object")
+    namespace = _tenant(body.get("namespace")).namespace
+    sids = select_sids(
+        _body_sids(body), _body_string(body, "ip"), _body_string(body, "room"), namespace
+    )
+    with scheduler.control():
+        summary = await disconnect_many(_require_sio(), sids, namespace)
+    await send_json(send, summary)
+
+
+@router.route("/api/rooms/leave", methods=("POST",))
+async def api_room_leave(request: Request, send: Send) -> None:
+    body = await request.json()
+    if not isinstance(body, dict):
+        raise HTTPError(400, "Expected a JSON object")
+    namespace = _tenant(body.get("namespace")).namespace
+    room = _body_room(body)
+    sids = _body_sids(body) if "sids" in body else None
+    await send_json(send, await force_leave(_require_sio(), room, sids, namespace))
+
+
+@router.route("/api/rooms/close", methods=("POST",))
+async def api_room_close(request: Request, send: Send) -> None:
+    body = await request.json()
+    if not isinstance(body, dict):
+        raise HTTPError(400, "Expected a JSON object")
+    namespace = _tenant(body.get("namespace")).namespace
+    await send_json(send, await close_room(_require_sio(), _body_room(body), namespace))
+
+
+@router.route("/api/broadcast", methods=("POST",))
+async def api_broadcast(request: Request, send: Send) -> None:
+    body = await request.json()
+    if not isinstance(body, dict):
+        raise HTTPError(400, "Expected a JSON object")
+    room = _body_string(body, "room")
+    sids = _body_sids(body) if "sids" in body else None
+    if room is not None and sids is not None:
+        raise HTTPError(400, "Send to a room or to sids, not both")
+    namespace = _tenant(body.get("namespace")).namespace
+    try:
+        summary = await publish(
+            _require_sio(), body.get("messages"), room=room, sids=sids, namespace=namespace
         )
-        await send({"type": "http.response.body", "body": b"Not Found"})
+    except BroadcastError as exc:
+        raise HTTPError(400, str(exc)) from None
+    await send_json(send, summary)
+
+
+_UNAUTHORIZED_HEADERS = [*JSON_HEADERS, [b"www-authenticate", b"Bearer"]]
+
+
+def _api_denial(request: Request) -> tuple[int, str] | None:
+    try:
+        identity = authenticator.authenticate_header(request.header(b"authorization"))
+    except AuthError:
+        return 401, "Unauthorized"
+    if not identity.admin:
+        return 403, "Admin token required"
+    return None
+
+
+async def dashboard_app(scope: dict[str, Any], receive: Receive, send: Send) -> None:
+    # With token auth on, the API needs an admin bearer token; the page,
+    # static assets and probes stay public and carry no data.
+    if authenticator.enabled and scope["type"] == "http" and scope["path"].startswith("/api/"):
+        denial = _api_denial(Request(scope, receive, {}))
+        if denial is not None:
+            status, message = denial
+            body = json.dumps({"status": "error", "message": message}).encode()
+            # Only a missing or invalid token is a challenge; a valid
+            # non-admin token has nothing to retry with.
+            headers = _UNAUTHORIZED_HEADERS if status == 401 else JSON_HEADERS
+            await send_response(send, body, status, headers)
+            return
+    await router(scope, receive, send)
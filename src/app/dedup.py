@@ -0,0 +1,54 @@
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any
+
+SCOPES = ("user", "sid", "room")
+
+
+class DedupCache:
+    def __init__(self, max_size: int = 10000, ttl: float = 120.0, scope: str = "user") -> None:
+        if scope not in SCOPES:
+            raise ValueError(f"dedup scope must be one of {', '.join(SCOPES)}")
+        self.max_size = max_size
+        self.ttl = ttl
+        self.scope = scope
+        self.hits = 0
+        # key -> (deadline, ack); one TTL for all, so insertion order is expiry order
+        self._entries: OrderedDict[Hashable, tuple[float, asyncio.Future[Any]]] = OrderedDict()
+
+    def claim(self, key: Hashable) -> tuple[asyncio.Future[Any], bool]:
+        # Returns the future holding the ack for ``key`` and whether this call
+        # created it; a retry that arrives while the original is still being
+        # handled gets the same future and waits for its ack.
+        now = time.monotonic()
+        entries = self._entries
+        while entries:
+            deadline, _ = next(iter(entries.values()))
+            if deadline > now:
+                break
+            entries.popitem(last=False)
+        entry = entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry[1], False
+        ack = asyncio.get_running_loop().create_future()
+        entries[key] = (now + self.ttl, ack)
+        if len(entries) > self.max_size:
+            entries.popitem(last=False)
+        return ack, True
+
+    def forget(self, key: Hashable, ack: asyncio.Future[Any]) -> None:
+        # The original failed without an ack: let the next retry through and
+        # cancel the waiting duplicates so their clients retry as well.
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] is ack:
+            del self._entries[key]
+        ack.cancel()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        self._entries.clear()
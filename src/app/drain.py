@@ -0,0 +1,83 @@
+import asyncio
+import math
+import random
+
+import socketio
+
+from app.config import settings
+from app.connections import ADMIN_ROOM
+from app.logging_config import logger
+from app.snapshot import snapshotter
+from app.tenants import tenants
+
+
+class DrainController:
+    def __init__(
+        self, window: float = 10.0, batch_size: int = 200, reconnect_jitter_ms: int = 5000
+    ) -> None:
+        self.window = window
+        self.batch_size = max(1, batch_size)
+        self.reconnect_jitter_ms = reconnect_jitter_ms
+        self.draining = False
+        self._task: asyncio.Task[int] | None = None
+
+    @property
+    def ready(self) -> bool:
+        return not self.draining
+
+    def start(self, sio: socketio.AsyncServer) -> asyncio.Task[int]:
+        if self._task is None:
+            self.draining = True
+            self._task = asyncio.create_task(self.drain(sio))
+        return self._task
+
+    async def drain(self, sio: socketio.AsyncServer) -> int:
+        self.draining = True
+        # Record room memberships before the drain empties them, so clients
+        # get them back when they reconnect to the restarted server.
+        await snapshotter.checkpoint(freeze=True)
+        # Dashboards go last so operators can watch the drain happen.
+        sids = sorted(
+            ((tenant, conn.sid) for tenant in tenants for conn in tenant.manager.all()),
+            key=lambda item: ADMIN_ROOM in item[0].manager.get(item[1]).rooms,
+        )
+        if not sids:
+            return 0
+        batches = math.ceil(len(sids) / self.batch_size)
+        interval = self.window / batches
+        logger.info(f"Draining {len(sids)} connections in {batches} batches over {self.window}s")
+        drained = 0
+        for i in range(0, len(sids), self.batch_size):
+            if i:
+                await asyncio.sleep(interval)
+            batch = [
+                (tenant, sid)
+                for tenant, sid in sids[i : i + self.batch_size]
+                if tenant.manager.get(sid)
+            ]
+            await asyncio.gather(
+                *(self._disconnect(sio, sid, tenant.namespace) for tenant, sid in batch)
+            )
+            drained += len(batch)
+        logger.info(f"Drain complete, {drained} connections closed")
+        return drained
+
+    async def _disconnect(self, sio: socketio.AsyncServer, sid: str, namespace: str) -> None:
+        await sio.emit(
+            "server:reconnect",
+            {"reason": "draining", "delay_ms": random.randint(0, self.reconnect_jitter_ms)},
+            to=sid,
+            namespace=namespace,
+        )
+        await sio.disconnect(sid, namespace=namespace)
+
+    def reset(self) -> None:
+        self.draining = False
+        self._task = None
+
+
+drain = DrainController(
+    window=settings.drain_window,
+    batch_size=settings.drain_batch_size,
+    reconnect_jitter_ms=settings.drain_reconnect_jitter_ms,
+)
@@ -1,166 +1,572 @@
+import asyncio
+import secrets
+import time
+from operator import attrgetter
 from typing import Any
 
 import socketio
 
-from app.connections import ADMIN_ROOM, manager
+from app import schemas
+from app.auth import AuthError, Identity, authenticator
+from app.broadcast import BroadcastError, publish
+from app.capture import CONNECT, DISCONNECT, capture
+from app.connections import ADMIN_ROOM
+from app.drain import drain
+from app.fanout import encode_event, resolve_recipients, scheduler, send_encoded
 from app.logging_config import logger
-from app.message_log import msg_logger
+from app.pipeline import Handlers, error_ack, on
+from app.schemas import (
+    AdminBroadcast,
+    AdminSync,
+    DirectMessage,
+    FileBegin,
+    FileChunk,
+    FileRead,
+    FileRef,
+    JoinRoom,
+    PresenceQuery,
+    Publish,
+    RoomMessage,
+    Subscribe,
+    Typing,
+)
+from app.snapshot import snapshotter
+from app.tenants import DEFAULT_NAMESPACE, tenants
+from app.topics import TopicError
+from app.tracing import tracer
+from app.transfer import Transfer, TransferError
 
 
-def _emit_to_admin(sio: socketio.AsyncServer, event: str, data: dict[str, Any]) -> None:
-    import asyncio
+async def _fan_out(
+    sio: socketio.AsyncServer,
+    event: str,
+    data: Any,
+    start: float | None,
+    room: str | None = None,
+    skip_sid: str | None = None,
+    namespace: str = DEFAULT_NAMESPACE,
+) -> None:
+    manager = tenants[namespace].manager
+    audience = manager.count() if room is None else manager.room_size(room)
+    # More than one slice goes through the scheduler, so control traffic and
+    # other rooms get a turn between slices.
+    bulk = audience > scheduler.slice_size
+    if start is None and not bulk:
+        await sio.emit(event, data, to=room, skip_sid=skip_sid, namespace=namespace)
+        return
+    # A sampled emit still goes out encoded once; only a few probe recipients
+    # get their own packet with an ack id so the client ack can be timed. They
+    # are sent in the same pass as everyone else, not after the room.
+    encoded = encode_event(sio, event, data, namespace)
+    sends = []
+    recipients = []
+    probes = 0
+    for sid, eio_sid in sio.manager.get_participants(namespace, room):
+        if sid == skip_sid:
+            continue
+        if start is not None and probes < tracer.probes and tracer.probe_ready(sid):
+            callback = tracer.ack_callback(event, room, start, sid)
+            ack_id = sio.manager._generate_ack_id(sid, callback)
+            probe = encode_event(sio, event, data, namespace, ack_id)
+            sends.append(send_encoded(sio, [probe], [eio_sid]))
+            probes += 1
+        else:
+            recipients.append(eio_sid)
+    if bulk:
+        sends.append(scheduler.send(sio, [encoded], recipients, lane=(namespace, room)))
+    else:
+        sends.append(send_encoded(sio, [encoded], recipients))
+    await asyncio.gather(*sends)
+    if start is not None:
+        tracer.record(event, room, "fanout", start)
 
-    asyncio.create_task(sio.emit(event, data, to=ADMIN_ROOM))
 
+def _identity(data: Any) -> Any:
+    return data
 
-def register_events(sio: socketio.AsyncServer) -> None:
-    @sio.event
-    async def connect(sid: str, environ: dict[str, Any], auth: dict[str, Any] | None) -> bool:
-        logger.info(f"Client connecting: {sid}")
-        if auth:
-            logger.debug(f"Auth data for {sid}: {auth}")
+
+def _user_id(sid: str, auth: dict[str, Any] | None, identity: Identity | None) -> str:
+    if identity is not None:
+        return identity.user
+    # Without token auth, clients name themselves or count as a user of their own.
+    user = auth.get("user") if isinstance(auth, dict) else None
+    if isinstance(user, str) and 0 < len(user) <= schemas.USER_MAX_LENGTH:
+        return user
+    return sid
+
+
+class ChatHandlers(Handlers):
+    @on("connect", middleware=False)
+    async def connect(self, sid: str, environ: dict[str, Any], auth: dict[str, Any] | None) -> bool:
+        logger.info(f"Client connecting: {sid} ({self.namespace})")
+        if drain.draining:
+            raise ConnectionRefusedError("server is draining")
+        if self.tenant.full:
+            self.tenant.stats.refused += 1
+            raise ConnectionRefusedError("namespace is full")
+        identity = None
+        if authenticator.enabled:
+            token = auth.get("token") if isinstance(auth, dict) else None
+            try:
+                identity = authenticator.authenticate(token)
+            except AuthError as exc:
+                self.tenant.stats.unauthorized += 1
+                logger.info(f"Rejected {sid} ({self.namespace}): {exc}")
+                raise ConnectionRefusedError("unauthorized") from None
         client_ip = environ.get("HTTP_X_FORWARDED_FOR", environ.get("REMOTE_ADDR", ""))
         if "," in client_ip:
             client_ip = client_ip.split(",")[0].strip()
-        manager.add(sid, client_ip)
-        await sio.save_session(sid, {"connected": True})
-        logger.info(f"Client connected: {sid} from {client_ip}")
-        await sio.emit(
+        conn = self.tenant.manager.add(sid, client_ip, identity)
+        capture.record(self.namespace, sid, CONNECT)
+        self.tenant.presence.connect(sid, _user_id(sid, auth, identity))
+        if identity is not None:
+            rooms = snapshotter.reclaim(self.namespace, identity.user)
+            if rooms:
+                await self._restore_rooms(sid, rooms)
+        if identity is not None and self.tenant.mailboxes.enabled:
+            pending = await self.tenant.mailboxes.take(identity.user)
+            if pending is not None:
+                # Runs once the connect handler returns, i.e. after the CONNECT packet.
+                asyncio.create_task(self.emit("mailbox", pending, to=sid))
+        self.tenant.stats.connections += 1
+        self.tenant.deltas.schedule(self.sio)
+        await self.sio.save_session(sid, {"connected": True}, namespace=self.namespace)
+        logger.info(f"Client connected: {sid} from {client_ip} ({self.namespace})")
+        await self.emit(
             "admin:connection",
             {
                 "sid": sid,
                 "client_ip": client_ip,
-                "connected_at": manager.get(sid).connected_at.isoformat()
-                if manager.get(sid)
-                else None,
+                "connected_at": conn.connected_at.isoformat(),
             },
             to=ADMIN_ROOM,
         )
         return True
 
-    @sio.event
-    async def disconnect(sid: str) -> None:
-        logger.info(f"Client disconnecting: {sid}")
-        session = await sio.get_session(sid)
+    @on("disconnect", middleware=False)
+    async def disconnect(self, sid: str) -> None:
+        logger.info(f"Client disconnecting: {sid} ({self.namespace})")
+        session = await self.sio.get_session(sid, namespace=self.namespace)
         if session:
             logger.debug(f"Session data for {sid}: {session}")
-        await sio.emit("admin:disconnection", {"sid": sid}, to=ADMIN_ROOM)
-        manager.remove(sid)
-        logger.info(f"Client disconnected: {sid}")
+        await self.emit("admin:disconnection", {"sid": sid}, to=ADMIN_ROOM)
+        conn = self.tenant.manager.get(sid)
+        self.tenant.presence.disconnect(sid, conn.rooms if conn else frozenset())
+        if conn is not None and conn.user is not None and self.tenant.mailboxes.enabled:
+            if not self.tenant.presence.is_online(conn.user):
+                self.tenant.mailboxes.park(conn.user, conn.rooms)
+        self.tenant.presence.schedule(self.sio)
+        self.tenant.manager.remove(sid)
+        self.tenant.topics.remove(sid)
+        tracer.forget(sid)
+        capture.record(self.namespace, sid, DISCONNECT)
+        if self.limiter is not None:
+            self.limiter.forget(sid)
+        self.tenant.deltas.schedule(self.sio)
+        logger.info(f"Client disconnected: {sid} ({self.namespace})")
 
-    @sio.event
-    async def message(sid: str, data: Any) -> Any:
+    @on("message", validate=schemas.payload, data=_identity, count=True, trace=True)
+    async def message(self, sid: str, data: Any, start: float | None = None) -> Any:
         logger.info(f"Message from {sid}: {data}")
-        entry = msg_logger.log(event="message", from_sid=sid, data=data)
-        await sio.emit(
-            "admin:message",
-            {
-                "event": "message",
-                "from": sid,
-                "data": data,
-                "timestamp": entry.timestamp.isoformat(),
-            },
-            to=ADMIN_ROOM,
-        )
-        await sio.emit("message", data, skip_sid=sid)
+        await _fan_out(self.sio, "message", data, start, skip_sid=sid, namespace=self.namespace)
         return {"status": "received", "sid": sid}
 
-    @sio.event
-    async def newMessage(sid: str, data: Any) -> Any:
+    @on("newMessage", validate=schemas.payload, data=_identity, count=True, trace=True)
+    async def new_message(self, sid: str, data: Any, start: float | None = None) -> Any:
         logger.info(f"Message from {sid}: {data}")
-        entry = msg_logger.log(event="newMessage", from_sid=sid, data=data)
-        await sio.emit(
-            "admin:message",
-            {
-                "event": "newMessage",
-                "from": sid,
-                "data": data,
-                "timestamp": entry.timestamp.isoformat(),
-            },
-            to=ADMIN_ROOM,
-        )
-        await sio.emit("newMessage", data, skip_sid=sid)
+        await _fan_out(self.sio, "newMessage", data, start, skip_sid=sid, namespace=self.namespace)
         return {"status": "received", "sid": sid}
 
-    @sio.event
-    async def join_room(sid: str, room: str) -> dict[str, str]:
+    @on("join_room", validate=schemas.join_room, room=attrgetter("room"))
+    async def join_room(self, sid: str, options: JoinRoom) -> dict[str, Any]:
+        room = options.room
+        if room == ADMIN_ROOM and not self._may_administer(sid):
+            return error_ack("Not authorized")
         logger.info(f"Client {sid} joining room: {room}")
-        await sio.enter_room(sid, room)
-        manager.add_room(sid, room)
-        entry = msg_logger.log(event="join_room", from_sid=sid, to_room=room, data=None)
-        await sio.emit(
-            "admin:message",
-            {
-                "event": "join_room",
-                "from": sid,
-                "room": room,
-                "timestamp": entry.timestamp.isoformat(),
-            },
-            to=ADMIN_ROOM,
-        )
-        await sio.emit("room_joined", {"room": room, "sid": sid}, to=room)
+        await self.sio.enter_room(sid, room, namespace=self.namespace)
+        self.tenant.manager.add_room(sid, room)
+        self.tenant.presence.join(sid, room)
+        replay = None
+        # Snapshot after entering the room: live messages may overlap the replay,
+        # but clients can drop those by ``seq`` and nothing falls in between.
+        if options.replay:
+            replay = self.tenant.history.replay(room, since=options.since, limit=options.limit)
+        self.tenant.deltas.schedule(self.sio)
+        self.tenant.presence.schedule(self.sio)
+        if replay is not None:
+            await self.emit("room_history", replay.to_payload(), to=sid)
+        await self.emit("room_joined", {"room": room, "sid": sid}, to=room)
+        if replay is not None:
+            return {"status": "joined", "room": room, "history": replay.count}
         return {"status": "joined", "room": room}
 
-    @sio.event
-    async def leave_room(sid: str, room: str) -> dict[str, str]:
+    @on("leave_room", validate=schemas.room_name, room=_identity)
+    async def leave_room(self, sid: str, room: str) -> dict[str, str]:
         logger.info(f"Client {sid} leaving room: {room}")
-        await sio.leave_room(sid, room)
-        manager.remove_room(sid, room)
-        entry = msg_logger.log(event="leave_room", from_sid=sid, to_room=room, data=None)
-        await sio.emit(
-            "admin:message",
-            {
-                "event": "leave_room",
-                "from": sid,
-                "room": room,
-                "timestamp": entry.timestamp.isoformat(),
-            },
-            to=ADMIN_ROOM,
-        )
-        await sio.emit("room_left", {"room": room, "sid": sid}, to=room)
+        await self.sio.leave_room(sid, room, namespace=self.namespace)
+        self.tenant.manager.remove_room(sid, room)
+        self.tenant.presence.leave(sid, room)
+        self.tenant.deltas.schedule(self.sio)
+        self.tenant.presence.schedule(self.sio)
+        await self.emit("room_left", {"room": room, "sid": sid}, to=room)
         return {"status": "left", "room": room}
 
-    @sio.event
-    async def room_message(sid: str, data: dict[str, Any]) -> dict[str, str]:
-        room = data.get("room")
-        message = data.get("message")
-        if not room or message is None:
-            return {"status": "error", "message": "Missing room or message"}
+    @on(
+        "room_message",
+        validate=schemas.room_message,
+        room=attrgetter("room"),
+        data=attrgetter("message"),
+        count=True,
+        trace=True,
+        dedup=attrgetter("message_id"),
+    )
+    async def room_message(
+        self, sid: str, data: RoomMessage, start: float | None = None
+    ) -> dict[str, str]:
+        room = data.room
+        message = data.message
         logger.info(f"Room message from {sid} to {room}: {message}")
-        entry = msg_logger.log(event="room_message", from_sid=sid, to_room=room, data=message)
-        await sio.emit(
-            "admin:message",
-            {
-                "event": "room_message",
-                "from": sid,
-                "room": room,
-                "data": message,
-                "timestamp": entry.timestamp.isoformat(),
-            },
-            to=ADMIN_ROOM,
-        )
-        await sio.emit(
-            "room_message", {"from": sid, "room": room, "message": message}, to=room, skip_sid=sid
+        conflator = self.tenant.conflator
+        key = data.conflate
+        if key is None and conflator.conflated(room):
+            key = sid
+        if key is not None:
+            # State updates: only the latest value per key matters, so they
+            # skip history and mailboxes and go out in the next batch.
+            update = {"from": sid, "key": key, "message": message}
+            if data.message_id is not None:
+                update["message_id"] = data.message_id
+            if conflator.put(room, key, update):
+                conflator.schedule(self.sio)
+                return {"status": "conflated", "room": room}
+        seq = self.tenant.history.append(room, sid, message)
+        payload = {"from": sid, "room": room, "message": message, "seq": seq}
+        if data.message_id is not None:
+            payload["message_id"] = data.message_id
+        await _fan_out(
+            self.sio,
+            "room_message",
+            payload,
+            start,
+            room=room,
+            skip_sid=sid,
+            namespace=self.namespace,
         )
+        if self.tenant.mailboxes.enabled:
+            self.tenant.mailboxes.put(
+                self.tenant.mailboxes.subscribers(room), "room_message", payload
+            )
         return {"status": "sent", "room": room}
 
-    @sio.event
-    async def broadcast(sid: str, data: Any) -> dict[str, str]:
+    @on(
+        "direct_message",
+        validate=schemas.direct_message,
+        room=attrgetter("target"),
+        data=attrgetter("message"),
+        count=True,
+        priority=True,
+    )
+    async def direct_message(self, sid: str, data: DirectMessage) -> dict[str, Any]:
+        # Sids and verified identities are both indexed, so routing never
+        # needs a room per pair of users.
+        manager = self.tenant.manager
+        sender = manager.get(sid)
+        if data.to is not None:
+            targets = [data.to] if manager.get(data.to) is not None else []
+        else:
+            targets = manager.sids_for_user(data.user)
+        payload = {"from": sid, "user": sender.user if sender else None, "message": data.message}
+        if targets:
+            await self.emit("direct_message", payload, to=targets)
+            return {"status": "delivered", "to": data.target, "sids": len(targets)}
+        mailboxes = self.tenant.mailboxes
+        if data.user is not None and authenticator.enabled and mailboxes.enabled:
+            # Only users seen within the retention window get a mailbox, so
+            # made-up ids can't push real users' boxes out of the LRU.
+            seen = self.tenant.presence.last_seen(data.user)
+            if seen is not None and time.time() - seen <= mailboxes.ttl:
+                if mailboxes.put([data.user], "direct_message", payload):
+                    return {"status": "queued", "to": data.target}
+        return {"status": "offline", "to": data.target}
+
+    @on(
+        "broadcast",
+        validate=schemas.payload,
+        data=_identity,
+        count=True,
+        trace=True,
+        dedup=schemas.message_id,
+    )
+    async def broadcast(self, sid: str, data: Any, start: float | None = None) -> dict[str, str]:
         logger.info(f"Broadcast from {sid}: {data}")
-        entry = msg_logger.log(event="broadcast", from_sid=sid, data=data)
-        await sio.emit(
-            "admin:message",
-            {
-                "event": "broadcast",
-                "from": sid,
-                "data": data,
-                "timestamp": entry.timestamp.isoformat(),
-            },
-            to=ADMIN_ROOM,
+        await _fan_out(
+            self.sio,
+            "broadcast",
+            {"from": sid, "data": data},
+            start,
+            skip_sid=sid,
+            namespace=self.namespace,
         )
-        await sio.emit("broadcast", {"from": sid, "data": data}, skip_sid=sid)
         return {"status": "broadcasted"}
 
-    @sio.event
-    async def ping(sid: str) -> dict[str, str]:
+    @on("typing", validate=schemas.typing, log=False, mirror=False, priority=True)
+    async def typing(self, sid: str, data: Typing) -> dict[str, str]:
+        # Keystrokes only refresh the indicator; the room hears about changes
+        # once per debounce window.
+        if not self.tenant.presence.typing(sid, data.room, data.typing):
+            return error_ack("Not in room")
+        self.tenant.presence.schedule(self.sio)
+        return {"status": "ok", "room": data.room}
+
+    @on(
+        "presence:query",
+        validate=schemas.presence_query,
+        log=False,
+        mirror=False,
+        priority=True,
+    )
+    async def presence_query(self, sid: str, data: PresenceQuery) -> dict[str, Any]:
+        result: dict[str, Any] = {"status": "ok"}
+        if data.room is not None:
+            result.update(self.tenant.presence.room(data.room))
+        if data.users is not None:
+            result["presence"] = self.tenant.presence.users(data.users)
+        return result
+
+    async def _restore_rooms(self, sid: str, rooms: frozenset[str]) -> None:
+        # Rooms held before a restart come back in one step instead of a
+        # ``join_room`` round trip per room.
+        for room in rooms:
+            await self.sio.enter_room(sid, room, namespace=self.namespace)
+            self.tenant.manager.add_room(sid, room)
+            self.tenant.presence.join(sid, room)
+        self.tenant.presence.schedule(self.sio)
+        asyncio.create_task(self.emit("rooms_restored", {"rooms": sorted(rooms)}, to=sid))
+
+    def _transfer_ack(self, transfer: Transfer) -> dict[str, Any]:
+        # Only ever sent to the uploader, so it may carry the upload token.
+        ack: dict[str, Any] = {
+            "status": "complete" if transfer.complete else "ok",
+            "id": transfer.id,
+            "offset": transfer.offset,
+            "chunk_size": self.tenant.transfers.chunk_size,
+            "window": self.tenant.transfers.window,
+        }
+        if transfer.user is None:
+            ack["token"] = transfer.token
+        return ack
+
+    def _is_uploader(self, sid: str, transfer: Transfer, token: str | None = None) -> bool:
+        if transfer.user is None:
+            return sid == transfer.owner or (
+                token is not None and secrets.compare_digest(token, transfer.token)
+            )
+        conn = self.tenant.manager.get(sid)
+        return conn is not None and conn.user == transfer.user
+
+    def _may_download(self, sid: str, transfer: Transfer, token: str | None = None) -> bool:
+        if transfer.room is None:
+            return self._is_uploader(sid, transfer, token)
+        conn = self.tenant.manager.get(sid)
+        return conn is not None and transfer.room in conn.rooms
+
+    async def _relay_chunk(self, sid: str, transfer: Transfer, chunk: FileChunk) -> None:
+        # One encode for the whole room with the bytes as a binary attachment,
+        # written out in paced slices like admin broadcasts.
+        own = self.sio.manager.eio_sid_from_sid(sid, self.namespace)
+        recipients = [
+            eio_sid
+            for eio_sid in resolve_recipients(
+                self.sio, room=transfer.room, namespace=self.namespace
+            )
+            if eio_sid != own
+        ]
+        if recipients:
+            payload = {"id": transfer.id, "offset": chunk.offset, "data": chunk.data}
+            encoded = encode_event(self.sio, "file:chunk", payload, self.namespace)
+            await scheduler.send(
+                self.sio, [encoded], recipients, lane=(self.namespace, transfer.room)
+            )
+
+    @on(
+        "file:begin",
+        validate=schemas.file_begin,
+        room=attrgetter("room"),
+        data=attrgetter("summary"),
+    )
+    async def file_begin(self, sid: str, data: FileBegin) -> dict[str, Any]:
+        conn = self.tenant.manager.get(sid)
+        if data.room is not None and (conn is None or data.room not in conn.rooms):
+            return error_ack("Not in room")
+        try:
+            transfer = await self.tenant.transfers.begin(
+                sid, conn.user if conn else None, data.name, data.size, data.room, data.sha256
+            )
+        except TransferError as exc:
+            return error_ack(str(exc))
+        if transfer.room is not None:
+            await self.emit(
+                "file:offer", {**transfer.to_dict(), "from": sid}, to=transfer.room, skip_sid=sid
+            )
+            if transfer.complete:
+                await self.emit("file:complete", transfer.to_dict(), to=transfer.room, skip_sid=sid)
+        return self._transfer_ack(transfer)
+
+    @on("file:resume", validate=schemas.file_ref, log=False, mirror=False)
+    async def file_resume(self, sid: str, data: FileRef) -> dict[str, Any]:
+        # After a reconnect the client picks up from the acked offset.
+        try:
+            transfer = await self.tenant.transfers.get(data.id)
+        except TransferError as exc:
+            return error_ack(str(exc))
+        if not self._is_uploader(sid, transfer, data.token):
+            return error_ack("Not the uploader")
+        return self._transfer_ack(transfer)
+
+    @on("file:chunk", validate=schemas.file_chunk, log=False, mirror=False)
+    async def file_chunk(self, sid: str, data: FileChunk) -> dict[str, Any]:
+        transfers = self.tenant.transfers
+        try:
+            transfer = await transfers.get(data.id)
+        except TransferError as exc:
+            return error_ack(str(exc))
+        if not self._is_uploader(sid, transfer, data.token):
+            return error_ack("Not the uploader")
+        try:
+            async with transfers.slot(transfer):
+                await transfers.write(transfer, data.offset, data.data)
+                if transfer.room is not None:
+                    await self._relay_chunk(sid, transfer, data)
+        except TransferError as exc:
+            ack: dict[str, Any] = error_ack(str(exc))
+            if transfer.id in transfers:
+                # Tells the client where to resume from.
+                ack["offset"] = transfer.offset
+            elif transfer.room is not None:
+                await self.emit(
+                    "file:aborted", {"id": transfer.id, "reason": str(exc)}, to=transfer.room
+                )
+            return ack
+        if transfer.complete and transfer.room is not None:
+            await self.emit("file:complete", transfer.to_dict(), to=transfer.room, skip_sid=sid)
+        return self._transfer_ack(transfer)
+
+    @on("file:read", validate=schemas.file_read, log=False, mirror=False)
+    async def file_read(self, sid: str, data: FileRead) -> dict[str, Any]:
+        transfers = self.tenant.transfers
+        try:
+            transfer = await transfers.get(data.id)
+            if not self._may_download(sid, transfer, data.token):
+                return error_ack("Not allowed")
+            async with transfers.reading(sid):
+                chunk = await transfers.read(transfer, data.offset)
+        except TransferError as exc:
+            return error_ack(str(exc))
+        end = data.offset + len(chunk)
+        return {
+            "status": "ok",
+            "id": transfer.id,
+            "offset": data.offset,
+            "data": chunk,
+            "eof": transfer.complete and end == transfer.size,
+        }
+
+    @on("file:abort", validate=schemas.file_ref, log=False, mirror=False)
+    async def file_abort(self, sid: str, data: FileRef) -> dict[str, Any]:
+        transfers = self.tenant.transfers
+        try:
+            transfer = await transfers.get(data.id)
+        except TransferError as exc:
+            return error_ack(str(exc))
+        if not self._is_uploader(sid, transfer, data.token):
+            return error_ack("Not the uploader")
+        await transfers.abort(transfer)
+        if transfer.room is not None:
+            await self.emit(
+                "file:aborted", {"id": transfer.id, "reason": "aborted"}, to=transfer.room
+            )
+        return {"status": "aborted", "id": transfer.id}
+
+    @on("topic:subscribe", validate=schemas.subscribe, room=attrgetter("pattern"))
+    async def topic_subscribe(self, sid: str, data: Subscribe) -> dict[str, Any]:
+        # A pattern is one trie entry, however many topics it covers, so
+        # subscribers never join a room per topic.
+        topics = self.tenant.topics
+        try:
+            topics.subscribe(sid, data.pattern)
+        except TopicError as exc:
+            return error_ack(str(exc))
+        return {
+            "status": "subscribed",
+            "pattern": data.pattern,
+            "subscriptions": topics.subscriptions(sid),
+        }
+
+    @on("topic:unsubscribe", validate=schemas.subscribe, room=attrgetter("pattern"))
+    async def topic_unsubscribe(self, sid: str, data: Subscribe) -> dict[str, Any]:
+        topics = self.tenant.topics
+        if not topics.unsubscribe(sid, data.pattern):
+            return error_ack("Not subscribed")
+        return {
+            "status": "unsubscribed",
+            "pattern": data.pattern,
+            "subscriptions": topics.subscriptions(sid),
+        }
+
+    @on(
+        "topic:publish",
+        validate=schemas.publish,
+        room=attrgetter("topic"),
+        data=attrgetter("message"),
+        count=True,
+        dedup=attrgetter("message_id"),
+    )
+    async def topic_publish(self, sid: str, data: Publish) -> dict[str, Any]:
+        matched = self.tenant.topics.match(data.topic)
+        matched.discard(sid)
+        recipients = resolve_recipients(self.sio, sids=matched, namespace=self.namespace)
+        if recipients:
+            # Every matching pattern's subscribers get the one encoded packet.
+            payload = {"from": sid, "topic": data.topic, "message": data.message}
+            if data.message_id is not None:
+                payload["message_id"] = data.message_id
+            encoded = encode_event(self.sio, "topic:message", payload, self.namespace)
+            await scheduler.send(self.sio, [encoded], recipients, lane=(self.namespace, data.topic))
+        return {"status": "published", "topic": data.topic, "recipients": len(recipients)}
+
+    def _may_administer(self, sid: str) -> bool:
+        if not authenticator.enabled:
+            return True
+        conn = self.tenant.manager.get(sid)
+        return conn is not None and conn.admin
+
+    def _is_admin_client(self, sid: str) -> bool:
+        conn = self.tenant.manager.get(sid)
+        return conn is not None and ADMIN_ROOM in conn.rooms
+
+    @on("admin:sync", validate=schemas.admin_sync, log=False, mirror=False, priority=True)
+    async def admin_sync(self, sid: str, data: AdminSync) -> dict[str, Any]:
+        if authenticator.enabled and not self._is_admin_client(sid):
+            return error_ack("Not an admin client")
+        return self.tenant.manager.sync(data.since)
+
+    @on("admin:broadcast", validate=schemas.admin_broadcast, log=False, mirror=False)
+    async def admin_broadcast(self, sid: str, data: AdminBroadcast) -> dict[str, Any]:
+        if not self._is_admin_client(sid):
+            return error_ack("Not an admin client")
+        try:
+            return await publish(
+                self.sio, data.messages, room=data.room, sids=data.sids, namespace=self.namespace
+            )
+        except BroadcastError as exc:
+            return error_ack(str(exc))
+
+    @on("ping", log=False, mirror=False, priority=True)
+    async def ping(self, sid: str, data: Any = None) -> dict[str, str]:
         return {"status": "pong", "sid": sid}
+
+
+def register_events(sio: socketio.AsyncServer, namespace: str = DEFAULT_NAMESPACE) -> ChatHandlers:
+    handlers = ChatHandlers(sio, tenants.add(namespace))
+    handlers.register()
+    return handlers
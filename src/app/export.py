@@ -0,0 +1,88 @@
+import asyncio
+import json
+import zlib
+from collections.abc import Iterable
+from datetime import UTC, datetime
+from typing import Any
+
+from app.message_log import MessageLog
+from app.routing import HTTPError, Send
+
+# Entries encoded between yields to the event loop
+EXPORT_BATCH = 128
+# Compressed bytes buffered before a body chunk is sent
+FLUSH_BYTES = 65536
+
+
+def log_record(entry: MessageLog) -> dict[str, Any]:
+    return {
+        "event": entry.event,
+        "from": entry.from_sid,
+        "room": entry.to_room,
+        "data": entry.data,
+        "timestamp": entry.timestamp.isoformat(),
+    }
+
+
+def parse_time(value: str | None) -> datetime | None:
+    # ISO 8601 or Unix seconds; naive times are UTC like the log's own.
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        pass
+    else:
+        try:
+            return datetime.fromtimestamp(seconds, UTC)
+        except (OverflowError, OSError, ValueError):
+            raise HTTPError(400, f"Invalid time: {value}") from None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPError(400, f"Invalid time: {value}") from None
+    return parsed if parsed.tzinfo is not None else parsed.replace(tzinfo=UTC)
+
+
+def _lines(entries: list[MessageLog]) -> bytes:
+    dumps = json.dumps
+    # Payloads that aren't JSON (binary data, for one) are exported as strings.
+    return "".join(dumps(log_record(entry), default=str) + "\n" for entry in entries).encode()
+
+
+async def stream_logs(
+    send: Send, entries: Iterable[MessageLog], filename: str, compress: bool = True
+) -> None:
+    # Encodes and compresses a batch at a time and sends whenever enough
+    # output has built up, so memory stays flat however long the export is
+    # and socket traffic gets the loop between batches.
+    headers = [
+        [b"content-type", b"application/gzip" if compress else b"application/x-ndjson"],
+        [b"content-disposition", f'attachment; filename="{filename}"'.encode()],
+    ]
+    await send({"type": "http.response.start", "status": 200, "headers": headers})
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    pending: list[bytes] = []
+    size = 0
+    batch: list[MessageLog] = []
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) < EXPORT_BATCH:
+            continue
+        chunk = _lines(batch)
+        batch.clear()
+        if compressor is not None:
+            chunk = compressor.compress(chunk)
+        if chunk:
+            pending.append(chunk)
+            size += len(chunk)
+        if size >= FLUSH_BYTES:
+            await send({"type": "http.response.body", "body": b"".join(pending), "more_body": True})
+            pending.clear()
+            size = 0
+        await asyncio.sleep(0)
+    tail = _lines(batch) if batch else b""
+    if compressor is not None:
+        tail = compressor.compress(tail) + compressor.flush()
+    pending.append(tail)
+    await send({"type": "http.response.body", "body": b"".join(pending)})
@@ -0,0 +1,212 @@
+import asyncio
+from collections import OrderedDict, deque
+from collections.abc import Hashable, Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any
+
+import socketio
+from engineio import packet as eio_packet
+from socketio import packet
+
+from app.config import settings
+
+
+@dataclass(slots=True)
+class EncodedEvent:
+    event: str
+    packets: list[eio_packet.Packet]
+
+
+def encode_event(
+    sio: socketio.AsyncServer,
+    event: str,
+    data: Any,
+    namespace: str = "/",
+    ack_id: int | None = None,
+) -> EncodedEvent:
+    pkt = sio.packet_class(packet.EVENT, namespace=namespace, data=[event, data], id=ack_id)
+    encoded = pkt.encode()
+    if not isinstance(encoded, list):
+        encoded = [encoded]
+    return EncodedEvent(event, [eio_packet.Packet(eio_packet.MESSAGE, p) for p in encoded])
+
+
+def resolve_recipients(
+    sio: socketio.AsyncServer,
+    room: str | None = None,
+    sids: Iterable[str] | None = None,
+    namespace: str = "/",
+) -> list[str]:
+    if sids is not None:
+        eio_sids = (sio.manager.eio_sid_from_sid(sid, namespace) for sid in sids)
+        return [eio_sid for eio_sid in dict.fromkeys(eio_sids) if eio_sid is not None]
+    return [eio_sid for _, eio_sid in sio.manager.get_participants(namespace, room)]
+
+
+async def send_encoded(
+    sio: socketio.AsyncServer,
+    events: list[EncodedEvent],
+    eio_sids: list[str],
+    slice_size: int = settings.fanout_slice_size,
+    pause: float = settings.fanout_slice_pause,
+) -> int:
+    slice_size = max(1, slice_size)
+    slices = 0
+    for i in range(0, len(eio_sids), slice_size):
+        if slices:
+            await asyncio.sleep(pause)
+        await _send_slice(sio, events, eio_sids[i : i + slice_size])
+        slices += 1
+    return slices
+
+
+async def _send_slice(
+    sio: socketio.AsyncServer, events: list[EncodedEvent], eio_sids: list[str]
+) -> None:
+    await asyncio.gather(*(_send_all(sio, eio_sid, events) for eio_sid in eio_sids))
+
+
+async def _send_all(sio: socketio.AsyncServer, eio_sid: str, events: list[EncodedEvent]) -> None:
+    # Sequential per recipient so a batch of messages arrives in order.
+    for encoded in events:
+        for pkt in encoded.packets:
+            await sio.eio.send_packet(eio_sid, pkt)
+
+
+FAIRNESS = ("round_robin", "fifo")
+
+
+@dataclass(slots=True)
+class _Job:
+    sio: socketio.AsyncServer
+    events: list[EncodedEvent]
+    eio_sids: list[str]
+    done: asyncio.Future[int]
+    offset: int = 0
+    slices: int = 0
+
+
+class FanoutScheduler:
+    def __init__(
+        self,
+        slice_size: int = 500,
+        pause: float = 0.0,
+        fairness: str = "round_robin",
+        quantum: int = 1,
+        control_wait: float = 0.05,
+    ) -> None:
+        if fairness not in FAIRNESS:
+            raise ValueError(f"fanout fairness must be one of {', '.join(FAIRNESS)}")
+        self.slice_size = max(1, slice_size)
+        self.pause = pause
+        self.fairness = fairness
+        self.quantum = max(1, quantum)
+        self.control_wait = control_wait
+        self.jobs = 0
+        self.slices = 0
+        self.deferred = 0
+        # lane (a room or topic) -> its jobs in arrival order; the front lane
+        # is served next, so round robin moves a lane to the back after its turn.
+        self._lanes: OrderedDict[Hashable, deque[_Job]] = OrderedDict()
+        self._worker: asyncio.Task[None] | None = None
+        self._control = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    @contextmanager
+    def control(self) -> Iterator[None]:
+        # Control handlers hold this while they run; bulk slices wait for them.
+        self._control += 1
+        self._idle.clear()
+        try:
+            yield
+        finally:
+            self._control -= 1
+            if not self._control:
+                self._idle.set()
+
+    async def send(
+        self,
+        sio: socketio.AsyncServer,
+        events: list[EncodedEvent],
+        eio_sids: list[str],
+        lane: Hashable = None,
+    ) -> int:
+        if not eio_sids:
+            return 0
+        if len(eio_sids) <= self.slice_size and lane not in self._lanes:
+            # A single slice has nothing to interleave with.
+            await _send_slice(sio, events, eio_sids)
+            return 1
+        job = _Job(sio, events, eio_sids, asyncio.get_running_loop().create_future())
+        queue = self._lanes.get(lane)
+        if queue is None:
+            queue = self._lanes[lane] = deque()
+        queue.append(job)
+        self.jobs += 1
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        return await job.done
+
+    async def _run(self) -> None:
+        lanes = self._lanes
+        served = 0
+        while lanes:
+            lane, queue = next(iter(lanes.items()))
+            job = queue[0]
+            if not job.done.cancelled():
+                end = job.offset + self.slice_size
+                try:
+                    await _send_slice(job.sio, job.events, job.eio_sids[job.offset : end])
+                except Exception as exc:
+                    if not job.done.done():
+                        job.done.set_exception(exc)
+                job.offset = end
+                job.slices += 1
+                self.slices += 1
+                served += 1
+            if job.done.done() or job.offset >= len(job.eio_sids):
+                queue.popleft()
+                if not job.done.done():
+                    job.done.set_result(job.slices)
+            if not queue:
+                del lanes[lane]
+                served = 0
+            elif self.fairness == "round_robin" and served >= self.quantum:
+                lanes.move_to_end(lane)
+                served = 0
+            if lanes:
+                await self._yield()
+
+    async def _yield(self) -> None:
+        await asyncio.sleep(self.pause)
+        if self._control:
+            # Bounded, so a steady stream of control events can't starve bulk sends.
+            self.deferred += 1
+            try:
+                await asyncio.wait_for(self._idle.wait(), self.control_wait)
+            except TimeoutError:
+                pass
+
+    def queued(self) -> int:
+        return sum(len(queue) for queue in self._lanes.values())
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "fairness": self.fairness,
+            "lanes": len(self._lanes),
+            "queued": self.queued(),
+            "jobs": self.jobs,
+            "slices": self.slices,
+            "deferred": self.deferred,
+        }
+
+
+scheduler = FanoutScheduler(
+    slice_size=settings.fanout_slice_size,
+    pause=settings.fanout_slice_pause,
+    fairness=settings.fanout_fairness,
+    quantum=settings.fanout_quantum,
+    control_wait=settings.fanout_control_wait,
+)
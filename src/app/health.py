@@ -0,0 +1,64 @@
+import asyncio
+import contextlib
+
+from app.config import settings
+from app.drain import drain
+from app.tenants import tenants
+
+OK = b'{"status":"ok"}'
+READY = b'{"status":"ready"}'
+DRAINING = b'{"status":"unavailable","reason":"draining"}'
+LAGGING = b'{"status":"unavailable","reason":"event_loop_lag"}'
+AT_CAPACITY = b'{"status":"unavailable","reason":"capacity"}'
+
+
+class HealthMonitor:
+    def __init__(
+        self, interval: float = 0.5, max_lag_ms: float = 250.0, max_connections: int = 0
+    ) -> None:
+        self.interval = interval
+        self.max_lag_ms = max_lag_ms
+        self.max_connections = max_connections
+        self.lag_ms = 0.0
+        self._task: asyncio.Task[None] | None = None
+
+    def observe_lag(self, lag_ms: float) -> None:
+        # Jump up immediately, decay slowly, so one quiet tick does not mask overload.
+        self.lag_ms = lag_ms if lag_ms > self.lag_ms else (self.lag_ms + lag_ms) / 2
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.observe_lag(max(0.0, (loop.time() - expected) * 1000))
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    def liveness(self) -> tuple[int, bytes]:
+        return 200, OK
+
+    def readiness(self) -> tuple[int, bytes]:
+        if drain.draining:
+            return 503, DRAINING
+        if self.lag_ms > self.max_lag_ms:
+            return 503, LAGGING
+        if self.max_connections and tenants.connection_count() >= self.max_connections:
+            return 503, AT_CAPACITY
+        return 200, READY
+
+
+health = HealthMonitor(
+    interval=settings.health_interval,
+    max_lag_ms=settings.max_loop_lag_ms,
+    max_connections=settings.max_connections,
+)
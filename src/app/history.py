@@ -0,0 +1,121 @@
+import json
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from typing import Any
+
+from app.config import settings
+
+
+@dataclass(slots=True)
+class RoomBuffer:
+    frames: deque[tuple[int, bytes]] = field(default_factory=deque)
+    size: int = 0
+    last_seq: int = 0
+
+
+@dataclass(slots=True)
+class Replay:
+    room: str
+    frames: bytes
+    count: int
+    last_seq: int
+
+    def to_payload(self) -> dict[str, Any]:
+        return {
+            "room": self.room,
+            "count": self.count,
+            "last_seq": self.last_seq,
+            "messages": self.frames,
+        }
+
+
+class RoomHistory:
+    def __init__(
+        self, max_messages: int = 100, max_bytes: int = 262144, max_rooms: int = 1000
+    ) -> None:
+        self._rooms: OrderedDict[str, RoomBuffer] = OrderedDict()
+        # Highest seq of any evicted or cleared room. New buffers count on
+        # from here, so a room written again after eviction never reuses a
+        # seq clients have already seen, without keeping state per room.
+        self._floor = 0
+        self._max_messages = max_messages
+        self._max_bytes = max_bytes
+        self._max_rooms = max_rooms
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_messages > 0 and self._max_bytes > 0
+
+    def append(self, room: str, sid: str, message: Any) -> int:
+        if not self.enabled:
+            return 0
+        buf = self._rooms.get(room)
+        if buf is None:
+            buf = self._rooms[room] = RoomBuffer(last_seq=self._floor)
+            if len(self._rooms) > self._max_rooms:
+                self._drop(self._rooms.popitem(last=False)[1])
+        else:
+            self._rooms.move_to_end(room)
+        seq = buf.last_seq + 1
+        entry = {
+            "seq": seq,
+            "from": sid,
+            "room": room,
+            "message": message,
+            "timestamp": datetime.now(UTC).isoformat(),
+        }
+        try:
+            frame = json.dumps(entry, separators=(",", ":")).encode()
+        except (TypeError, ValueError):
+            return 0
+        buf.last_seq = seq
+        if len(frame) > self._max_bytes:
+            return seq
+        buf.frames.append((seq, frame))
+        buf.size += len(frame)
+        while len(buf.frames) > self._max_messages or buf.size > self._max_bytes:
+            buf.size -= len(buf.frames.popleft()[1])
+        return seq
+
+    def replay(self, room: str, since: int | None = None, limit: int | None = None) -> Replay:
+        buf = self._rooms.get(room)
+        if buf is None:
+            return Replay(room=room, frames=b"[]", count=0, last_seq=self._floor)
+        floor = since if since is not None else 0
+        cap = limit if limit is not None else len(buf.frames)
+        selected: list[bytes] = []
+        for seq, frame in reversed(buf.frames):
+            if seq <= floor or len(selected) >= cap:
+                break
+            selected.append(frame)
+        selected.reverse()
+        return Replay(
+            room=room,
+            frames=b"[" + b",".join(selected) + b"]",
+            count=len(selected),
+            last_seq=buf.last_seq,
+        )
+
+    def count(self, room: str) -> int:
+        buf = self._rooms.get(room)
+        return len(buf.frames) if buf else 0
+
+    def _drop(self, buf: RoomBuffer) -> None:
+        self._floor = max(self._floor, buf.last_seq)
+
+    def clear(self, room: str | None = None) -> None:
+        if room is None:
+            self._rooms.clear()
+            self._floor = 0
+        else:
+            buf = self._rooms.pop(room, None)
+            if buf is not None:
+                self._drop(buf)
+
+
+history = RoomHistory(
+    max_messages=settings.room_history_size,
+    max_bytes=settings.room_history_bytes,
+    max_rooms=settings.room_history_rooms,
+)
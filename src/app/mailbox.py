@@ -0,0 +1,333 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from app.config import settings
+from app.connections import ADMIN_ROOM
+from app.logging_config import logger
+
+# (queued at, event, data, encoded size)
+Entry = tuple[float, str, Any, int]
+# (JSON lines, message count, bytes) waiting to be appended to a spill file
+SpillWrite = tuple[str, int, int]
+
+
+@dataclass(slots=True)
+class Mailbox:
+    entries: deque[Entry] = field(default_factory=deque)
+    bytes: int = 0
+    spilled: int = 0
+    spilled_bytes: int = 0
+    dropped: int = 0
+
+    @property
+    def count(self) -> int:
+        return len(self.entries) + self.spilled
+
+
+class MailboxStore:
+    def __init__(
+        self,
+        enabled: bool = False,
+        max_messages: int = 100,
+        max_bytes: int = 262144,
+        ttl: float = 86400.0,
+        memory_bytes: int = 67108864,
+        max_users: int = 10000,
+        spill_dir: Path | None = None,
+    ) -> None:
+        self.enabled = enabled
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.memory_limit = memory_bytes
+        self.max_users = max_users
+        self.spill_dir = spill_dir
+        self.memory = 0
+        self.dropped = 0
+        self.expired = 0
+        # Least recently written first, so memory pressure hits idle boxes.
+        self._boxes: OrderedDict[str, Mailbox] = OrderedDict()
+        # Offline users and the rooms they were in, kept until ``ttl``.
+        self._parked: OrderedDict[str, tuple[frozenset[str], float]] = OrderedDict()
+        self._by_room: dict[str, set[str]] = {}
+        # Spill I/O runs in a worker thread behind this lock, never on the
+        # loop: files to delete go first, then pending appends.
+        self._writes: dict[str, list[SpillWrite]] = {}
+        self._deletes: set[str] = set()
+        self._io_lock = asyncio.Lock()
+        self._writer: asyncio.Task[None] | None = None
+
+    def park(self, user: str, rooms: set[str] | frozenset[str]) -> None:
+        self.unpark(user)
+        rooms = frozenset(room for room in rooms if room != ADMIN_ROOM)
+        if not rooms:
+            return
+        self._parked[user] = (rooms, time.time() + self.ttl)
+        for room in rooms:
+            self._by_room.setdefault(room, set()).add(user)
+        while len(self._parked) > self.max_users:
+            self.unpark(next(iter(self._parked)))
+
+    def unpark(self, user: str) -> None:
+        parked = self._parked.pop(user, None)
+        if parked is None:
+            return
+        for room in parked[0]:
+            users = self._by_room.get(room)
+            if users is not None:
+                users.discard(user)
+                if not users:
+                    del self._by_room[room]
+
+    def subscribers(self, room: str) -> list[str]:
+        users = self._by_room.get(room)
+        if not users:
+            return []
+        now = time.time()
+        for user in [user for user in users if self._parked[user][1] <= now]:
+            self.unpark(user)
+        return list(self._by_room.get(room, ()))
+
+    def put(self, users: list[str], event: str, data: Any) -> int:
+        if not users:
+            return 0
+        # Sized once for every recipient; the JSON text approximates the frame.
+        size = len(json.dumps(data, separators=(",", ":"), default=str))
+        if size > self.max_bytes:
+            self.dropped += len(users)
+            return 0
+        now = time.time()
+        entry = (now, event, data, size)
+        queued = 0
+        for user in users:
+            box = self._boxes.get(user)
+            if box is None:
+                box = self._boxes[user] = Mailbox()
+                if len(self._boxes) > self.max_users:
+                    self._evict(next(iter(self._boxes)))
+            else:
+                self._boxes.move_to_end(user)
+                self._expire(box, now)
+            while box.entries and (
+                box.count >= self.max_messages
+                or box.bytes + box.spilled_bytes + size > self.max_bytes
+            ):
+                self._drop_oldest(box)
+            if box.count >= self.max_messages or box.spilled_bytes + size > self.max_bytes:
+                # Only spilled messages are left and the quota is full.
+                box.dropped += 1
+                self.dropped += 1
+                continue
+            box.entries.append(entry)
+            box.bytes += size
+            self.memory += size
+            queued += 1
+        self._relieve()
+        return queued
+
+    async def take(self, user: str) -> dict[str, Any] | None:
+        box = self._boxes.pop(user, None)
+        self.unpark(user)
+        if box is None:
+            return None
+        self.memory -= box.bytes
+        cutoff = time.time() - self.ttl
+        messages = []
+        if box.spilled:
+            messages.extend(await self._read_spill(user, cutoff))
+        for queued_at, event, data, _ in box.entries:
+            if queued_at > cutoff:
+                messages.append({"event": event, "data": data, "ts": queued_at})
+        expired = box.count - len(messages)
+        self.expired += expired
+        if not messages and not box.dropped:
+            return None
+        return {"messages": messages, "dropped": box.dropped, "expired": expired}
+
+    def _expire(self, box: Mailbox, now: float) -> None:
+        cutoff = now - self.ttl
+        entries = box.entries
+        while entries and entries[0][0] <= cutoff:
+            _, _, _, size = entries.popleft()
+            box.bytes -= size
+            self.memory -= size
+            self.expired += 1
+
+    def _drop_oldest(self, box: Mailbox) -> None:
+        _, _, _, size = box.entries.popleft()
+        box.bytes -= size
+        self.memory -= size
+        box.dropped += 1
+        self.dropped += 1
+
+    def _relieve(self) -> None:
+        boxes = self._boxes
+        while self.memory > self.memory_limit:
+            user, box = next(iter(boxes.items()))
+            if not box.entries:
+                # Already spilled or emptied; look at the next idle box.
+                boxes.move_to_end(user)
+            elif self.spill_dir is not None:
+                self._spill(user, box)
+            else:
+                self._drop_oldest(box)
+
+    def _evict(self, user: str) -> None:
+        box = self._boxes.pop(user)
+        self.memory -= box.bytes
+        self.dropped += box.count
+        if box.spilled:
+            self._delete_spill(user)
+
+    def _spill_path(self, user: str) -> Path:
+        # Only reached for boxes that were spilled, i.e. with a spill dir set.
+        return (
+            self.spill_dir or Path()
+        ) / f"{hashlib.sha256(user.encode()).hexdigest()[:32]}.jsonl"
+
+    def _spill(self, user: str, box: Mailbox) -> None:
+        # Serialized here, written later by the background writer.
+        lines = "".join(
+            json.dumps({"event": event, "data": data, "ts": queued_at}, default=str) + "\n"
+            for queued_at, event, data, _ in box.entries
+        )
+        self._writes.setdefault(user, []).append((lines, len(box.entries), box.bytes))
+        box.spilled += len(box.entries)
+        box.spilled_bytes += box.bytes
+        self.memory -= box.bytes
+        box.bytes = 0
+        box.entries.clear()
+        self._schedule_io()
+
+    def _delete_spill(self, user: str) -> None:
+        self._writes.pop(user, None)
+        self._deletes.add(user)
+        self._schedule_io()
+
+    def _schedule_io(self) -> None:
+        if self._writer is not None:
+            return
+        try:
+            self._writer = asyncio.get_running_loop().create_task(self._write_spills())
+        except RuntimeError:
+            # No loop to stall (scripts, sync tests): do the I/O right away.
+            deletes, writes = self._take_io()
+            self._apply_io(deletes, writes)
+
+    def _take_io(self) -> tuple[list[Path], dict[str, list[SpillWrite]]]:
+        deletes = [self._spill_path(user) for user in self._deletes]
+        writes, self._writes = self._writes, {}
+        self._deletes = set()
+        return deletes, writes
+
+    def _apply_io(self, deletes: list[Path], writes: dict[str, list[SpillWrite]]) -> None:
+        for path in deletes:
+            try:
+                path.unlink(missing_ok=True)
+            except OSError as exc:
+                logger.warning(f"Mailbox spill not removed: {exc}")
+        for user, pending in writes.items():
+            path = self._spill_path(user)
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with path.open("a", encoding="utf-8") as spill:
+                    for lines, _, _ in pending:
+                        spill.write(lines)
+            except OSError as exc:
+                self._spill_failed(user, pending, exc)
+
+    def _spill_failed(self, user: str, pending: list[SpillWrite], exc: OSError) -> None:
+        count = sum(n for _, n, _ in pending)
+        logger.warning(f"Mailbox spill failed, dropping {count} messages: {exc}")
+        self.dropped += count
+        box = self._boxes.get(user)
+        if box is not None:
+            box.spilled -= count
+            box.spilled_bytes -= sum(size for _, _, size in pending)
+            box.dropped += count
+
+    async def _write_spills(self) -> None:
+        try:
+            while self._writes or self._deletes:
+                async with self._io_lock:
+                    deletes, writes = self._take_io()
+                    await asyncio.to_thread(self._apply_io, deletes, writes)
+        finally:
+            self._writer = None
+
+    async def _read_spill(self, user: str, cutoff: float) -> list[dict[str, Any]]:
+        # Under the lock no write for this user is in flight; ones still
+        # queued are newer than the file, so they are read after it.
+        async with self._io_lock:
+            pending = self._writes.pop(user, [])
+            if user in self._deletes:
+                self._deletes.discard(user)
+                await asyncio.to_thread(self._apply_io, [self._spill_path(user)], {})
+            text = await asyncio.to_thread(self._read_spill_file, user)
+        text += "".join(lines for lines, _, _ in pending)
+        messages = []
+        try:
+            for line in text.splitlines():
+                message = json.loads(line)
+                if message["ts"] > cutoff:
+                    messages.append(message)
+        except ValueError as exc:
+            logger.warning(f"Mailbox spill unreadable: {exc}")
+        return messages
+
+    def _read_spill_file(self, user: str) -> str:
+        path = self._spill_path(user)
+        try:
+            text = path.read_text(encoding="utf-8")
+            path.unlink()
+        except FileNotFoundError:
+            return ""
+        except OSError as exc:
+            logger.warning(f"Mailbox spill unreadable: {exc}")
+            return ""
+        return text
+
+    def count(self) -> int:
+        return sum(box.count for box in self._boxes.values())
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "users": len(self._boxes),
+            "parked": len(self._parked),
+            "messages": self.count(),
+            "memory_bytes": self.memory,
+            "spilled": sum(box.spilled for box in self._boxes.values()),
+            "dropped": self.dropped,
+            "expired": self.expired,
+        }
+
+    def clear(self) -> None:
+        for user, box in self._boxes.items():
+            if box.spilled:
+                self._delete_spill(user)
+        self._boxes.clear()
+        self._parked.clear()
+        self._by_room.clear()
+        self.memory = 0
+
+
+def create_mailboxes(namespace: str) -> MailboxStore:
+    spill_dir = None
+    if settings.mailbox_spill_dir:
+        spill_dir = Path(settings.mailbox_spill_dir) / (namespace.strip("/") or "default")
+    return MailboxStore(
+        enabled=settings.mailbox_enabled,
+        max_messages=settings.mailbox_size,
+        max_bytes=settings.mailbox_bytes,
+        ttl=settings.mailbox_ttl,
+        memory_bytes=settings.mailbox_memory_bytes,
+        max_users=settings.mailbox_users,
+        spill_dir=spill_dir,
+    )
@@ -1,19 +1,23 @@
-import signal
+import asyncio
 from collections.abc import AsyncIterator
-from contextlib import asynccontextmanager
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any
 
 import socketio
-import uvicorn
-from uvicorn.config import Config
-from uvicorn.server import Server
 
 from app.config import settings
-from app.dashboard import dashboard_app, set_socketio_server
-from app.events import register_events
 from app.logging_config import logger
 
+# Importing this module builds nothing. Servers call ``create_app()``
+# (``uvicorn --factory app.main:create_app``); the handlers, dashboard and
+# uvicorn are imported by the functions that need them, and so are the
+# subsystems (drain, snapshots, capture, health) that pull in the tenants.
+
 
 def create_socketio_server() -> socketio.AsyncServer:
+    from app.dashboard import set_socketio_server
+    from app.events import register_events
+
     sio = socketio.AsyncServer(
         async_mode=settings.async_mode,
         cors_allowed_origins=settings.cors_origins_list,
@@ -25,58 +29,68 @@ def create_socketio_server() -> socketio.AsyncServer:
         logger=False,
         engineio_logger=False,
     )
-    register_events(sio)
+    for namespace in settings.namespaces_list:
+        register_events(sio, namespace)
     set_socketio_server(sio)
     return sio
 
 
 @asynccontextmanager
 async def lifespan(sio: socketio.AsyncServer) -> AsyncIterator[None]:
+    from app.capture import capture
+    from app.dashboard import get_dashboard_assets
+    from app.drain import drain
+    from app.health import health
+    from app.snapshot import snapshotter
+
     logger.info("Starting SocketIO server...")
+    # Compressing the dashboard assets is the slowest part of startup; a
+    # worker thread does it so the server accepts connections meanwhile.
+    assets = asyncio.create_task(asyncio.to_thread(get_dashboard_assets))
+    snapshotter.restore()
+    snapshotter.start()
+    health.start()
+    capture.start()
     yield
     logger.info("Shutting down SocketIO server...")
+    await drain.start(sio)
+    await snapshotter.stop()
+    await health.stop()
+    await capture.stop()
+    await assets
 
 
 def create_app() -> socketio.ASGIApp:
-    sio = create_socketio_server()
-    app = socketio.ASGIApp(sio, other_asgi_app=dashboard_app)
-    return app
-
-
-app = create_app()
+    from app.dashboard import dashboard_app
 
+    sio = create_socketio_server()
+    stack = AsyncExitStack()
 
-async def shutdown_signal_handler(server: Server) -> None:
-    logger.info("Shutdown signal received, stopping server...")
-    server.should_exit = True
+    async def on_startup() -> None:
+        await stack.enter_async_context(lifespan(sio))
 
+    async def on_shutdown() -> None:
+        await stack.aclose()
 
-def run_server() -> None:
-    config = Config(
-        "app.main:app",
-        host=settings.host,
-        port=settings.port,
-        log_level=settings.logger_level.lower(),
-        reload=False,
+    app = socketio.ASGIApp(
+        sio, other_asgi_app=dashboard_app, on_startup=on_startup, on_shutdown=on_shutdown
     )
-    server = Server(config)
+    return app
 
-    def handle_signal(signum: int, frame: object) -> None:
-        logger.info(f"Received signal {signum}")
-        import asyncio
 
-        asyncio.create_task(shutdown_signal_handler(server))
+def __getattr__(name: str) -> Any:
+    # ``app.main:app`` still works for ASGI servers configured with it; the
+    # app is built on first access instead of at import.
+    if name == "app":
+        app = globals()["app"] = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-    signal.signal(signal.SIGINT, handle_signal)
-    signal.signal(signal.SIGTERM, handle_signal)
 
-    logger.info(f"Server running at http://{settings.host}:{settings.port}")
-    uvicorn.run(
-        "app.main:app",
-        host=settings.host,
-        port=settings.port,
-        log_level=settings.logger_level.lower(),
-    )
+def run_server() -> None:
+    from app.server import serve
+
+    serve(create_app())
 
 
 if __name__ == "__main__":
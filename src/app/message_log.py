@@ -1,8 +1,13 @@
+from bisect import bisect_left
 from collections import deque
 from dataclasses import dataclass, field
 from datetime import UTC, datetime
+from itertools import islice
+from operator import attrgetter
 from typing import Any
 
+_timestamp = attrgetter("timestamp")
+
 
 @dataclass
 class MessageLog:
@@ -17,19 +22,45 @@ class MessageLogger:
     def __init__(self, max_size: int = 500) -> None:
         self._logs: deque[MessageLog] = deque(maxlen=max_size)
         self._max_size = max_size
+        # Entries ever logged and times cleared, so checkpoints can tell
+        # which entries are new since they last looked.
+        self.appended = 0
+        self.generation = 0
 
     def log(
         self, event: str, from_sid: str | None = None, to_room: str | None = None, data: Any = None
     ) -> MessageLog:
         entry = MessageLog(event=event, from_sid=from_sid, to_room=to_room, data=data)
         self._logs.append(entry)
+        self.appended += 1
         return entry
 
+    def since(self, appended: int) -> list[MessageLog]:
+        count = min(self.appended - appended, len(self._logs))
+        return list(islice(self._logs, len(self._logs) - count, None)) if count > 0 else []
+
+    def restore(self, entries: list[MessageLog]) -> None:
+        # Restored entries are older than anything logged since startup.
+        self._logs = deque([*entries, *self._logs], maxlen=self._max_size)
+
+    def between(
+        self, start: datetime | None = None, end: datetime | None = None
+    ) -> list[MessageLog]:
+        # Entries are in timestamp order, so the range is two bisections.
+        logs = list(self._logs)
+        lo = bisect_left(logs, start, key=_timestamp) if start is not None else 0
+        hi = bisect_left(logs, end, key=_timestamp) if end is not None else len(logs)
+        return logs[lo:hi]
+
+    def last(self) -> MessageLog | None:
+        return self._logs[-1] if self._logs else None
+
     def all(self) -> list[MessageLog]:
         return list(self._logs)
 
     def clear(self) -> None:
         self._logs.clear()
+        self.generation += 1
 
     def count(self) -> int:
         return len(self._logs)
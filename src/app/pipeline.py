@@ -0,0 +1,357 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any
+
+import socketio
+
+from app.capture import capture
+from app.config import settings
+from app.connections import ADMIN_ROOM
+from app.dedup import DedupCache
+from app.fanout import scheduler
+from app.ratelimit import RateLimiter
+from app.tenants import Tenant
+from app.tracing import tracer
+
+Handler = Callable[..., Awaitable[Any]]
+Extractor = Callable[[Any], Any]
+
+
+class EventError(Exception):
+    pass
+
+
+def error_ack(message: str) -> dict[str, str]:
+    return {"status": "error", "message": message}
+
+
+@dataclass(frozen=True, slots=True)
+class EventSpec:
+    event: str
+    middleware: bool = True
+    validate: Extractor | None = None
+    log: bool = True
+    mirror: bool = True
+    room: Extractor | None = None
+    data: Extractor | None = None
+    count: bool = False
+    trace: bool = False
+    # Returns the client-supplied message id, or ``None`` to skip deduplication
+    dedup: Extractor | None = None
+    # Control traffic: bulk fan-out slices wait while it is being handled
+    priority: bool = False
+
+
+def on(event: str, **options: Any) -> Callable[[Handler], Handler]:
+    spec = EventSpec(event, **options)
+
+    def decorator(method: Handler) -> Handler:
+        method.event_spec = spec  # type: ignore[attr-defined]
+        return method
+
+    return decorator
+
+
+class Handlers:
+    def __init__(self, sio: socketio.AsyncServer, tenant: Tenant) -> None:
+        self.sio = sio
+        self.tenant = tenant
+        self.namespace = tenant.namespace
+        self.limiter = (
+            RateLimiter(settings.rate_limit_events, settings.rate_limit_burst)
+            if settings.rate_limit_events > 0
+            else None
+        )
+        self.dedup = (
+            DedupCache(settings.dedup_size, settings.dedup_ttl, settings.dedup_scope)
+            if settings.dedup_size > 0 and settings.dedup_ttl > 0
+            else None
+        )
+
+    async def emit(self, event: str, data: Any = None, **kwargs: Any) -> None:
+        await self.sio.emit(event, data, namespace=self.namespace, **kwargs)
+
+    def register(self) -> None:
+        for name in dir(self):
+            method = getattr(self, name)
+            spec = getattr(method, "event_spec", None)
+            if spec is None:
+                continue
+            chain = compose(self, spec, method) if spec.middleware else method
+            if spec.priority:
+                chain = prioritized(chain)
+            self.sio.on(spec.event, chain, namespace=self.namespace)
+
+
+def prioritized(handler: Handler) -> Handler:
+    control = scheduler.control
+
+    async def controlled(sid: str, *args: Any) -> Any:
+        with control():
+            return await handler(sid, *args)
+
+    return controlled
+
+
+# A stage returns a step for this event, or ``None`` when it has nothing to
+# do so disabled stages are never called. Steps take ``(sid, data)`` and
+# return the (possibly replaced) data, raising ``EventError`` to reject the
+# event. Stages listed in ``AFTER`` instead return an awaitable or ``None``
+# and run once every other step has passed.
+Step = Callable[[str, Any], Any]
+Stage = Callable[[Handlers, EventSpec], Step | None]
+
+
+def rate_limit_stage(handlers: Handlers, spec: EventSpec) -> Step | None:
+    limiter = handlers.limiter
+    if limiter is None:
+        return None
+    stats = handlers.tenant.stats
+
+    def rate_limit(sid: str, data: Any) -> Any:
+        if not limiter.allow(sid):
+            stats.limited += 1
+            raise EventError("Rate limit exceeded")
+        return data
+
+    return rate_limit
+
+
+def validate_stage(handlers: Handlers, spec: EventSpec) -> Step | None:
+    validate = spec.validate
+    if validate is None:
+        return None
+    stats = handlers.tenant.stats
+
+    def validated(sid: str, data: Any) -> Any:
+        try:
+            return validate(data)
+        except EventError:
+            stats.rejected += 1
+            raise
+
+    return validated
+
+
+def capture_stage(handlers: Handlers, spec: EventSpec) -> Step | None:
+    if not capture.enabled:
+        return None
+    record = capture.record
+    namespace = handlers.namespace
+    event = spec.event
+    # Runs after validation, so only accepted payloads are sized and redacted.
+    # Events without a validator ignore their payload and record none.
+    validated = spec.validate is not None
+
+    def captured(sid: str, data: Any) -> Any:
+        record(namespace, sid, event, data if validated else None)
+        return data
+
+    return captured
+
+
+def metrics_stage(handlers: Handlers, spec: EventSpec) -> Step | None:
+    if not settings.event_metrics:
+        return None
+    stats = handlers.tenant.stats
+    events = stats.events
+    event = spec.event
+    events.setdefault(event, 0)
+
+    if spec.count:
+
+        def count_message(sid: str, data: Any) -> Any:
+            events[event] += 1
+            stats.messages += 1
+            return data
+
+        return count_message
+
+    def count(sid: str, data: Any) -> Any:
+        events[event] += 1
+        return data
+
+    return count
+
+
+def log_stage(handlers: Handlers, spec: EventSpec) -> Step | None:
+    if not spec.log:
+        return None
+    log = handlers.tenant.logs.log
+    event = spec.event
+    room_of = spec.room
+    data_of = spec.data
+
+    def logged(sid: str, data: Any) -> Any:
+        log(
+            event,
+            sid,
+            room_of(data) if room_of else None,
+            data_of(data) if data_of else None,
+        )
+        return data
+
+    return logged
+
+
+def mirror_stage(handlers: Handlers, spec: EventSpec) -> Step | None:
+    if not spec.mirror:
+        return None
+    sio = handlers.sio
+    namespace = handlers.namespace
+    has_room = handlers.tenant.manager.has_room
+    # The log step runs right before this one, so its entry is the latest.
+    last_entry = handlers.tenant.logs.last if spec.log else None
+    event = spec.event
+    room_of = spec.room
+    data_of = spec.data
+
+    def mirrored(sid: str, data: Any) -> Awaitable[None] | None:
+        # Skip building and encoding the payload when no dashboard is listening.
+        if not has_room(ADMIN_ROOM):
+            return None
+        payload: dict[str, Any] = {"event": event, "from": sid}
+        if room_of:
+            payload["room"] = room_of(data)
+        if data_of:
+            payload["data"] = data_of(data)
+        entry = last_entry() if last_entry else None
+        timestamp = entry.timestamp if entry else datetime.now(UTC)
+        payload["timestamp"] = timestamp.isoformat()
+        return sio.emit("admin:message", payload, to=ADMIN_ROOM, namespace=namespace)
+
+    return mirrored
+
+
+STAGES: tuple[Stage, ...] = (
+    rate_limit_stage,
+    validate_stage,
+    capture_stage,
+    metrics_stage,
+    log_stage,
+    mirror_stage,
+)
+AFTER: frozenset[Stage] = frozenset({mirror_stage})
+# Stages that still run for a retried message; everything else, including the
+# handler, is skipped when its message id was already seen.
+GUARDS: frozenset[Stage] = frozenset({rate_limit_stage, validate_stage, capture_stage})
+
+DedupKey = Callable[[str, Any], Hashable | None]
+
+
+def dedup_key(handlers: Handlers, spec: EventSpec) -> DedupKey | None:
+    cache = handlers.dedup
+    message_id = spec.dedup
+    if cache is None or message_id is None:
+        return None
+    # Each event has its own id space: one cache serves every event, and a
+    # broadcast must not be answered with a room_message ack for the same id.
+    event = (handlers.namespace, spec.event)
+    if cache.scope == "room":
+        room_of = spec.room
+
+        def room_key(sid: str, data: Any) -> Hashable | None:
+            mid = message_id(data)
+            if mid is None:
+                return None
+            room = room_of(data) if room_of else None
+            # Events without a room (broadcast) fall back to the sender's
+            # scope, so two senders' ids never collide.
+            if room is not None:
+                return (event, "room", room, mid)
+            return (event, "sid", sid, mid)
+
+        return room_key
+    if cache.scope == "user":
+        get = handlers.tenant.manager.get
+
+        def user_key(sid: str, data: Any) -> Hashable | None:
+            mid = message_id(data)
+            if mid is None:
+                return None
+            # Verified users keep their ids across reconnects; anonymous
+            # clients fall back to their sid.
+            conn = get(sid)
+            user = conn.user if conn is not None else None
+            return (event, "user", user, mid) if user is not None else (event, "sid", sid, mid)
+
+        return user_key
+
+    def sid_key(sid: str, data: Any) -> Hashable | None:
+        mid = message_id(data)
+        return None if mid is None else (event, sid, mid)
+
+    return sid_key
+
+
+def compose(
+    handlers: Handlers, spec: EventSpec, handler: Handler, stages: tuple[Stage, ...] = STAGES
+) -> Handler:
+    key_of = dedup_key(handlers, spec)
+    guards = []
+    steps = []
+    after = []
+    for stage in stages:
+        step = stage(handlers, spec)
+        if step is None:
+            continue
+        if stage in AFTER:
+            after.append(step)
+        elif key_of is not None and stage in GUARDS:
+            guards.append(step)
+        else:
+            steps.append(step)
+    # Tracing hands the sample start to the handler instead of adding a step.
+    traced = spec.trace and tracer.enabled
+    if key_of is None and not steps and not after and not traced:
+        return handler
+    before_chain = tuple(steps)
+    after_chain = tuple(after)
+    sample = tracer.sample
+
+    async def chain(sid: str, data: Any = None) -> Any:
+        try:
+            for step in before_chain:
+                data = step(sid, data)
+        except EventError as exc:
+            return error_ack(str(exc))
+        for step in after_chain:
+            pending = step(sid, data)
+            if pending is not None:
+                await pending
+        if traced:
+            return await handler(sid, data, sample())
+        return await handler(sid, data)
+
+    cache = handlers.dedup
+    if key_of is None or cache is None:
+        return chain
+    guard_chain = tuple(guards)
+    stats = handlers.tenant.stats
+
+    async def deduplicated(sid: str, data: Any = None) -> Any:
+        try:
+            for step in guard_chain:
+                data = step(sid, data)
+        except EventError as exc:
+            return error_ack(str(exc))
+        key = key_of(sid, data)
+        if key is None:
+            return await chain(sid, data)
+        ack, first = cache.claim(key)
+        if not first:
+            # A retry: answer with the original's ack, waiting for it if the
+            # original is still in flight, without logging or fanning out again.
+            stats.duplicates += 1
+            return await asyncio.shield(ack)
+        try:
+            result = await chain(sid, data)
+        except BaseException:
+            cache.forget(key, ack)
+            raise
+        ack.set_result(result)
+        return result
+
+    return deduplicated
@@ -0,0 +1,220 @@
+import asyncio
+import contextlib
+import time
+from collections import OrderedDict
+from datetime import UTC, datetime
+from typing import Any
+
+import socketio
+
+from app.config import settings
+
+# room -> user -> whether the room last heard the user as present (or typing)
+Pending = dict[str, dict[str, bool]]
+
+
+class Presence:
+    def __init__(
+        self,
+        namespace: str = "/",
+        debounce: float = 0.25,
+        typing_timeout: float = 5.0,
+        max_users: int = 100000,
+    ) -> None:
+        self.namespace = namespace
+        self.debounce = debounce
+        self.typing_timeout = typing_timeout
+        self._max_users = max_users
+        self._sids: dict[str, set[str]] = {}
+        self._user_of: dict[str, str] = {}
+        # room -> user -> number of that user's sids in the room
+        self._rooms: dict[str, dict[str, int]] = {}
+        # room -> user -> typing expiry (monotonic)
+        self._typing: dict[str, dict[str, float]] = {}
+        self._last_seen: OrderedDict[str, float] = OrderedDict()
+        self._pending_members: Pending = {}
+        self._pending_typing: Pending = {}
+        self._task: asyncio.Task[None] | None = None
+        # Set when changes arrive while the flush task waits on typing expiry
+        self._wake = asyncio.Event()
+
+    def user_of(self, sid: str) -> str | None:
+        return self._user_of.get(sid)
+
+    def connect(self, sid: str, user: str) -> None:
+        self._user_of[sid] = user
+        self._sids.setdefault(user, set()).add(sid)
+        self._last_seen.pop(user, None)
+
+    def disconnect(self, sid: str, rooms: set[str] | frozenset[str] = frozenset()) -> None:
+        user = self._user_of.pop(sid, None)
+        if user is None:
+            return
+        for room in rooms:
+            self._leave(user, room)
+        sids = self._sids.get(user)
+        if sids is not None:
+            sids.discard(sid)
+            if not sids:
+                del self._sids[user]
+                self._last_seen[user] = time.time()
+                self._last_seen.move_to_end(user)
+                while len(self._last_seen) > self._max_users:
+                    self._last_seen.popitem(last=False)
+
+    def join(self, sid: str, room: str) -> None:
+        user = self._user_of.get(sid)
+        if user is None:
+            return
+        members = self._rooms.setdefault(room, {})
+        count = members.get(user, 0)
+        if not count:
+            self._pending_members.setdefault(room, {}).setdefault(user, False)
+        members[user] = count + 1
+
+    def leave(self, sid: str, room: str) -> None:
+        user = self._user_of.get(sid)
+        if user is not None:
+            self._leave(user, room)
+
+    def _leave(self, user: str, room: str) -> None:
+        members = self._rooms.get(room)
+        if not members or user not in members:
+            return
+        if members[user] > 1:
+            members[user] -= 1
+            return
+        del members[user]
+        if not members:
+            del self._rooms[room]
+        self._pending_members.setdefault(room, {}).setdefault(user, True)
+        self._set_typing(user, room, False)
+
+    def typing(self, sid: str, room: str, active: bool) -> bool:
+        user = self._user_of.get(sid)
+        if user is None or user not in self._rooms.get(room, ()):
+            return False
+        self._set_typing(user, room, active)
+        return True
+
+    def _set_typing(self, user: str, room: str, active: bool) -> None:
+        typers = self._typing.get(room)
+        was_typing = typers is not None and user in typers
+        if active:
+            # Keystrokes only push the expiry out; the room hears about it once.
+            self._typing.setdefault(room, {})[user] = time.monotonic() + self.typing_timeout
+        elif was_typing:
+            del typers[user]
+            if not typers:
+                del self._typing[room]
+        if active != was_typing:
+            self._pending_typing.setdefault(room, {}).setdefault(user, was_typing)
+
+    def is_online(self, user: str) -> bool:
+        return user in self._sids
+
+    def last_seen(self, user: str) -> float | None:
+        return self._last_seen.get(user)
+
+    def room(self, room: str) -> dict[str, Any]:
+        return {
+            "room": room,
+            "users": list(self._rooms.get(room, ())),
+            "typing": list(self._typing.get(room, ())),
+        }
+
+    def users(self, users: list[str]) -> dict[str, dict[str, Any]]:
+        result = {}
+        for user in users:
+            seen = self._last_seen.get(user)
+            result[user] = {
+                "online": user in self._sids,
+                "last_seen": datetime.fromtimestamp(seen, UTC).isoformat() if seen else None,
+            }
+        return result
+
+    def online_count(self) -> int:
+        return len(self._sids)
+
+    def schedule(self, sio: socketio.AsyncServer) -> None:
+        if not (self._pending_members or self._pending_typing):
+            return
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush(sio))
+        else:
+            self._wake.set()
+
+    def _expire_typing(self) -> None:
+        now = time.monotonic()
+        for room, typers in list(self._typing.items()):
+            for user, expires in list(typers.items()):
+                if expires <= now:
+                    self._set_typing(user, room, False)
+
+    def updates(self) -> list[dict[str, Any]]:
+        self._expire_typing()
+        pending_members, self._pending_members = self._pending_members, {}
+        pending_typing, self._pending_typing = self._pending_typing, {}
+        payloads = []
+        for room in pending_members.keys() | pending_typing.keys():
+            members = self._rooms.get(room, {})
+            typers = self._typing.get(room, {})
+            payload: dict[str, Any] = {"room": room}
+            # Only net changes since the last flush go out, so a user who
+            # dropped and reconnected within the window is never announced.
+            for key, now_in, pending in (
+                ("joined", True, pending_members),
+                ("left", False, pending_members),
+                ("typing", True, pending_typing),
+                ("idle", False, pending_typing),
+            ):
+                current = members if pending is pending_members else typers
+                users = [
+                    user
+                    for user, was_in in pending.get(room, {}).items()
+                    if was_in != now_in and (user in current) == now_in
+                ]
+                if users:
+                    payload[key] = users
+            if len(payload) > 1:
+                payloads.append(payload)
+        return payloads
+
+    async def _flush(self, sio: socketio.AsyncServer) -> None:
+        try:
+            while True:
+                await asyncio.sleep(self.debounce)
+                for payload in self.updates():
+                    await sio.emit(
+                        "presence", payload, to=payload["room"], namespace=self.namespace
+                    )
+                if self._pending_members or self._pending_typing:
+                    continue
+                if not self._typing:
+                    return
+                # Wake up again to expire typing indicators nobody refreshed,
+                # or as soon as a join, leave or keystroke is scheduled.
+                self._wake.clear()
+                expiry = min(min(t.values()) for t in self._typing.values())
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(self._wake.wait(), max(0.0, expiry - time.monotonic()))
+        finally:
+            self._task = None
+
+    def clear(self) -> None:
+        self._sids.clear()
+        self._user_of.clear()
+        self._rooms.clear()
+        self._typing.clear()
+        self._last_seen.clear()
+        self._pending_members.clear()
+        self._pending_typing.clear()
+
+
+def create_presence(namespace: str) -> Presence:
+    return Presence(
+        namespace,
+        debounce=settings.presence_debounce,
+        typing_timeout=settings.typing_timeout,
+        max_users=settings.presence_max_users,
+    )
@@ -0,0 +1,29 @@
+import time
+
+
+class RateLimiter:
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = max(1, burst)
+        # sid -> [tokens, last refill time]
+        self._buckets: dict[str, list[float]] = {}
+
+    def allow(self, sid: str) -> bool:
+        now = time.monotonic()
+        bucket = self._buckets.get(sid)
+        if bucket is None:
+            self._buckets[sid] = [self.burst - 1, now]
+            return True
+        tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if tokens < 1:
+            bucket[0] = tokens
+            return False
+        bucket[0] = tokens - 1
+        return True
+
+    def forget(self, sid: str) -> None:
+        self._buckets.pop(sid, None)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
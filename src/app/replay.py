@@ -0,0 +1,189 @@
+import argparse
+import asyncio
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import socketio
+
+from app.capture import CONNECT, DISCONNECT, Record, read_capture
+
+
+def percentile(ordered: list[float], p: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+@dataclass
+class ReplayReport:
+    speed: float
+    sent: int = 0
+    acked: int = 0
+    rejected: int = 0
+    errors: int = 0
+    connections: int = 0
+    duration: float = 0.0
+    latencies: dict[str, list[float]] = field(default_factory=dict)
+
+    def observe(self, event: str, ms: float, ack: Any) -> None:
+        self.acked += 1
+        self.latencies.setdefault(event, []).append(ms)
+        if isinstance(ack, dict) and ack.get("status") == "error":
+            self.rejected += 1
+
+    def to_dict(self) -> dict[str, Any]:
+        events = {}
+        for event, latencies in sorted(self.latencies.items()):
+            ordered = sorted(latencies)
+            events[event] = {
+                "count": len(ordered),
+                "p50_ms": round(percentile(ordered, 0.5), 3),
+                "p95_ms": round(percentile(ordered, 0.95), 3),
+                "p99_ms": round(percentile(ordered, 0.99), 3),
+                "max_ms": round(ordered[-1], 3),
+            }
+        return {
+            "speed": self.speed,
+            "sent": self.sent,
+            "acked": self.acked,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "connections": self.connections,
+            "duration_s": round(self.duration, 3),
+            "throughput": round(self.acked / self.duration, 1) if self.duration else 0.0,
+            "events": events,
+        }
+
+
+class Session:
+    # One client per captured sid, so rooms, rate limits and dedup scopes
+    # behave as they did for the original connection.
+    def __init__(self, url: str, namespace: str, auth: dict[str, Any] | None) -> None:
+        self.client = socketio.AsyncClient(reconnection=False)
+        self.namespace = namespace
+        self.inflight: set[asyncio.Task[None]] = set()
+        self._connected = asyncio.ensure_future(
+            self.client.connect(url, namespaces=[namespace], auth=auth, transports=["websocket"])
+        )
+
+    async def ready(self) -> bool:
+        try:
+            await asyncio.shield(self._connected)
+        except (socketio.exceptions.ConnectionError, OSError):
+            return False
+        return True
+
+    async def close(self) -> None:
+        # Sends made before the captured disconnect still get their acks.
+        if self.inflight:
+            await asyncio.wait(self.inflight)
+        if await self.ready():
+            await self.client.disconnect()
+
+
+async def replay(
+    records: Iterable[Record],
+    url: str,
+    speed: float = 1.0,
+    timeout: float = 10.0,
+    auth: dict[str, Any] | None = None,
+) -> ReplayReport:
+    report = ReplayReport(speed)
+    sessions: dict[tuple[str, str], Session] = {}
+    pending: set[asyncio.Task[None]] = set()
+
+    def session(namespace: str, sid: str) -> Session:
+        key = (namespace, sid)
+        if key not in sessions:
+            sessions[key] = Session(url, namespace, auth)
+            report.connections += 1
+        return sessions[key]
+
+    async def send(current: Session, event: str, payload: Any) -> None:
+        if not await current.ready():
+            report.errors += 1
+            return
+        start = time.perf_counter()
+        try:
+            ack = await current.client.call(
+                event, payload, namespace=current.namespace, timeout=timeout
+            )
+        except (socketio.exceptions.SocketIOError, OSError):
+            report.errors += 1
+            return
+        report.observe(event, (time.perf_counter() - start) * 1000, ack)
+
+    def spawn(coro: Any) -> asyncio.Task[None]:
+        task = asyncio.ensure_future(coro)
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+        return task
+
+    loop = asyncio.get_running_loop()
+    origin = loop.time()
+    first: float | None = None
+    for offset, namespace, sid, event, _size, payload in records:
+        # Timing starts at the first captured event, not at server start.
+        if first is None:
+            first = offset
+        delay = origin + (offset - first) / speed - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if event == CONNECT:
+            session(namespace, sid)
+        elif event == DISCONNECT:
+            closing = sessions.pop((namespace, sid), None)
+            if closing is not None:
+                spawn(closing.close())
+        else:
+            report.sent += 1
+            current = session(namespace, sid)
+            task = spawn(send(current, event, payload))
+            current.inflight.add(task)
+            task.add_done_callback(current.inflight.discard)
+    if pending:
+        await asyncio.wait(pending)
+    report.duration = loop.time() - origin
+    await asyncio.gather(*(current.close() for current in sessions.values()))
+    return report
+
+
+def print_report(report: ReplayReport) -> None:
+    summary = report.to_dict()
+    print(
+        f"{summary['sent']} events over {summary['connections']} connections "
+        f"in {summary['duration_s']}s at {report.speed}x: {summary['throughput']} acks/s, "
+        f"{summary['rejected']} rejected, {summary['errors']} errors"
+    )
+    print(f"{'event':<20}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for event, stats in summary["events"].items():
+        print(
+            f"{event:<20}{stats['count']:>8}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}"
+            f"{stats['p99_ms']:>10.2f}{stats['max_ms']:>10.2f}"
+        )
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Replay a traffic capture against a server")
+    parser.add_argument("capture", type=Path)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument(
+        "--speed", type=float, default=1.0, help="1 for real time, N for N times faster"
+    )
+    parser.add_argument("--timeout", type=float, default=10.0, help="seconds to wait for each ack")
+    parser.add_argument("--token", help="auth token sent by every replayed client")
+    args = parser.parse_args(argv)
+    if args.speed <= 0:
+        parser.error("--speed must be positive")
+    header, records = read_capture(args.capture)
+    if not header.get("payloads"):
+        print("Payloads in this capture are redacted; validation may reject some events")
+    auth = {"token": args.token} if args.token else None
+    print_report(asyncio.run(replay(records, args.url, args.speed, args.timeout, auth)))
+
+
+if __name__ == "__main__":
+    main()
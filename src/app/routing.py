@@ -0,0 +1,175 @@
+import json
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+from urllib.parse import parse_qsl
+
+JSON_HEADERS = [[b"content-type", b"application/json"]]
+TEXT_HEADERS = [[b"content-type", b"text/plain"]]
+MAX_BODY_SIZE = 1000000
+
+Send = Callable[[dict[str, Any]], Awaitable[None]]
+Receive = Callable[[], Awaitable[dict[str, Any]]]
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class Request:
+    __slots__ = ("scope", "receive", "params", "_query", "_body")
+
+    def __init__(self, scope: dict[str, Any], receive: Receive, params: dict[str, str]) -> None:
+        self.scope = scope
+        self.receive = receive
+        self.params = params
+        self._query: dict[str, str] | None = None
+        self._body: bytes | None = None
+
+    @property
+    def method(self) -> str:
+        return self.scope["method"]
+
+    @property
+    def path(self) -> str:
+        return self.scope["path"]
+
+    @property
+    def query(self) -> dict[str, str]:
+        if self._query is None:
+            self._query = dict(parse_qsl(self.scope.get("query_string", b"").decode()))
+        return self._query
+
+    def header(self, name: bytes) -> bytes:
+        for key, value in self.scope.get("headers", ()):
+            if key == name:
+                return value
+        return b""
+
+    async def body(self) -> bytes:
+        if self._body is None:
+            chunks = []
+            size = 0
+            more = True
+            while more:
+                message = await self.receive()
+                chunk = message.get("body", b"")
+                size += len(chunk)
+                if size > MAX_BODY_SIZE:
+                    raise HTTPError(413, "Request body too large")
+                chunks.append(chunk)
+                more = message.get("more_body", False)
+            self._body = b"".join(chunks)
+        return self._body
+
+    async def json(self) -> Any:
+        body = await self.body()
+        if not body:
+            return {}
+        try:
+            return json.loads(body)
+        except ValueError:
+            raise HTTPError(400, "Invalid JSON body") from None
+
+
+Handler = Callable[[Request, Send], Awaitable[None]]
+
+
+async def send_response(
+    send: Send, body: bytes, status: int = 200, headers: list[list[bytes]] = JSON_HEADERS
+) -> None:
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def send_json(send: Send, data: Any, status: int = 200) -> None:
+    await send_response(send, json.dumps(data).encode(), status)
+
+
+async def send_error(send: Send, status: int, message: str) -> None:
+    await send_json(send, {"status": "error", "message": message}, status)
+
+
+@dataclass(slots=True)
+class Route:
+    handlers: dict[str, Handler] = field(default_factory=dict)
+    not_allowed_headers: list[list[bytes]] = field(default_factory=list)
+
+    def add(self, methods: tuple[str, ...], handler: Handler) -> None:
+        for method in methods:
+            self.handlers[method] = handler
+        allow = ", ".join(sorted(self.handlers)).encode()
+        self.not_allowed_headers = [*JSON_HEADERS, [b"allow", allow]]
+
+
+class Router:
+    def __init__(self) -> None:
+        self._static: dict[str, Route] = {}
+        self._dynamic: dict[int, list[tuple[tuple[str, ...], Route]]] = {}
+
+    def add(self, path: str, handler: Handler, methods: tuple[str, ...] = ("GET",)) -> None:
+        if "{" not in path:
+            self._static.setdefault(path, Route()).add(methods, handler)
+            return
+        segments = tuple(path.strip("/").split("/"))
+        routes = self._dynamic.setdefault(len(segments), [])
+        for existing, route in routes:
+            if existing == segments:
+                route.add(methods, handler)
+                return
+        route = Route()
+        route.add(methods, handler)
+        routes.append((segments, route))
+
+    def route(self, path: str, methods: tuple[str, ...] = ("GET",)) -> Callable[[Handler], Handler]:
+        def decorator(handler: Handler) -> Handler:
+            self.add(path, handler, methods)
+            return handler
+
+        return decorator
+
+    def match(self, path: str) -> tuple[Route, dict[str, str]] | None:
+        route = self._static.get(path)
+        if route is not None:
+            return route, {}
+        parts = path.strip("/").split("/")
+        for segments, route in self._dynamic.get(len(parts), ()):
+            params = {}
+            for segment, part in zip(segments, parts, strict=True):
+                if segment[0] == "{":
+                    if not part:
+                        break
+                    params[segment[1:-1]] = part
+                elif segment != part:
+                    break
+            else:
+                return route, params
+        return None
+
+    async def __call__(self, scope: dict[str, Any], receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return
+        found = self.match(scope["path"])
+        if found is None:
+            await send_response(send, b"Not Found", 404, TEXT_HEADERS)
+            return
+        route, params = found
+        method = scope["method"]
+        handler = route.handlers.get(method)
+        if handler is None and method == "HEAD":
+            handler = route.handlers.get("GET")
+        if handler is None:
+            await send_response(
+                send,
+                b'{"status": "error", "message": "Method not allowed"}',
+                405,
+                route.not_allowed_headers,
+            )
+            return
+        try:
+            await handler(Request(scope, receive, params), send)
+        except HTTPError as exc:
+            await send_error(send, exc.status, exc.message)
@@ -0,0 +1,310 @@
+import logging
+from collections.abc import Callable
+from typing import Annotated, Any
+
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    NonNegativeInt,
+    StringConstraints,
+    TypeAdapter,
+    ValidationError,
+    field_validator,
+    model_validator,
+)
+
+from app.auth import USER_MAX_LENGTH
+from app.config import settings
+from app.logging_config import logger
+from app.pipeline import EventError
+from app.topics import TopicError, split_topic
+
+ROOM_MAX_LENGTH = 256
+SID_MAX_LENGTH = 64
+PRESENCE_QUERY_USERS = 100
+FILE_NAME_MAX_LENGTH = 255
+TRANSFER_ID_MAX_LENGTH = 64
+MESSAGE_ID_MAX_LENGTH = 128
+# Room for the chunk's id and offset next to its bytes
+CHUNK_OVERHEAD = 1024
+
+RoomName = Annotated[str, StringConstraints(strict=True, min_length=1, max_length=ROOM_MAX_LENGTH)]
+Sid = Annotated[str, StringConstraints(strict=True, min_length=1, max_length=SID_MAX_LENGTH)]
+UserId = Annotated[str, StringConstraints(strict=True, min_length=1, max_length=USER_MAX_LENGTH)]
+TransferId = Annotated[
+    str, StringConstraints(strict=True, min_length=1, max_length=TRANSFER_ID_MAX_LENGTH)
+]
+MessageId = Annotated[
+    str, StringConstraints(strict=True, min_length=1, max_length=MESSAGE_ID_MAX_LENGTH)
+]
+
+
+class Schema(BaseModel):
+    model_config = ConfigDict(strict=True, frozen=True)
+
+
+class JoinRoom(Schema):
+    room: RoomName
+    history: bool = False
+    since: NonNegativeInt | None = None
+    limit: NonNegativeInt | None = None
+
+    @property
+    def replay(self) -> bool:
+        return self.history or self.since is not None or self.limit is not None
+
+
+class RoomMessage(Schema):
+    room: RoomName
+    message: Any
+    message_id: MessageId | None = None
+    # Messages with the same key in a room are coalesced to the latest one
+    conflate: MessageId | None = None
+
+    @field_validator("message")
+    @classmethod
+    def _present(cls, message: Any) -> Any:
+        if message is None:
+            raise ValueError("message is required")
+        return message
+
+
+class AdminSync(Schema):
+    since: NonNegativeInt | None = None
+
+
+class AdminBroadcast(Schema):
+    messages: list[Any]
+    room: RoomName | None = None
+    sids: list[str] | None = None
+
+    @model_validator(mode="after")
+    def _one_target(self) -> "AdminBroadcast":
+        if self.room is not None and self.sids is not None:
+            raise ValueError("room and sids are mutually exclusive")
+        return self
+
+
+class DirectMessage(Schema):
+    to: Sid | None = None
+    user: UserId | None = None
+    message: Any
+
+    @field_validator("message")
+    @classmethod
+    def _present(cls, message: Any) -> Any:
+        if message is None:
+            raise ValueError("message is required")
+        return message
+
+    @model_validator(mode="after")
+    def _one_target(self) -> "DirectMessage":
+        if (self.to is None) == (self.user is None):
+            raise ValueError("exactly one of to or user is required")
+        return self
+
+    @property
+    def target(self) -> str:
+        return f"sid:{self.to}" if self.to is not None else f"user:{self.user}"
+
+
+class Typing(Schema):
+    room: RoomName
+    typing: bool = True
+
+
+class PresenceQuery(Schema):
+    room: RoomName | None = None
+    users: Annotated[list[UserId], Field(max_length=PRESENCE_QUERY_USERS)] | None = None
+
+    @model_validator(mode="after")
+    def _target(self) -> "PresenceQuery":
+        if self.room is None and self.users is None:
+            raise ValueError("room or users is required")
+        return self
+
+
+class FileBegin(Schema):
+    name: Annotated[
+        str, StringConstraints(strict=True, min_length=1, max_length=FILE_NAME_MAX_LENGTH)
+    ]
+    size: NonNegativeInt
+    room: RoomName | None = None
+    sha256: Annotated[str, StringConstraints(pattern="^[0-9a-f]{64}$")] | None = None
+
+    @property
+    def summary(self) -> dict[str, Any]:
+        return {"name": self.name, "size": self.size}
+
+
+class FileChunk(Schema):
+    id: TransferId
+    offset: NonNegativeInt
+    data: bytes
+    token: TransferId | None = None
+
+
+class FileRead(Schema):
+    id: TransferId
+    offset: NonNegativeInt = 0
+    token: TransferId | None = None
+
+
+class FileRef(Schema):
+    id: TransferId
+    token: TransferId | None = None
+
+
+class Subscribe(Schema):
+    pattern: RoomName
+
+    @field_validator("pattern")
+    @classmethod
+    def _pattern(cls, pattern: str) -> str:
+        try:
+            split_topic(pattern, settings.topic_separator, pattern=True)
+        except TopicError as exc:
+            raise ValueError(str(exc)) from None
+        return pattern
+
+
+class Publish(Schema):
+    topic: RoomName
+    message: Any
+    message_id: MessageId | None = None
+
+    @field_validator("topic")
+    @classmethod
+    def _topic(cls, topic: str) -> str:
+        try:
+            split_topic(topic, settings.topic_separator)
+        except TopicError as exc:
+            raise ValueError(str(exc)) from None
+        return topic
+
+    @field_validator("message")
+    @classmethod
+    def _present(cls, message: Any) -> Any:
+        if message is None:
+            raise ValueError("message is required")
+        return message
+
+
+def check_limits(
+    data: Any, max_bytes: int = settings.max_event_bytes, max_depth: int = settings.max_event_depth
+) -> None:
+    # Walks the decoded payload with an approximate JSON size budget and stops
+    # as soon as it runs out, so oversized payloads are cheap to reject.
+    # Decoded payloads only hold builtin types, hence the exact type checks.
+    kind = type(data)
+    if kind is str or kind is bytes:
+        if len(data) > max_bytes:
+            raise EventError("Payload too large")
+        return
+    if kind is not dict and kind is not list:
+        return
+    budget = max_bytes
+    stack: list[tuple[Any, int]] = [(data, 1)]
+    push = stack.append
+    while stack:
+        value, depth = stack.pop()
+        if depth > max_depth:
+            raise EventError("Payload nested too deeply")
+        # Brackets plus at least a separator and one byte per item, so huge
+        # containers are rejected without looking at their items.
+        budget -= 2 + 2 * len(value)
+        if budget < 0:
+            raise EventError("Payload too large")
+        if type(value) is dict:
+            try:
+                budget -= sum(map(len, value)) + 2 * len(value)
+            except TypeError:
+                budget -= 8 * len(value)
+            items = value.values()
+        else:
+            items = value
+        for item in items:
+            kind = type(item)
+            if kind is str or kind is bytes:
+                budget -= len(item)
+            elif kind is dict or kind is list:
+                push((item, depth + 1))
+            else:
+                budget -= 4
+        if budget < 0:
+            raise EventError("Payload too large")
+
+
+def payload(data: Any) -> Any:
+    check_limits(data)
+    return data
+
+
+def message_id(data: Any) -> str | None:
+    # Free-form payloads opt into deduplication with a ``message_id`` key.
+    if type(data) is dict:
+        value = data.get("message_id")
+        if type(value) is str and 0 < len(value) <= MESSAGE_ID_MAX_LENGTH:
+            return value
+    return None
+
+
+def validator(
+    schema: Any,
+    message: str,
+    coerce: Callable[[Any], Any] | None = None,
+    max_bytes: int = settings.max_event_bytes,
+) -> Callable[[Any], Any]:
+    # ``TypeAdapter`` compiles the schema once; validating is a single call
+    # into pydantic-core.
+    validate = TypeAdapter(schema).validate_python
+
+    def validated(data: Any) -> Any:
+        check_limits(data, max_bytes)
+        if coerce is not None:
+            data = coerce(data)
+        try:
+            return validate(data)
+        except ValidationError as exc:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Rejected payload: {exc.errors(include_url=False)}")
+            raise EventError(message) from None
+
+    return validated
+
+
+def _room_only(data: Any) -> Any:
+    return {"room": data} if isinstance(data, str) else data
+
+
+def _id_only(data: Any) -> Any:
+    return {"id": data} if isinstance(data, str) else data
+
+
+def _pattern_only(data: Any) -> Any:
+    return {"pattern": data} if isinstance(data, str) else data
+
+
+def _empty(data: Any) -> Any:
+    return {} if data is None else data
+
+
+room_name = validator(RoomName, "Missing room")
+join_room = validator(JoinRoom, "Missing room", coerce=_room_only)
+room_message = validator(RoomMessage, "Missing room or message")
+admin_sync = validator(AdminSync, "Invalid sync request", coerce=_empty)
+admin_broadcast = validator(AdminBroadcast, "Expected an object with a messages list")
+direct_message = validator(DirectMessage, "Missing recipient or message")
+typing = validator(Typing, "Missing room", coerce=_room_only)
+presence_query = validator(PresenceQuery, "Expected a room or a users list", coerce=_room_only)
+file_begin = validator(FileBegin, "Expected a file name and size")
+file_chunk = validator(
+    FileChunk,
+    "Expected a transfer id, offset and bytes",
+    max_bytes=settings.transfer_chunk_size + CHUNK_OVERHEAD,
+)
+file_read = validator(FileRead, "Missing transfer id", coerce=_id_only)
+file_ref = validator(FileRef, "Missing transfer id", coerce=_id_only)
+subscribe = validator(Subscribe, "Invalid topic pattern", coerce=_pattern_only)
+publish = validator(Publish, "Missing or invalid topic or message")
@@ -0,0 +1,42 @@
+import asyncio
+from types import FrameType
+
+import socketio
+from uvicorn.config import Config
+from uvicorn.server import Server
+
+from app.config import settings
+from app.drain import drain
+from app.logging_config import logger
+
+
+class DrainingServer(Server):
+    def __init__(self, config: Config, sio: socketio.AsyncServer) -> None:
+        super().__init__(config)
+        self.sio = sio
+
+    def handle_exit(self, sig: int, frame: FrameType | None) -> None:
+        # The first signal drains connections before uvicorn shuts down;
+        # a second one falls through to uvicorn's immediate exit.
+        if drain.draining:
+            super().handle_exit(sig, frame)
+            return
+        logger.info(f"Received signal {sig}, draining connections...")
+        asyncio.get_running_loop().call_soon_threadsafe(self._start_drain)
+
+    def _start_drain(self) -> None:
+        task = drain.start(self.sio)
+        task.add_done_callback(lambda _: setattr(self, "should_exit", True))
+
+
+def serve(app: socketio.ASGIApp) -> None:
+    config = Config(
+        app,
+        host=settings.host,
+        port=settings.port,
+        log_level=settings.logger_level.lower(),
+        reload=False,
+    )
+    server = DrainingServer(config, app.engineio_server)
+    logger.info(f"Server running at http://{settings.host}:{settings.port}")
+    server.run()
@@ -0,0 +1,411 @@
+import asyncio
+import contextlib
+import marshal
+import os
+import struct
+import time
+import zlib
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from app.config import settings
+from app.connections import ADMIN_ROOM
+from app.logging_config import logger
+from app.message_log import MessageLog
+from app.tenants import Tenant, tenants
+
+# A snapshot file is MAGIC (the last byte is the format version) followed by
+# records framed as (length, crc32) + zlib-compressed marshal data. The first
+# record is a full base; later ones are deltas appended to it.
+MAGIC = b"SIOSNAP\x01"
+FRAME = struct.Struct(">II")
+BASE = 0
+DELTA = 1
+
+Rooms = dict[str, frozenset[str]]
+# (event, from sid, room, data, unix timestamp)
+LogRecord = tuple[str, str | None, str | None, Any, float]
+
+
+@dataclass(slots=True)
+class SnapshotState:
+    # What the file on disk holds, so the next checkpoint only writes changes.
+    rooms: Rooms = field(default_factory=dict)
+    appended: int = 0
+    generation: int = 0
+    deltas: int = 0
+    based: bool = False
+    # Connection journal version and restore expirations seen at that write
+    version: int = 0
+    expirations: int = 0
+    # Memberships captured when draining started; disconnects after that
+    # are the drain itself, not users leaving.
+    frozen: Rooms | None = None
+
+
+@dataclass(slots=True)
+class SnapshotWrite:
+    namespace: str
+    path: Path
+    blob: bytes
+    base: bool
+    rooms: Rooms
+    appended: int
+    generation: int
+    version: int
+    expirations: int
+
+
+def _log_record(entry: MessageLog) -> LogRecord:
+    return (entry.event, entry.from_sid, entry.to_room, entry.data, entry.timestamp.timestamp())
+
+
+def _marshalable(data: Any) -> Any:
+    try:
+        marshal.dumps(data)
+    except ValueError:
+        return str(data)
+    return data
+
+
+def encode_record(kind: int, rooms: dict[str, tuple[str, ...]], logs: list[LogRecord]) -> bytes:
+    try:
+        body = marshal.dumps((kind, rooms, logs))
+    except ValueError:
+        # Log data marshal can't represent is kept as its text.
+        logs = [(event, sid, room, _marshalable(data), ts) for event, sid, room, data, ts in logs]
+        body = marshal.dumps((kind, rooms, logs))
+    body = zlib.compress(body)
+    return FRAME.pack(len(body), zlib.crc32(body)) + body
+
+
+def decode_records(data: bytes) -> tuple[list[tuple[Any, ...]], bool]:
+    # Returns the readable records and whether the file ended cleanly; a torn
+    # or corrupt record ends the file, since appends after it can't be trusted.
+    if not data.startswith(MAGIC):
+        raise ValueError("not a snapshot file")
+    records = []
+    offset = len(MAGIC)
+    while offset < len(data):
+        if offset + FRAME.size > len(data):
+            return records, False
+        length, crc = FRAME.unpack_from(data, offset)
+        start = offset + FRAME.size
+        body = data[start : start + length]
+        if len(body) < length or zlib.crc32(body) != crc:
+            return records, False
+        try:
+            record = marshal.loads(zlib.decompress(body))
+        except (ValueError, EOFError, TypeError, zlib.error):
+            return records, False
+        if not isinstance(record, tuple) or len(record) != 3:
+            return records, False
+        records.append(record)
+        offset = start + length
+    return records, True
+
+
+def replay_records(records: list[tuple[Any, ...]]) -> tuple[Rooms, list[LogRecord]]:
+    rooms: Rooms = {}
+    logs: list[LogRecord] = []
+    for kind, changed, entries in records:
+        if kind == BASE:
+            rooms = {}
+            logs = []
+        for user, user_rooms in changed.items():
+            if user_rooms:
+                rooms[user] = frozenset(user_rooms)
+            else:
+                rooms.pop(user, None)
+        logs.extend(entries)
+    return rooms, logs
+
+
+def _write(write: SnapshotWrite) -> None:
+    path = write.path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if write.base:
+        # A new base replaces the file atomically, dropping the old deltas.
+        tmp = path.with_name(path.name + ".tmp")
+        with tmp.open("wb") as snapshot:
+            snapshot.write(MAGIC + write.blob)
+            snapshot.flush()
+            os.fsync(snapshot.fileno())
+        os.replace(tmp, path)
+    else:
+        with path.open("ab") as snapshot:
+            snapshot.write(write.blob)
+            snapshot.flush()
+            os.fsync(snapshot.fileno())
+
+
+def _write_all(writes: list[SnapshotWrite]) -> list[bool]:
+    results = []
+    for write in writes:
+        try:
+            _write(write)
+        except OSError as exc:
+            logger.warning(f"Snapshot write to {write.path} failed: {exc}")
+            results.append(False)
+        else:
+            results.append(True)
+    return results
+
+
+class Snapshotter:
+    def __init__(
+        self,
+        directory: Path | None = None,
+        interval: float = 5.0,
+        max_deltas: int = 50,
+        restore_window: float = 300.0,
+    ) -> None:
+        self.directory = directory
+        self.interval = interval
+        self.max_deltas = max_deltas
+        self.restore_window = restore_window
+        self.checkpoints = 0
+        self.bytes_written = 0
+        self.restored_users = 0
+        self.restored_logs = 0
+        self._states: dict[str, SnapshotState] = {}
+        # namespace -> user -> rooms, held for users until they reconnect
+        self._restored: dict[str, Rooms] = {}
+        self._restored_until = 0.0
+        self._expirations = 0
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.directory is not None
+
+    def path(self, namespace: str) -> Path:
+        return (self.directory or Path()) / f"{namespace.strip('/') or 'default'}.snap"
+
+    def restore(self) -> None:
+        if self.directory is None:
+            return
+        self._restored_until = time.monotonic() + self.restore_window
+        for tenant in tenants:
+            self._restore(tenant)
+
+    def _restore(self, tenant: Tenant) -> None:
+        state = self._states[tenant.namespace] = SnapshotState()
+        path = self.path(tenant.namespace)
+        try:
+            records, clean = decode_records(path.read_bytes())
+            rooms, logs = replay_records(records)
+            entries = [
+                MessageLog(event, sid, room, data, datetime.fromtimestamp(ts, UTC))
+                for event, sid, room, data, ts in logs
+            ]
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, TypeError, AttributeError) as exc:
+            logger.warning(f"Ignoring unreadable snapshot {path}: {exc}")
+            return
+        if not clean:
+            logger.warning(f"Snapshot {path} ends in a torn record; kept {len(records)} records")
+        tenant.logs.restore(entries)
+        self._restored[tenant.namespace] = rooms
+        self.restored_users += len(rooms)
+        self.restored_logs += len(entries)
+        state.rooms = dict(rooms)
+        state.appended = tenant.logs.appended
+        state.generation = tenant.logs.generation
+        state.version = tenant.manager.version
+        state.expirations = self._expirations
+        state.deltas = max(0, len(records) - 1)
+        # Appending after a torn record would hide everything written later.
+        state.based = clean and bool(records)
+        logger.info(
+            f"Restored rooms of {len(rooms)} users and {len(entries)} log entries"
+            f" ({tenant.namespace})"
+        )
+
+    def _restored_rooms(self, namespace: str) -> Rooms:
+        if self._restored and time.monotonic() > self._restored_until:
+            self._restored.clear()
+            self._expirations += 1
+        return self._restored.get(namespace, {})
+
+    def reclaim(self, namespace: str, user: str) -> frozenset[str]:
+        # Every socket of a user reconnecting within the window gets the rooms,
+        # so each open tab is re-admitted, not only the first.
+        return self._restored_rooms(namespace).get(user, frozenset())
+
+    def _collect(self, tenant: Tenant) -> Rooms:
+        joined: dict[str, set[str]] = {}
+        for conn in tenant.manager.all():
+            if conn.identity is not None:
+                joined.setdefault(conn.identity.user, set()).update(conn.rooms)
+        rooms = {
+            user: frozenset(user_rooms - {ADMIN_ROOM})
+            for user, user_rooms in joined.items()
+            if user_rooms - {ADMIN_ROOM}
+        }
+        # Restored users who haven't come back yet keep their rooms.
+        for user, user_rooms in self._restored_rooms(tenant.namespace).items():
+            if user not in joined:
+                rooms[user] = user_rooms
+        return rooms
+
+    def _user_rooms(self, tenant: Tenant, user: str) -> frozenset[str]:
+        manager = tenant.manager
+        sids = manager.sids_for_user(user)
+        if not sids:
+            return self._restored_rooms(tenant.namespace).get(user, frozenset())
+        rooms: set[str] = set()
+        for sid in sids:
+            conn = manager.get(sid)
+            if conn is not None:
+                rooms.update(conn.rooms)
+        rooms.discard(ADMIN_ROOM)
+        return frozenset(rooms)
+
+    def _changed_users(self, tenant: Tenant, state: SnapshotState) -> set[str] | None:
+        # Users touched since the last write, read off the connection journal;
+        # None when the journal no longer reaches back that far.
+        self._restored_rooms(tenant.namespace)
+        if state.expirations != self._expirations:
+            return None
+        changes = tenant.manager.changes_since(state.version)
+        if changes is None:
+            return None
+        users = set()
+        for change in changes:
+            if change["op"] in ("add", "remove"):
+                user = change["user"]
+            else:
+                conn = tenant.manager.get(change["sid"])
+                user = conn.user if conn is not None else None
+            if user is not None:
+                users.add(user)
+        return users
+
+    def _prepare(self, tenant: Tenant, freeze: bool) -> SnapshotWrite | None:
+        state = self._states.setdefault(tenant.namespace, SnapshotState())
+        changed: dict[str, tuple[str, ...]] = {}
+        if state.frozen is not None:
+            rooms = state.frozen
+        else:
+            users = self._changed_users(tenant, state)
+            if users is None:
+                rooms = self._collect(tenant)
+                changed = {
+                    user: tuple(user_rooms)
+                    for user, user_rooms in rooms.items()
+                    if state.rooms.get(user) != user_rooms
+                }
+                changed.update((user, ()) for user in state.rooms if user not in rooms)
+            else:
+                rooms = state.rooms
+                for user in users:
+                    user_rooms = self._user_rooms(tenant, user)
+                    if user_rooms != rooms.get(user, frozenset()):
+                        changed[user] = tuple(user_rooms)
+                if changed:
+                    rooms = dict(rooms)
+                    for user, user_rooms in changed.items():
+                        if user_rooms:
+                            rooms[user] = frozenset(user_rooms)
+                        else:
+                            rooms.pop(user, None)
+            if freeze:
+                state.frozen = rooms
+        logs = tenant.logs
+        base = (
+            not state.based
+            or state.deltas >= self.max_deltas
+            or logs.generation != state.generation
+        )
+        if base:
+            changed = {user: tuple(user_rooms) for user, user_rooms in rooms.items()}
+            entries = logs.all()
+        else:
+            entries = logs.since(state.appended)
+            if not changed and not entries:
+                return None
+        blob = encode_record(
+            BASE if base else DELTA, changed, [_log_record(entry) for entry in entries]
+        )
+        return SnapshotWrite(
+            tenant.namespace,
+            self.path(tenant.namespace),
+            blob,
+            base,
+            rooms,
+            logs.appended,
+            logs.generation,
+            tenant.manager.version,
+            self._expirations,
+        )
+
+    async def checkpoint(self, freeze: bool = False) -> int:
+        if self.directory is None:
+            return 0
+        async with self._lock:
+            # State is captured on the loop; only the file I/O runs in a thread.
+            writes = [write for tenant in tenants if (write := self._prepare(tenant, freeze))]
+            if not writes:
+                return 0
+            results = await asyncio.to_thread(_write_all, writes)
+            written = 0
+            for write, ok in zip(writes, results, strict=True):
+                state = self._states[write.namespace]
+                if not ok:
+                    state.based = False
+                    continue
+                state.rooms = write.rooms
+                state.appended = write.appended
+                state.generation = write.generation
+                state.version = write.version
+                state.expirations = write.expirations
+                state.deltas = 0 if write.base else state.deltas + 1
+                state.based = True
+                written += len(write.blob)
+            self.checkpoints += 1
+            self.bytes_written += written
+            return written
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.checkpoint()
+
+    def start(self) -> None:
+        if self.directory is not None and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self.checkpoint()
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "checkpoints": self.checkpoints,
+            "bytes_written": self.bytes_written,
+            "restored_users": self.restored_users,
+            "restored_logs": self.restored_logs,
+            "pending_users": sum(len(rooms) for rooms in self._restored.values()),
+        }
+
+    def reset(self) -> None:
+        self._states.clear()
+        self._restored.clear()
+
+
+snapshotter = Snapshotter(
+    directory=Path(settings.snapshot_dir) if settings.snapshot_dir else None,
+    interval=settings.snapshot_interval,
+    max_deltas=settings.snapshot_max_deltas,
+    restore_window=settings.snapshot_restore_window,
+)
@@ -0,0 +1,169 @@
+import asyncio
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from typing import Any
+
+import socketio
+
+from app.config import settings
+from app.conflation import Conflator, create_conflator
+from app.connections import ADMIN_ROOM, ConnectionManager, manager
+from app.history import RoomHistory, history
+from app.mailbox import MailboxStore, create_mailboxes
+from app.message_log import MessageLogger, msg_logger
+from app.presence import Presence, create_presence
+from app.topics import TopicIndex, create_topics
+from app.transfer import TransferStore, create_transfers
+
+DEFAULT_NAMESPACE = "/"
+
+
+class AdminDeltaPublisher:
+    def __init__(
+        self, manager: ConnectionManager = manager, namespace: str = DEFAULT_NAMESPACE
+    ) -> None:
+        self.manager = manager
+        self.namespace = namespace
+        self._sent_version = manager.version
+        self._pending = False
+
+    def schedule(self, sio: socketio.AsyncServer) -> None:
+        if self._pending:
+            return
+        self._pending = True
+        asyncio.create_task(self._flush(sio))
+
+    async def _flush(self, sio: socketio.AsyncServer) -> None:
+        # Yield once so every change made in this loop tick goes out in one emit.
+        await asyncio.sleep(0)
+        self._pending = False
+        since = self._sent_version
+        if since == self.manager.version:
+            return
+        self._sent_version = self.manager.version
+        if not self.manager.has_room(ADMIN_ROOM):
+            # No dashboard is open; one that opens later starts from a full
+            # snapshot, so skipped versions are never needed.
+            return
+        changes = self.manager.changes_since(since)
+        payload: dict[str, Any] = {"from": since, "version": self._sent_version}
+        if changes is None:
+            payload["resync"] = True
+        else:
+            payload["changes"] = changes
+        await sio.emit("admin:delta", payload, to=ADMIN_ROOM, namespace=self.namespace)
+
+
+@dataclass(slots=True)
+class TenantStats:
+    connections: int = 0
+    refused: int = 0
+    unauthorized: int = 0
+    messages: int = 0
+    rejected: int = 0
+    limited: int = 0
+    duplicates: int = 0
+    events: dict[str, int] = field(default_factory=dict)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "connections": self.connections,
+            "refused": self.refused,
+            "unauthorized": self.unauthorized,
+            "messages": self.messages,
+            "rejected": self.rejected,
+            "limited": self.limited,
+            "duplicates": self.duplicates,
+            "events": dict(self.events),
+        }
+
+
+@dataclass(slots=True)
+class Tenant:
+    namespace: str
+    manager: ConnectionManager
+    logs: MessageLogger
+    history: RoomHistory
+    deltas: AdminDeltaPublisher
+    presence: Presence
+    mailboxes: MailboxStore
+    transfers: TransferStore
+    topics: TopicIndex
+    conflator: Conflator
+    max_connections: int = 0
+    stats: TenantStats = field(default_factory=TenantStats)
+
+    @property
+    def full(self) -> bool:
+        return bool(self.max_connections) and self.manager.count() >= self.max_connections
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "namespace": self.namespace,
+            "connections": self.manager.count(),
+            "rooms": len(self.manager.rooms()),
+            "logs": self.logs.count(),
+            "online_users": self.presence.online_count(),
+            "mailboxes": self.mailboxes.to_dict(),
+            "transfers": self.transfers.to_dict(),
+            "topics": self.topics.to_dict(),
+            "conflation": self.conflator.to_dict(),
+            "max_connections": self.max_connections,
+            "stats": self.stats.to_dict(),
+        }
+
+
+class TenantRegistry:
+    def __init__(self, max_connections: int = 0) -> None:
+        self.max_connections = max_connections
+        self._tenants: dict[str, Tenant] = {}
+
+    def add(
+        self,
+        namespace: str,
+        manager: ConnectionManager | None = None,
+        logs: MessageLogger | None = None,
+        history: RoomHistory | None = None,
+    ) -> Tenant:
+        tenant = self._tenants.get(namespace)
+        if tenant is not None:
+            return tenant
+        manager = manager if manager is not None else ConnectionManager()
+        tenant = Tenant(
+            namespace=namespace,
+            manager=manager,
+            logs=logs if logs is not None else MessageLogger(),
+            history=history
+            if history is not None
+            else RoomHistory(
+                max_messages=settings.room_history_size,
+                max_bytes=settings.room_history_bytes,
+                max_rooms=settings.room_history_rooms,
+            ),
+            deltas=AdminDeltaPublisher(manager, namespace),
+            presence=create_presence(namespace),
+            mailboxes=create_mailboxes(namespace),
+            transfers=create_transfers(namespace),
+            topics=create_topics(),
+            conflator=create_conflator(namespace),
+            max_connections=self.max_connections,
+        )
+        self._tenants[namespace] = tenant
+        return tenant
+
+    def get(self, namespace: str) -> Tenant | None:
+        return self._tenants.get(namespace)
+
+    def __getitem__(self, namespace: str) -> Tenant:
+        return self._tenants[namespace]
+
+    def __iter__(self) -> Iterator[Tenant]:
+        return iter(list(self._tenants.values()))
+
+    def connection_count(self) -> int:
+        return sum(tenant.manager.count() for tenant in self._tenants.values())
+
+
+tenants = TenantRegistry(max_connections=settings.namespace_max_connections)
+# The default namespace keeps the module-level singletons it always used.
+tenants.add(DEFAULT_NAMESPACE, manager=manager, logs=msg_logger, history=history)
@@ -0,0 +1,138 @@
+from typing import Any
+
+from app.config import settings
+
+# One segment, or whatever is left of the topic (including nothing)
+ANY_SEGMENT = "*"
+ANY_REST = "#"
+TOPIC_MAX_DEPTH = 16
+
+
+class TopicError(ValueError):
+    pass
+
+
+def split_topic(topic: str, separator: str = "/", pattern: bool = False) -> list[str]:
+    segments = topic.split(separator)
+    if len(segments) > TOPIC_MAX_DEPTH:
+        raise TopicError("Topic too deep")
+    last = len(segments) - 1
+    for i, segment in enumerate(segments):
+        if not segment:
+            raise TopicError("Empty topic segment")
+        if ANY_SEGMENT in segment or ANY_REST in segment:
+            if not pattern:
+                raise TopicError("Wildcards are only allowed in subscriptions")
+            if segment == ANY_REST and i != last:
+                raise TopicError(f"{ANY_REST} must be the last segment")
+            if segment not in (ANY_SEGMENT, ANY_REST):
+                raise TopicError("Wildcards must fill a whole segment")
+    return segments
+
+
+class _Node:
+    __slots__ = ("children", "sids")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _Node] = {}
+        self.sids: set[str] = set()
+
+
+class TopicIndex:
+    def __init__(self, separator: str = "/", max_subscriptions: int = 100) -> None:
+        self.separator = separator
+        self.max_subscriptions = max_subscriptions
+        self._root = _Node()
+        # sid -> patterns, for limits and disconnect cleanup
+        self._patterns: dict[str, set[str]] = {}
+
+    def subscribe(self, sid: str, pattern: str) -> bool:
+        patterns = self._patterns.get(sid)
+        if patterns is not None and pattern in patterns:
+            return False
+        if patterns is not None and len(patterns) >= self.max_subscriptions:
+            raise TopicError("Too many subscriptions")
+        node = self._root
+        for segment in split_topic(pattern, self.separator, pattern=True):
+            child = node.children.get(segment)
+            if child is None:
+                child = node.children[segment] = _Node()
+            node = child
+        node.sids.add(sid)
+        self._patterns.setdefault(sid, set()).add(pattern)
+        return True
+
+    def unsubscribe(self, sid: str, pattern: str) -> bool:
+        patterns = self._patterns.get(sid)
+        if patterns is None or pattern not in patterns:
+            return False
+        patterns.discard(pattern)
+        if not patterns:
+            del self._patterns[sid]
+        path = [self._root]
+        segments = pattern.split(self.separator)
+        for segment in segments:
+            path.append(path[-1].children[segment])
+        path[-1].sids.discard(sid)
+        # Prune the branch back to the first node still in use.
+        for depth in range(len(segments), 0, -1):
+            node = path[depth]
+            if node.sids or node.children:
+                break
+            del path[depth - 1].children[segments[depth - 1]]
+        return True
+
+    def remove(self, sid: str) -> int:
+        patterns = self._patterns.get(sid)
+        if not patterns:
+            return 0
+        removed = list(patterns)
+        for pattern in removed:
+            self.unsubscribe(sid, pattern)
+        return len(removed)
+
+    def match(self, topic: str) -> set[str]:
+        # Walks one trie level per topic segment, following the literal
+        # segment and ``*``; the work depends on the topic's depth and the
+        # wildcards subscribed along it, not on how many sids subscribed.
+        matched: set[str] = set()
+        nodes = [self._root]
+        for segment in topic.split(self.separator):
+            following = []
+            for node in nodes:
+                children = node.children
+                rest = children.get(ANY_REST)
+                if rest is not None:
+                    matched |= rest.sids
+                child = children.get(segment)
+                if child is not None:
+                    following.append(child)
+                child = children.get(ANY_SEGMENT)
+                if child is not None:
+                    following.append(child)
+            if not following:
+                return matched
+            nodes = following
+        for node in nodes:
+            matched |= node.sids
+            rest = node.children.get(ANY_REST)
+            if rest is not None:
+                matched |= rest.sids
+        return matched
+
+    def subscriptions(self, sid: str) -> list[str]:
+        return sorted(self._patterns.get(sid, ()))
+
+    def count(self) -> int:
+        return sum(len(patterns) for patterns in self._patterns.values())
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"subscribers": len(self._patterns), "subscriptions": self.count()}
+
+    def clear(self) -> None:
+        self._root = _Node()
+        self._patterns.clear()
+
+
+def create_topics() -> TopicIndex:
+    return TopicIndex(settings.topic_separator, settings.topic_max_subscriptions)
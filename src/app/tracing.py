@@ -0,0 +1,131 @@
+import random
+import time
+from bisect import bisect_left
+from collections.abc import Callable
+from typing import Any
+
+from app.config import settings
+
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+OTHER_ROOM = "*"
+STAGES = ("fanout", "ack")
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "total_ms", "max_ms")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float) -> None:
+        self.counts[bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def percentile(self, p: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = p * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return float(BUCKETS_MS[i]) if i < len(BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": self.percentile(0.5),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.max_ms, 3),
+            "buckets": dict(zip([*map(str, BUCKETS_MS), "inf"], self.counts, strict=True)),
+        }
+
+
+class DeliveryTracer:
+    def __init__(
+        self,
+        sample_rate: float = 0.0,
+        probes: int = 4,
+        max_keys: int = 256,
+        max_outstanding: int = 1,
+    ) -> None:
+        self.sample_rate = sample_rate
+        self.probes = probes
+        self.max_outstanding = max_outstanding
+        self._max_keys = max_keys
+        self._stats: dict[tuple[str, str], dict[str, Histogram]] = {}
+        # Unacknowledged probes per sid. Each one holds an ack callback in the
+        # socketio manager until the client acks or disconnects, and most
+        # listeners never ack, so a sid at the cap is not probed again.
+        self._outstanding: dict[str, int] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0
+
+    def sample(self) -> float | None:
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return None
+        return time.perf_counter()
+
+    def record(self, event: str, room: str | None, stage: str, start: float) -> None:
+        key = (event, room or "")
+        stats = self._stats.get(key)
+        if stats is None:
+            if len(self._stats) >= self._max_keys:
+                key = (event, OTHER_ROOM)
+                stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = {stage: Histogram() for stage in STAGES}
+        stats[stage].observe((time.perf_counter() - start) * 1000)
+
+    def probe_ready(self, sid: str) -> bool:
+        return self._outstanding.get(sid, 0) < self.max_outstanding
+
+    def ack_callback(
+        self, event: str, room: str | None, start: float, sid: str | None = None
+    ) -> Callable[..., None]:
+        outstanding = self._outstanding
+        if sid is not None:
+            outstanding[sid] = outstanding.get(sid, 0) + 1
+
+        def on_ack(*args: Any) -> None:
+            if sid is not None and sid in outstanding:
+                outstanding[sid] -= 1
+                if not outstanding[sid]:
+                    del outstanding[sid]
+            self.record(event, room, "ack", start)
+
+        return on_ack
+
+    def forget(self, sid: str) -> None:
+        self._outstanding.pop(sid, None)
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        return [
+            {
+                "event": event,
+                "room": room or None,
+                **{stage: hist.to_dict() for stage, hist in stats.items()},
+            }
+            for (event, room), stats in self._stats.items()
+        ]
+
+    def clear(self) -> None:
+        self._stats.clear()
+        self._outstanding.clear()
+
+
+tracer = DeliveryTracer(
+    sample_rate=settings.trace_sample_rate,
+    probes=settings.trace_probes,
+    max_outstanding=settings.trace_max_outstanding,
+)
@@ -0,0 +1,317 @@
+import asyncio
+import hashlib
+import os
+import secrets
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from app.config import settings
+from app.logging_config import logger
+
+# Transfer files are named with this prefix, so clearing leftovers never
+# touches anything else in the directory.
+FILE_PREFIX = "transfer-"
+
+
+class TransferError(ValueError):
+    pass
+
+
+@dataclass(slots=True)
+class Transfer:
+    id: str
+    name: str
+    size: int
+    path: Path
+    # The uploader's verified user, or its sid for anonymous uploads
+    owner: str
+    # Only the verified user may resume. Anonymous uploads continue from the
+    # uploading sid, or from another connection that presents ``token``; the
+    # id alone is shared with the room and grants no write access.
+    token: str
+    user: str | None = None
+    room: str | None = None
+    sha256: str | None = None
+    offset: int = 0
+    expires: float = 0.0
+    inflight: int = 0
+    digest: Any = field(default_factory=hashlib.sha256)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    @property
+    def complete(self) -> bool:
+        return self.offset == self.size
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "size": self.size,
+            "offset": self.offset,
+            "room": self.room,
+            "owner": self.owner,
+            "complete": self.complete,
+        }
+
+
+def _write_chunk(path: Path, offset: int, data: bytes) -> None:
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT, 0o600)
+    try:
+        os.pwrite(fd, data, offset)
+    finally:
+        os.close(fd)
+
+
+def _remove_files(paths: list[Path]) -> None:
+    for path in paths:
+        try:
+            path.unlink(missing_ok=True)
+        except OSError as exc:
+            logger.warning(f"Could not remove transfer file {path}: {exc}")
+
+
+def _remove_leftovers(directory: Path) -> None:
+    # Transfers live in memory, so files left by a previous process can't be
+    # resumed or downloaded; they only take up disk space.
+    directory.mkdir(parents=True, exist_ok=True)
+    for stale in directory.glob(f"{FILE_PREFIX}*"):
+        if stale.is_file():
+            stale.unlink(missing_ok=True)
+
+
+def _read_chunk(path: Path, offset: int, length: int) -> bytes:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return os.pread(fd, length, offset)
+    finally:
+        os.close(fd)
+
+
+class TransferStore:
+    def __init__(
+        self,
+        directory: Path | None = None,
+        chunk_size: int = 65536,
+        window: int = 8,
+        max_size: int = 104857600,
+        max_bytes: int = 1073741824,
+        max_active: int = 4,
+        ttl: float = 3600.0,
+    ) -> None:
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.window = max(1, window)
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.max_active = max_active
+        self.ttl = ttl
+        # Bytes promised to live transfers, so disk use is bounded up front.
+        self.reserved = 0
+        self.completed = 0
+        self.expired = 0
+        # Least recently active first, so expiry only looks at the front.
+        self._transfers: OrderedDict[str, Transfer] = OrderedDict()
+        self._reading: dict[str, int] = {}
+        self._prepared = False
+        self._prepare_lock = asyncio.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.directory is not None
+
+    async def begin(
+        self,
+        owner: str,
+        user: str | None,
+        name: str,
+        size: int,
+        room: str | None = None,
+        sha256: str | None = None,
+    ) -> Transfer:
+        if self.directory is None:
+            raise TransferError("File transfer is disabled")
+        if not self._prepared:
+            await self._prepare(self.directory)
+        await self.purge()
+        if size > self.max_size:
+            raise TransferError("File too large")
+        if self.reserved + size > self.max_bytes:
+            raise TransferError("Transfer storage is full")
+        owner = user or owner
+        active = sum(1 for t in self._transfers.values() if not t.complete and t.owner == owner)
+        if active >= self.max_active:
+            raise TransferError("Too many active transfers")
+        transfer_id = secrets.token_urlsafe(16)
+        transfer = Transfer(
+            id=transfer_id,
+            name=name,
+            size=size,
+            path=self.directory / f"{FILE_PREFIX}{transfer_id}",
+            owner=owner,
+            token=secrets.token_urlsafe(16),
+            user=user,
+            room=room,
+            sha256=sha256,
+            expires=time.time() + self.ttl,
+        )
+        # Registered before the file exists, so concurrent begins see the
+        # reservation while this one waits on the disk.
+        self._transfers[transfer_id] = transfer
+        self.reserved += size
+        try:
+            await asyncio.to_thread(transfer.path.touch, 0o600)
+        except OSError:
+            self._forget(transfer)
+            raise
+        if transfer.complete:
+            await self._finish(transfer)
+        return transfer
+
+    async def _prepare(self, directory: Path) -> None:
+        async with self._prepare_lock:
+            if not self._prepared:
+                await asyncio.to_thread(_remove_leftovers, directory)
+                self._prepared = True
+
+    async def get(self, transfer_id: str) -> Transfer:
+        await self.purge()
+        transfer = self._transfers.get(transfer_id)
+        if transfer is None:
+            raise TransferError("Unknown transfer")
+        return transfer
+
+    @asynccontextmanager
+    async def slot(self, transfer: Transfer) -> AsyncIterator[None]:
+        # Clients keep up to ``window`` chunks in flight; more than that is
+        # refused instead of queueing behind the transfer lock.
+        if transfer.inflight >= self.window:
+            raise TransferError("Window full")
+        transfer.inflight += 1
+        try:
+            async with transfer.lock:
+                yield
+        finally:
+            transfer.inflight -= 1
+
+    async def write(self, transfer: Transfer, offset: int, data: bytes) -> None:
+        # Called under ``slot()``, so chunks of one transfer land in order.
+        if transfer.complete:
+            raise TransferError("Transfer already complete")
+        if offset != transfer.offset:
+            raise TransferError("Unexpected offset")
+        if not data or len(data) > self.chunk_size or offset + len(data) > transfer.size:
+            raise TransferError("Invalid chunk size")
+        if transfer.id not in self._transfers:
+            raise TransferError("Unknown transfer")
+        await asyncio.to_thread(_write_chunk, transfer.path, offset, data)
+        transfer.digest.update(data)
+        transfer.offset += len(data)
+        self._touch(transfer)
+        if transfer.complete:
+            await self._finish(transfer)
+
+    async def _finish(self, transfer: Transfer) -> None:
+        if transfer.sha256 is not None and transfer.digest.hexdigest() != transfer.sha256:
+            await self.abort(transfer)
+            raise TransferError("Checksum mismatch")
+        self.completed += 1
+
+    @asynccontextmanager
+    async def reading(self, sid: str) -> AsyncIterator[None]:
+        count = self._reading.get(sid, 0)
+        if count >= self.window:
+            raise TransferError("Window full")
+        self._reading[sid] = count + 1
+        try:
+            yield
+        finally:
+            count = self._reading.pop(sid) - 1
+            if count:
+                self._reading[sid] = count
+
+    async def read(self, transfer: Transfer, offset: int) -> bytes:
+        # Readers may follow an upload in progress, up to what is on disk.
+        if offset > transfer.offset:
+            raise TransferError("Unexpected offset")
+        length = min(self.chunk_size, transfer.offset - offset)
+        if not length:
+            return b""
+        self._touch(transfer)
+        try:
+            return await asyncio.to_thread(_read_chunk, transfer.path, offset, length)
+        except FileNotFoundError:
+            # Aborted or expired while the read was queued.
+            raise TransferError("Unknown transfer") from None
+
+    def _forget(self, transfer: Transfer) -> bool:
+        if self._transfers.pop(transfer.id, None) is None:
+            return False
+        self.reserved -= transfer.size
+        return True
+
+    async def abort(self, transfer: Transfer) -> None:
+        if self._forget(transfer):
+            await asyncio.to_thread(_remove_files, [transfer.path])
+
+    def _touch(self, transfer: Transfer) -> None:
+        transfer.expires = time.time() + self.ttl
+        self._transfers.move_to_end(transfer.id)
+
+    async def purge(self) -> None:
+        # Expired transfers leave the index at once; their files are removed
+        # together in a worker thread.
+        now = time.time()
+        transfers = self._transfers
+        expired = []
+        while transfers:
+            transfer = next(iter(transfers.values()))
+            if transfer.expires > now or transfer.inflight:
+                break
+            self._forget(transfer)
+            expired.append(transfer.path)
+        if expired:
+            self.expired += len(expired)
+            await asyncio.to_thread(_remove_files, expired)
+
+    def __contains__(self, transfer_id: str) -> bool:
+        return transfer_id in self._transfers
+
+    def count(self) -> int:
+        return len(self._transfers)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "transfers": len(self._transfers),
+            "active": sum(1 for t in self._transfers.values() if not t.complete),
+            "reserved_bytes": self.reserved,
+            "completed": self.completed,
+            "expired": self.expired,
+        }
+
+    def clear(self) -> None:
+        paths = [transfer.path for transfer in self._transfers.values()]
+        self._transfers.clear()
+        self.reserved = 0
+        self._reading.clear()
+        _remove_files(paths)
+
+
+def create_transfers(namespace: str) -> TransferStore:
+    directory = None
+    if settings.transfer_dir:
+        directory = Path(settings.transfer_dir) / (namespace.strip("/") or "default")
+    return TransferStore(
+        directory=directory,
+        chunk_size=settings.transfer_chunk_size,
+        window=settings.transfer_window,
+        max_size=settings.transfer_max_size,
+        max_bytes=settings.transfer_max_bytes,
+        max_active=settings.transfer_max_active,
+        ttl=settings.transfer_ttl,
+    )
@@ -0,0 +1,139 @@
+import pytest
+import socketio
+
+from app.auth import HMACVerifier, authenticator
+from app.connections import ADMIN_ROOM, manager
+from app.dedup import DedupCache
+from app.events import register_events
+from app.history import history
+from app.message_log import msg_logger
+from app.pipeline import Handlers
+from app.tenants import DEFAULT_NAMESPACE, TenantRegistry, tenants
+
+SECRET = "s3cret"
+
+
+class FakeSio:
+    # Records what would have been sent: emits as (event, data, to, namespace),
+    # disconnected sids, left rooms and closed rooms. Sids in ``fail`` raise.
+    def __init__(self, fail=()):
+        self.handlers = {}
+        self.emitted = []
+        self.disconnected = []
+        self.left = []
+        self.closed = []
+        self.fail = set(fail)
+
+    def on(self, event, handler, namespace="/"):
+        self.handlers[event] = handler
+
+    async def emit(self, event, data=None, to=None, namespace="/", **kwargs):
+        self.emitted.append((event, data, to, namespace))
+
+    async def disconnect(self, sid, namespace="/"):
+        if sid in self.fail:
+            raise RuntimeError("boom")
+        self.disconnected.append(sid)
+        tenants[namespace].manager.remove(sid)
+
+    async def leave_room(self, sid, room, namespace="/"):
+        if sid in self.fail:
+            raise RuntimeError("boom")
+        self.left.append((sid, room))
+
+    async def close_room(self, room, namespace="/"):
+        self.closed.append(room)
+
+
+@pytest.fixture
+def fake_sio():
+    return FakeSio()
+
+
+def make_handlers(admin=False, dedup_scope=None):
+    # Handlers on a throwaway tenant, optionally with an admin watching and a
+    # small dedup cache in ``dedup_scope``.
+    tenant = TenantRegistry().add("/test")
+    if admin:
+        tenant.manager.add("admin")
+        tenant.manager.add_room("admin", ADMIN_ROOM)
+    handlers = Handlers(FakeSio(), tenant)
+    if dedup_scope is not None:
+        handlers.dedup = DedupCache(max_size=100, ttl=60, scope=dedup_scope)
+    return handlers
+
+
+@pytest.fixture
+def auth_enabled():
+    # Token auth on, verifying tokens signed with ``SECRET``.
+    authenticator.set_verifier(HMACVerifier(SECRET))
+    yield authenticator
+    authenticator.set_verifier(None)
+
+
+@pytest.fixture
+def tenant(monkeypatch):
+    # A fresh default tenant for the test. The connection registry, log and
+    # history are module singletons that tests import directly, so those are
+    # shared and cleared instead.
+    manager.clear()
+    msg_logger.clear()
+    history.clear()
+    fresh = TenantRegistry().add(DEFAULT_NAMESPACE, manager, msg_logger, history)
+    monkeypatch.setitem(tenants._tenants, DEFAULT_NAMESPACE, fresh)
+    yield fresh
+    fresh.transfers.clear()
+    fresh.mailboxes.clear()
+    manager.clear()
+    msg_logger.clear()
+    history.clear()
+
+
+@pytest.fixture
+def server(tenant, monkeypatch):
+    # A real server with the chat handlers registered. Emits are recorded in
+    # ``emitted`` as (event, data, to, namespace), packets written by the
+    # fan-out in ``sent`` as (eio_sid, packet) and room joins made by handlers
+    # in ``entered``; sessions are not kept.
+    sio = socketio.AsyncServer(async_mode="asgi")
+    register_events(sio)
+    sio.emitted = []
+    sio.sent = []
+    sio.entered = []
+
+    async def emit(event, data=None, to=None, namespace="/", **kwargs):
+        sio.emitted.append((event, data, to, namespace))
+
+    async def send_packet(eio_sid, pkt):
+        sio.sent.append((eio_sid, pkt))
+
+    async def enter_room(sid, room, namespace="/"):
+        sio.entered.append((sid, room))
+
+    async def save_session(sid, session, namespace=None):
+        pass
+
+    async def get_session(sid, namespace=None):
+        return {}
+
+    monkeypatch.setattr(sio, "emit", emit)
+    monkeypatch.setattr(sio.eio, "send_packet", send_packet)
+    monkeypatch.setattr(sio, "enter_room", enter_room)
+    monkeypatch.setattr(sio, "save_session", save_session)
+    monkeypatch.setattr(sio, "get_session", get_session)
+    return sio
+
+
+@pytest.fixture
+def connect(server):
+    # Connects a client through the connect handler and puts it in ``rooms``
+    # on both the server and the tenant's registry.
+    async def connect(eio_sid, *rooms, auth=None, namespace="/", client_ip="10.0.0.1"):
+        sid = await server.manager.connect(eio_sid, namespace)
+        await server.handlers[namespace]["connect"](sid, {"REMOTE_ADDR": client_ip}, auth)
+        for room in rooms:
+            await server.manager.enter_room(sid, namespace, room)
+            tenants[namespace].manager.add_room(sid, room)
+        return sid
+
+    return connect
@@ -0,0 +1,152 @@
+import json
+
+import pytest
+
+from app import dashboard
+from app.admin import close_room, disconnect_many, force_leave, run_batched, select_sids
+from app.connections import manager
+from tests.conftest import FakeSio
+from tests.test_routing import request
+
+pytestmark = pytest.mark.usefixtures("tenant")
+
+
+@pytest.fixture(autouse=True)
+def no_dashboard_server():
+    yield
+    dashboard.set_socketio_server(None)
+
+
+def populate():
+    manager.add("a1", "10.0.0.1")
+    manager.add("a2", "10.0.0.1")
+    manager.add("b1", "10.0.0.2")
+    for sid in ("a2", "b1"):
+        manager.add_room(sid, "lobby")
+
+
+class TestRunBatched:
+    @pytest.mark.asyncio
+    async def test_counts_missing_and_duplicates(self):
+        populate()
+        seen = []
+
+        async def action(sid):
+            seen.append(sid)
+
+        summary = await run_batched(["a1", "a1", "gone", "b1"], action, batch_size=2)
+        assert summary == {"requested": 3, "succeeded": 2, "missing": 1, "failed": 0}
+        assert seen == ["a1", "b1"]
+
+    @pytest.mark.asyncio
+    async def test_failures_do_not_stop_batch(self):
+        populate()
+        summary = await disconnect_many(FakeSio(fail={"a1"}), ["a1", "a2", "b1"])
+        assert summary["failed"] == 1
+        assert summary["succeeded"] == 2
+
+
+class TestSelectSids:
+    def test_union_of_selectors(self):
+        populate()
+        sids = select_sids(["b1"], client_ip="10.0.0.1", room="lobby")
+        assert set(sids) == {"a1", "a2", "b1"}
+
+
+class TestAdminActions:
+    @pytest.mark.asyncio
+    async def test_disconnect_by_ip(self, fake_sio):
+        populate()
+        summary = await disconnect_many(fake_sio, select_sids(client_ip="10.0.0.1"))
+        assert summary["action"] == "disconnect"
+        assert summary["succeeded"] == 2
+        assert sorted(fake_sio.disconnected) == ["a1", "a2"]
+        assert manager.count() == 1
+
+    @pytest.mark.asyncio
+    async def test_force_leave_subset(self, fake_sio):
+        populate()
+        summary = await force_leave(fake_sio, "lobby", ["a2", "a1"])
+        assert summary["requested"] == 1
+        assert fake_sio.left == [("a2", "lobby")]
+        assert manager.sids_in_room("lobby") == ["b1"]
+        kicked = [d for e, d, *_ in fake_sio.emitted if e == "room_kicked"]
+        assert kicked == [{"room": "lobby", "sids": ["a2"]}]
+
+    @pytest.mark.asyncio
+    async def test_force_leave_announces_only_removed(self):
+        populate()
+        sio = FakeSio(fail=["b1"])
+        summary = await force_leave(sio, "lobby", ["a2", "b1", "ghost"])
+        assert summary["succeeded"] == 1 and summary["failed"] == 1
+        kicked = [d for e, d, *_ in sio.emitted if e == "room_kicked"]
+        assert kicked == [{"room": "lobby", "sids": ["a2"]}]
+
+    @pytest.mark.asyncio
+    async def test_force_leave_everyone(self, fake_sio):
+        populate()
+        summary = await force_leave(fake_sio, "lobby")
+        assert summary["succeeded"] == 2
+        assert manager.sids_in_room("lobby") == []
+
+    @pytest.mark.asyncio
+    async def test_close_room(self, fake_sio):
+        populate()
+        summary = await close_room(fake_sio, "lobby")
+        assert summary["requested"] == 2
+        assert fake_sio.closed == ["lobby"]
+        assert fake_sio.emitted[0] == ("room_closed", {"room": "lobby"}, "lobby", "/")
+        assert manager.rooms() == {}
+
+
+class TestAdminEndpoints:
+    @pytest.mark.asyncio
+    async def test_bulk_disconnect_endpoint(self, fake_sio):
+        populate()
+        dashboard.set_socketio_server(fake_sio)
+        body = json.dumps({"sids": ["b1"], "ip": "10.0.0.1"}).encode()
+        status, _, response = await request(
+            dashboard.dashboard_app, "/api/bulk/disconnect", "POST", body=body
+        )
+        assert status == 200
+        assert json.loads(response)["succeeded"] == 3
+        assert manager.count() == 0
+
+    @pytest.mark.asyncio
+    async def test_bulk_disconnect_rejects_bad_sids(self, fake_sio):
+        dashboard.set_socketio_server(fake_sio)
+        body = json.dumps({"sids": "a1"}).encode()
+        status, _, _ = await request(
+            dashboard.dashboard_app, "/api/bulk/disconnect", "POST", body=body
+        )
+        assert status == 400
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("body", [{"ip": ["10.0.0.1"]}, {"room": {}}, {"ip": ""}])
+    async def test_bulk_disconnect_rejects_bad_selectors(self, body, fake_sio):
+        populate()
+        dashboard.set_socketio_server(fake_sio)
+        status, _, response = await request(
+            dashboard.dashboard_app, "/api/bulk/disconnect", "POST", body=json.dumps(body).encode()
+        )
+        assert status == 400
+        assert "must be a non-empty string" in json.loads(response)["message"]
+        assert manager.count() == 3
+
+    @pytest.mark.asyncio
+    async def test_room_close_requires_room(self, fake_sio):
+        dashboard.set_socketio_server(fake_sio)
+        status, _, response = await request(dashboard.dashboard_app, "/api/rooms/close", "POST")
+        assert status == 400
+        assert json.loads(response)["message"] == "Missing room"
+
+    @pytest.mark.asyncio
+    async def test_room_leave_endpoint(self, fake_sio):
+        populate()
+        dashboard.set_socketio_server(fake_sio)
+        body = json.dumps({"room": "lobby"}).encode()
+        status, _, response = await request(
+            dashboard.dashboard_app, "/api/rooms/leave", "POST", body=body
+        )
+        assert status == 200
+        assert json.loads(response)["action"] == "leave"
@@ -0,0 +1,119 @@
+import gzip
+
+import pytest
+
+from app.assets import IMMUTABLE, build_asset, parse_accept_encoding, send_asset
+from app.dashboard import SOCKETIO_CLIENT_PATH, get_dashboard_assets
+from app.routing import Request
+
+BODY = b"<html>" + b"dashboard " * 200 + b"</html>"
+
+
+async def fetch(asset, headers=(), method="GET"):
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": method, "headers": list(headers)}
+    await send_asset(Request(scope, None, {}), send, asset)
+    start, body = messages
+    return start["status"], dict(start["headers"]), body["body"]
+
+
+class TestParseAcceptEncoding:
+    def test_simple_list(self):
+        assert parse_accept_encoding(b"gzip, deflate, br") == {b"gzip", b"deflate", b"br"}
+
+    def test_zero_quality_excluded(self):
+        assert parse_accept_encoding(b"br;q=0, gzip;q=0.8") == {b"gzip"}
+
+    def test_malformed_quality_ignored(self):
+        assert parse_accept_encoding(b"br;q=abc, gzip") == {b"gzip"}
+
+
+class TestBuildAsset:
+    def test_gzip_body_roundtrips(self):
+        asset = build_asset(BODY, b"text/html")
+        assert gzip.decompress(asset.bodies[b"gzip"]) == BODY
+
+    def test_gzip_is_deterministic(self):
+        assert build_asset(BODY, b"text/html").bodies == build_asset(BODY, b"text/html").bodies
+
+    def test_incompressible_body_has_no_gzip(self):
+        asset = build_asset(b"x", b"text/plain")
+        assert list(asset.bodies) == [b"identity"]
+
+    def test_etag_changes_with_body(self):
+        assert (
+            build_asset(BODY, b"text/html").digest != build_asset(BODY + b"!", b"text/html").digest
+        )
+
+
+class TestSendAsset:
+    @pytest.mark.asyncio
+    async def test_identity_without_accept_encoding(self):
+        status, headers, body = await fetch(build_asset(BODY, b"text/html"))
+        assert status == 200
+        assert body == BODY
+        assert b"content-encoding" not in headers
+        assert headers[b"content-length"] == str(len(BODY)).encode()
+        assert headers[b"vary"] == b"accept-encoding"
+
+    @pytest.mark.asyncio
+    async def test_gzip_negotiated(self):
+        asset = build_asset(BODY, b"text/html")
+        status, headers, body = await fetch(asset, [(b"accept-encoding", b"gzip")])
+        assert headers[b"content-encoding"] == b"gzip"
+        assert gzip.decompress(body) == BODY
+        assert headers[b"etag"].endswith(b'-gzip"')
+
+    @pytest.mark.asyncio
+    async def test_if_none_match_returns_304(self):
+        asset = build_asset(BODY, b"text/html")
+        _, headers, _ = await fetch(asset, [(b"accept-encoding", b"gzip")])
+        status, _, body = await fetch(
+            asset, [(b"accept-encoding", b"gzip"), (b"if-none-match", headers[b"etag"])]
+        )
+        assert status == 304
+        assert body == b""
+
+    @pytest.mark.asyncio
+    async def test_etag_of_other_encoding_does_not_match(self):
+        asset = build_asset(BODY, b"text/html")
+        _, headers, _ = await fetch(asset)
+        status, _, _ = await fetch(
+            asset, [(b"accept-encoding", b"gzip"), (b"if-none-match", headers[b"etag"])]
+        )
+        assert status == 200
+
+    @pytest.mark.asyncio
+    async def test_head_has_no_body(self):
+        status, headers, body = await fetch(build_asset(BODY, b"text/html"), method="HEAD")
+        assert status == 200
+        assert body == b""
+        assert headers[b"content-length"] == str(len(BODY)).encode()
+
+    @pytest.mark.asyncio
+    async def test_brotli_preferred_when_available(self):
+        brotli = pytest.importorskip("brotli")
+        asset = build_asset(BODY, b"text/html")
+        _, headers, body = await fetch(asset, [(b"accept-encoding", b"gzip, br")])
+        assert headers[b"content-encoding"] == b"br"
+        assert brotli.decompress(body) == BODY
+
+
+class TestDashboardAssets:
+    def test_dashboard_routes_share_asset(self):
+        assets = get_dashboard_assets()
+        assert assets["/"] is assets["/dashboard"]
+
+    def test_vendored_socketio_client(self):
+        client = get_dashboard_assets()[SOCKETIO_CLIENT_PATH]
+        assert b"Socket.IO" in client.bodies[b"identity"]
+        assert client.headers[b"identity"][3] == [b"cache-control", IMMUTABLE]
+
+    def test_html_references_vendored_client(self):
+        html = get_dashboard_assets()["/"].bodies[b"identity"]
+        assert SOCKETIO_CLIENT_PATH.encode() in html
+        assert b"cdn.socket.io" not in html
@@ -0,0 +1,183 @@
+import json
+import time
+
+import pytest
+
+from app import dashboard
+from app.auth import (
+    Authenticator,
+    AuthError,
+    HMACVerifier,
+    Identity,
+    TokenCache,
+    sign_token,
+)
+from app.connections import ADMIN_ROOM, manager
+from app.tenants import tenants
+from tests.conftest import SECRET
+from tests.test_routing import request
+
+
+def token(**claims):
+    return sign_token({"sub": "alice", **claims}, SECRET)
+
+
+class TestHMACVerifier:
+    def test_valid_token(self):
+        identity = HMACVerifier(SECRET)(token(admin=True, exp=time.time() + 60))
+        assert identity.user == "alice"
+        assert identity.admin is True
+        assert identity.expires is not None
+
+    @pytest.mark.parametrize(
+        "bad",
+        [
+            sign_token({"sub": "alice"}, "other"),
+            token(exp=time.time() - 1),
+            token(nbf=time.time() + 60),
+            sign_token({"name": "alice"}, SECRET),
+            "not-a-token",
+            "a.b.c",
+            token()[:-2],
+        ],
+    )
+    def test_rejects(self, bad):
+        with pytest.raises(AuthError):
+            HMACVerifier(SECRET)(bad)
+
+    def test_rejects_other_algorithms(self):
+        header, payload, signature = token().split(".")
+        forged = sign_token({"alg": "none"}, SECRET).split(".")[1]
+        with pytest.raises(AuthError):
+            HMACVerifier(SECRET)(f"{forged}.{payload}.{signature}")
+
+    def test_leeway(self):
+        assert HMACVerifier(SECRET, leeway=30)(token(exp=time.time() - 1)).user == "alice"
+
+
+class TestTokenCache:
+    def test_lru_eviction(self):
+        cache = TokenCache(max_size=2)
+        cache.put("a", Identity("a"))
+        cache.put("b", Identity("b"))
+        cache.get("a")
+        cache.put("c", Identity("c"))
+        assert cache.get("b") is None
+        assert cache.get("a") == Identity("a")
+        assert len(cache) == 2
+
+    def test_entries_expire_with_the_token(self):
+        cache = TokenCache()
+        cache.put("a", Identity("a", expires=time.time() - 1))
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_overflow_drops_expired_first(self):
+        cache = TokenCache(max_size=2)
+        cache.put("live", Identity("live"))
+        cache.put("dead", Identity("dead", expires=time.time() - 1))
+        cache.get("live")
+        cache.put("new", Identity("new"))
+        assert cache.get("live") is not None
+        assert len(cache) == 2
+
+    def test_ttl_caps_lifetime(self):
+        cache = TokenCache(ttl=0)
+        cache.put("a", Identity("a"))
+        assert cache.get("a") is None
+
+
+class TestAuthenticator:
+    def test_cache_skips_verification(self):
+        calls = []
+
+        def verifier(value):
+            calls.append(value)
+            return Identity("alice")
+
+        auth = Authenticator(verifier)
+        first = auth.authenticate("tok")
+        assert auth.authenticate("tok") is first
+        assert calls == ["tok"]
+        assert auth.to_dict()["hits"] == 1
+        assert auth.to_dict()["misses"] == 1
+
+    def test_failures_are_not_cached(self):
+        auth = Authenticator(HMACVerifier(SECRET))
+        for _ in range(2):
+            with pytest.raises(AuthError):
+                auth.authenticate("bad.token.value")
+        assert auth.failures == 2
+        assert len(auth.cache) == 0
+
+    def test_missing_token(self):
+        auth = Authenticator(HMACVerifier(SECRET))
+        with pytest.raises(AuthError):
+            auth.authenticate(None)
+        with pytest.raises(AuthError):
+            auth.authenticate_header(b"Basic abc")
+        assert auth.authenticate_header(b"Bearer " + token().encode()).user == "alice"
+
+    def test_disabled(self):
+        assert not Authenticator().enabled
+
+
+class TestConnectAuth:
+    @pytest.mark.asyncio
+    async def test_open_without_verifier(self, connect):
+        sid = await connect("eio-1")
+        assert manager.get(sid).identity is None
+
+    @pytest.mark.asyncio
+    async def test_refuses_missing_or_bad_token(self, auth_enabled, connect):
+        with pytest.raises(ConnectionRefusedError):
+            await connect("eio-1")
+        with pytest.raises(ConnectionRefusedError):
+            await connect("eio-2", auth={"token": "bad"})
+        assert tenants["/"].stats.unauthorized >= 2
+        assert manager.count() == 0
+
+    @pytest.mark.asyncio
+    async def test_identity_is_shared_and_used_for_presence(self, auth_enabled, connect):
+        value = token()
+        first = await connect("eio-1", auth={"token": value, "user": "mallory"})
+        second = await connect("eio-2", auth={"token": value})
+        assert manager.get(first).identity is manager.get(second).identity
+        assert manager.get(first).to_dict()["user"] == "alice"
+        assert tenants["/"].presence.user_of(first) == "alice"
+
+    @pytest.mark.asyncio
+    async def test_admin_room_needs_admin_claim(self, server, auth_enabled, connect):
+        handlers = server.handlers["/"]
+        user = await connect("eio-1", auth={"token": token()})
+        assert (await handlers["join_room"](user, ADMIN_ROOM))["status"] == "error"
+        assert (await handlers["admin:sync"](user, {}))["status"] == "error"
+        admin = await connect("eio-2", auth={"token": token(admin=True)})
+        assert (await handlers["join_room"](admin, ADMIN_ROOM))["status"] == "joined"
+        assert "version" in await handlers["admin:sync"](admin, {})
+
+
+class TestDashboardAuth:
+    @pytest.mark.asyncio
+    async def test_api_open_without_verifier(self):
+        status, _, _ = await request(dashboard.dashboard_app, "/api/namespaces")
+        assert status == 200
+
+    @pytest.mark.asyncio
+    async def test_api_requires_admin_token(self, auth_enabled):
+        status, headers, _ = await request(dashboard.dashboard_app, "/api/namespaces")
+        assert status == 401
+        assert headers[b"www-authenticate"] == b"Bearer"
+        user = [(b"authorization", b"Bearer " + token().encode())]
+        status, headers, _ = await request(dashboard.dashboard_app, "/api/namespaces", headers=user)
+        assert status == 403
+        assert b"www-authenticate" not in headers
+        admin = [(b"authorization", b"Bearer " + token(admin=True).encode())]
+        status, _, body = await request(dashboard.dashboard_app, "/api/namespaces", headers=admin)
+        assert status == 200
+        assert json.loads(body)["auth"]["enabled"] is True
+
+    @pytest.mark.asyncio
+    async def test_probes_stay_public(self, auth_enabled):
+        status, _, _ = await request(dashboard.dashboard_app, "/healthz")
+        assert status == 200
@@ -0,0 +1,170 @@
+import asyncio
+import json
+
+import pytest
+
+from app import dashboard
+from app.broadcast import BroadcastError, parse_messages, publish
+from app.fanout import FanoutScheduler, encode_event, resolve_recipients, send_encoded
+from app.message_log import msg_logger
+from tests.test_routing import request
+
+
+class TestFanout:
+    def test_encode_event_once(self, server):
+        encoded = encode_event(server, "news", {"a": 1})
+        assert len(encoded.packets) == 1
+        assert encoded.packets[0].encode() == '42["news",{"a":1}]'
+
+    @pytest.mark.asyncio
+    async def test_resolve_all_room_and_sids(self, server, connect):
+        sids = [await connect("e1", "r"), await connect("e2"), await connect("e3")]
+        assert sorted(resolve_recipients(server)) == ["e1", "e2", "e3"]
+        assert resolve_recipients(server, room="r") == ["e1"]
+        assert resolve_recipients(server, sids=[sids[1], "missing", sids[1]]) == ["e2"]
+
+    @pytest.mark.asyncio
+    async def test_send_encoded_in_slices_and_order(self, server, connect):
+        for eio_sid in ("e1", "e2", "e3"):
+            await connect(eio_sid)
+        events = [encode_event(server, "a", 1), encode_event(server, "b", 2)]
+        slices = await send_encoded(server, events, ["e1", "e2", "e3"], slice_size=2)
+        assert slices == 2
+        assert len(server.sent) == 6
+        e1 = [pkt.encode() for eio_sid, pkt in server.sent if eio_sid == "e1"]
+        assert e1 == ['42["a",1]', '42["b",2]']
+
+
+class TestFanoutScheduler:
+    @pytest.mark.asyncio
+    async def test_round_robin_interleaves_lanes(self, server):
+        scheduler = FanoutScheduler(slice_size=2)
+        a = [encode_event(server, "a", 1)]
+        b = [encode_event(server, "b", 2)]
+        slices = await asyncio.gather(
+            scheduler.send(server, a, ["a1", "a2", "a3", "a4"], lane="ra"),
+            scheduler.send(server, b, ["b1", "b2", "b3", "b4"], lane="rb"),
+        )
+        assert slices == [2, 2]
+        assert [eio_sid for eio_sid, _ in server.sent] == [
+            "a1",
+            "a2",
+            "b1",
+            "b2",
+            "a3",
+            "a4",
+            "b3",
+            "b4",
+        ]
+        assert scheduler.to_dict()["queued"] == 0
+
+    @pytest.mark.asyncio
+    async def test_fifo_finishes_each_lane_first(self, server):
+        scheduler = FanoutScheduler(slice_size=2, fairness="fifo")
+        events = [encode_event(server, "a", 1)]
+        await asyncio.gather(
+            scheduler.send(server, events, ["a1", "a2", "a3"], lane="ra"),
+            scheduler.send(server, events, ["b1", "b2", "b3"], lane="rb"),
+        )
+        assert [eio_sid for eio_sid, _ in server.sent] == ["a1", "a2", "a3", "b1", "b2", "b3"]
+
+    @pytest.mark.asyncio
+    async def test_single_slice_waits_behind_its_lane_only(self, server):
+        scheduler = FanoutScheduler(slice_size=2)
+        events = [encode_event(server, "a", 1)]
+        bulk = asyncio.create_task(scheduler.send(server, events, ["a1", "a2", "a3"], lane="r"))
+        await asyncio.sleep(0)
+        assert await scheduler.send(server, events, ["x1"], lane="other") == 1
+        await scheduler.send(server, events, ["y1"], lane="r")
+        await bulk
+        order = [eio_sid for eio_sid, _ in server.sent]
+        # Another lane goes straight out; the busy lane keeps its order.
+        assert order.index("x1") < order.index("a3") < order.index("y1")
+
+    @pytest.mark.asyncio
+    async def test_control_traffic_goes_first(self, server):
+        scheduler = FanoutScheduler(slice_size=1, control_wait=5)
+        events = [encode_event(server, "a", 1)]
+        with scheduler.control():
+            bulk = asyncio.create_task(scheduler.send(server, events, ["a1", "a2", "a3"]))
+            for _ in range(20):
+                await asyncio.sleep(0)
+            # One slice went out, the rest waits for the control handler.
+            assert len(server.sent) == 1
+        assert await bulk == 3
+        assert scheduler.deferred == 1
+
+    @pytest.mark.asyncio
+    async def test_control_wait_is_bounded(self, server):
+        scheduler = FanoutScheduler(slice_size=1, control_wait=0)
+        events = [encode_event(server, "a", 1)]
+        with scheduler.control():
+            assert await scheduler.send(server, events, ["a1", "a2"]) == 2
+
+    def test_unknown_fairness(self):
+        with pytest.raises(ValueError):
+            FanoutScheduler(fairness="random")
+
+
+class TestParseMessages:
+    def test_valid(self):
+        assert parse_messages([{"event": "news", "data": 1}]) == [("news", 1)]
+
+    @pytest.mark.parametrize(
+        "messages",
+        [None, [], ["x"], [{"data": 1}], [{"event": "disconnect"}], [{"event": "admin:x"}]],
+    )
+    def test_invalid(self, messages):
+        with pytest.raises(BroadcastError):
+            parse_messages(messages)
+
+
+class TestPublish:
+    @pytest.mark.asyncio
+    async def test_publish_to_room_logs_once_per_message(self, server, connect):
+        msg_logger.clear()
+        await connect("e1")
+        await connect("e2", "r")
+        summary = await publish(
+            server, [{"event": "a", "data": 1}, {"event": "b", "data": 2}], room="r"
+        )
+        assert summary == {"status": "ok", "messages": 2, "recipients": 1, "slices": 1}
+        assert [eio_sid for eio_sid, _ in server.sent] == ["e2", "e2"]
+        assert [entry.event for entry in msg_logger.all()] == ["admin_broadcast"] * 2
+        msg_logger.clear()
+
+    @pytest.mark.asyncio
+    async def test_broadcast_endpoint(self, server, connect):
+        await connect("e1")
+        await connect("e2")
+        dashboard.set_socketio_server(server)
+        try:
+            body = json.dumps({"messages": [{"event": "news", "data": "hi"}]}).encode()
+            status, _, response = await request(
+                dashboard.dashboard_app, "/api/broadcast", "POST", body=body
+            )
+        finally:
+            dashboard.set_socketio_server(None)
+            msg_logger.clear()
+        assert status == 200
+        assert json.loads(response)["recipients"] == 2
+
+    @pytest.mark.asyncio
+    async def test_broadcast_endpoint_validation(self, server):
+        dashboard.set_socketio_server(server)
+        try:
+            body = json.dumps({"messages": []}).encode()
+            status, _, _ = await request(
+                dashboard.dashboard_app, "/api/broadcast", "POST", body=body
+            )
+            messages = [{"event": "news"}]
+            body = json.dumps({"messages": messages, "room": "r", "sids": ["s1"]}).encode()
+            both, _, response = await request(
+                dashboard.dashboard_app, "/api/broadcast", "POST", body=body
+            )
+        finally:
+            dashboard.set_socketio_server(None)
+        assert status == 400
+        assert both == 400
+        assert json.loads(response)["message"] == "Send to a room or to sids, not both"
+        assert server.sent == []
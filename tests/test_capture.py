@@ -0,0 +1,201 @@
+import pytest
+import socketio
+
+from app import replay as replay_module
+from app import schemas
+from app.capture import CONNECT, DISCONNECT, MAGIC, Redactor, TrafficCapture, capture, read_capture
+from app.config import settings
+from app.pipeline import EventSpec, Handlers, capture_stage, compose
+from app.replay import ReplayReport, percentile, replay
+from app.tenants import TenantRegistry
+
+
+async def handler(sid, data=None):
+    return {"status": "ok"}
+
+
+class TestRedactor:
+    def test_keeps_shape_and_equality(self):
+        redactor = Redactor(b"k" * 16)
+        data = {"room": "lobby", "message": "hi lobby, 42!", "n": 3, "ok": True, "raw": b"abc"}
+        redacted = redactor.redact(data)
+        assert set(redacted) == set(data)
+        assert len(redacted["room"]) == 5 and redacted["room"] != "lobby"
+        # The same word maps to the same pseudonym; separators stay put.
+        assert len(redacted["message"]) == len(data["message"])
+        assert redacted["message"].split(" ")[1] == redacted["room"] + ","
+        assert redacted["message"].endswith("!")
+        assert (redacted["n"], redacted["ok"], redacted["raw"]) == (3, True, b"\x00\x00\x00")
+
+    def test_long_words_and_keys(self):
+        first, second = Redactor(), Redactor()
+        word = "x" * 100
+        assert len(first.redact(word)) == 100
+        # Pseudonyms are keyed per process, so captures can't be joined up.
+        assert first.redact("lobby") != second.redact("lobby")
+
+
+class TestTrafficCapture:
+    @pytest.mark.asyncio
+    async def test_round_trip(self, tmp_path):
+        path = tmp_path / "traffic.cap"
+        recorder = TrafficCapture(path, payloads=True)
+        recorder.record("/", "sid-1", "message", "ignored before start")
+        recorder.start()
+        recorder.record("/", "sid-1", CONNECT)
+        recorder.record("/", "sid-1", "room_message", {"room": "lobby", "message": "hi"})
+        await recorder.flush()
+        recorder.record("/chat", "sid-1", DISCONNECT)
+        await recorder.stop()
+        header, records = read_capture(path)
+        assert header["payloads"] is True and header["version"] == 1
+        records = list(records)
+        assert [record[3] for record in records] == [CONNECT, "room_message", DISCONNECT]
+        offset, namespace, sid, event, size, payload = records[1]
+        assert (namespace, sid, payload) == ("/", "sid-1", {"room": "lobby", "message": "hi"})
+        assert size > 0 and offset >= 0
+        assert recorder.to_dict()["records"] == 3
+
+    @pytest.mark.asyncio
+    async def test_torn_tail_is_dropped(self, tmp_path):
+        path = tmp_path / "traffic.cap"
+        recorder = TrafficCapture(path)
+        recorder.start()
+        recorder.record("/", "sid-1", "ping")
+        await recorder.flush()
+        recorder.record("/", "sid-1", "ping")
+        await recorder.stop()
+        path.write_bytes(path.read_bytes()[:-3])
+        _, records = read_capture(path)
+        assert len(list(records)) == 1
+
+    def test_not_a_capture(self, tmp_path):
+        path = tmp_path / "other.bin"
+        path.write_bytes(b"nope")
+        with pytest.raises(ValueError):
+            read_capture(path)
+        path.write_bytes(MAGIC)
+        with pytest.raises(ValueError):
+            read_capture(path)
+
+    @pytest.mark.asyncio
+    async def test_size_cap(self, tmp_path):
+        path = tmp_path / "traffic.cap"
+        recorder = TrafficCapture(path, max_bytes=200)
+        recorder.start()
+        for i in range(100):
+            recorder.record("/", f"sid-{i}", "message", f"payload {i} " * 10)
+        await recorder.stop()
+        assert recorder.full and recorder.dropped == 100
+        assert path.stat().st_size <= 200
+        recorder.record("/", "sid-1", "message", "after")
+        assert recorder.records == 100
+
+    def test_sampling_keeps_whole_sessions(self):
+        recorder = TrafficCapture(sample_rate=0.5)
+        sids = [f"sid-{i}" for i in range(1000)]
+        kept = [sid for sid in sids if recorder.sampled(sid)]
+        assert 350 < len(kept) < 650
+        assert all(recorder.sampled(sid) for sid in kept)
+        assert not any(TrafficCapture(sample_rate=0).sampled(sid) for sid in sids)
+        assert all(TrafficCapture(sample_rate=1).sampled(sid) for sid in sids)
+
+
+class TestCaptureStage:
+    @pytest.mark.asyncio
+    async def test_records_accepted_events(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(capture, "path", tmp_path / "traffic.cap")
+        monkeypatch.setattr(capture, "_pending", [])
+        monkeypatch.setattr(capture, "payloads", True)
+        capture.start()
+        try:
+            handlers = Handlers(None, TenantRegistry().add("/test"))
+            chain = compose(handlers, EventSpec("ping", log=False, mirror=False), handler)
+            await chain("sid-1", {"n": 1})
+            spec = EventSpec("room_message", validate=schemas.room_message, mirror=False)
+            chain = compose(handlers, spec, handler)
+            await chain("sid-1", {"room": "r", "message": "hi"})
+            assert [record[1:4] + record[5:] for record in capture._pending] == [
+                ("/test", "sid-1", "ping", None),
+                ("/test", "sid-1", "room_message", {"room": "r", "message": "hi"}),
+            ]
+        finally:
+            await capture.stop()
+
+    @pytest.mark.asyncio
+    async def test_rejected_events_are_not_recorded(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(capture, "path", tmp_path / "traffic.cap")
+        monkeypatch.setattr(capture, "_pending", [])
+        monkeypatch.setattr(settings, "rate_limit_events", 1)
+        monkeypatch.setattr(settings, "rate_limit_burst", 1)
+        capture.start()
+        try:
+            handlers = Handlers(None, TenantRegistry().add("/test"))
+            spec = EventSpec("room_message", validate=schemas.room_message, mirror=False)
+            chain = compose(handlers, spec, handler)
+            assert (await chain("sid-1", {"room": "r"}))["status"] == "error"
+            assert (await chain("sid-1", {"room": "r", "message": "hi"}))["status"] == "error"
+            assert capture._pending == []
+        finally:
+            await capture.stop()
+
+    def test_disabled_by_default(self):
+        handlers = Handlers(None, TenantRegistry().add("/test"))
+        spec = EventSpec("ping", log=False, mirror=False)
+        assert not capture.enabled
+        assert compose(handlers, spec, handler, stages=(capture_stage,)) is handler
+
+
+class FakeSession:
+    opened = []
+
+    def __init__(self, url, namespace, auth):
+        self.namespace = namespace
+        self.closed = False
+        self.inflight = set()
+        self.client = self
+        FakeSession.opened.append(self)
+
+    async def ready(self):
+        return True
+
+    async def close(self):
+        self.closed = True
+
+    async def call(self, event, data, namespace=None, timeout=None):
+        if event == "fail":
+            raise socketio.exceptions.TimeoutError()
+        return {"status": "error"} if data == "bad" else {"status": "ok"}
+
+
+class TestReplay:
+    def test_percentile(self):
+        ordered = [float(i) for i in range(1, 101)]
+        assert percentile(ordered, 0.5) == 51.0
+        assert percentile(ordered, 0.99) == 100.0
+        assert percentile([], 0.5) == 0.0
+
+    @pytest.mark.asyncio
+    async def test_drives_sessions_with_timing(self, monkeypatch):
+        FakeSession.opened = []
+        monkeypatch.setattr(replay_module, "Session", FakeSession)
+        records = [
+            (5.0, "/", "a", CONNECT, 0, None),
+            (5.0, "/", "a", "message", 2, "hi"),
+            (5.1, "/chat", "b", "message", 3, "bad"),
+            (5.2, "/", "a", "fail", 0, None),
+            (5.2, "/", "a", DISCONNECT, 0, None),
+        ]
+        report = await replay(records, "http://test", speed=4)
+        summary = report.to_dict()
+        assert summary["sent"] == 3 and summary["acked"] == 2
+        assert summary["rejected"] == 1 and summary["errors"] == 1
+        assert summary["connections"] == 2
+        assert [session.namespace for session in FakeSession.opened] == ["/", "/chat"]
+        assert all(session.closed for session in FakeSession.opened)
+        # 0.2 s of capture at 4x takes about 50 ms, from the first record on.
+        assert 0.04 <= report.duration < 0.5
+        assert summary["events"]["message"]["count"] == 2
+
+    def test_empty_report(self):
+        assert ReplayReport(1.0).to_dict()["throughput"] == 0.0
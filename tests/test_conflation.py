@@ -0,0 +1,100 @@
+import asyncio
+import json
+
+import pytest
+
+from app.conflation import Conflator
+from app.tenants import tenants
+
+
+class TestConflator:
+    def test_latest_value_wins(self):
+        conflator = Conflator()
+        for i in range(5):
+            assert conflator.put("game", "pos", {"message": i})
+        conflator.put("game", "score", {"message": 7})
+        conflator.put("lobby", "pos", {"message": "x"})
+        assert conflator.take() == {
+            "game": [{"message": 4}, {"message": 7}],
+            "lobby": [{"message": "x"}],
+        }
+        assert conflator.take() == {}
+        stats = conflator.to_dict()
+        assert (stats["received"], stats["coalesced"], stats["pending"]) == (7, 4, 0)
+
+    def test_key_cap(self):
+        conflator = Conflator(max_keys=2)
+        assert conflator.put("game", "a", {})
+        assert conflator.put("game", "b", {})
+        assert not conflator.put("other", "c", {})
+        # Keys already pending still take new values.
+        assert conflator.put("game", "a", {"n": 1})
+        assert conflator.take() == {"game": [{"n": 1}, {}]}
+
+    def test_room_prefixes(self):
+        conflator = Conflator(rooms=("game:", "ticker"))
+        assert conflator.conflated("game:42")
+        assert conflator.conflated("tickers")
+        assert not conflator.conflated("lobby")
+        assert not Conflator().conflated("game:42")
+
+
+def updates(sio):
+    batches = {}
+    for eio_sid, pkt in sio.sent:
+        event, payload = json.loads(pkt.data[1:])
+        if event == "room_updates":
+            batches.setdefault(eio_sid, []).append(payload)
+    return batches
+
+
+class TestConflatedRoomMessages:
+    @pytest.mark.asyncio
+    async def test_one_batch_per_interval(self, server, monkeypatch, connect):
+        monkeypatch.setattr(tenants["/"].conflator, "interval", 0.01)
+        handler = server.handlers["/"]["room_message"]
+        alice = await connect("eio-a", "game")
+        bob = await connect("eio-b", "game")
+        await connect("eio-c", "game")
+        for i in range(100):
+            ack = await handler(alice, {"room": "game", "message": {"x": i}, "conflate": "pos"})
+            assert ack == {"status": "conflated", "room": "game"}
+        await handler(bob, {"room": "game", "message": 3, "conflate": "score"})
+        await asyncio.sleep(0.05)
+        batches = updates(server)
+        assert sorted(batches) == ["eio-a", "eio-b", "eio-c"]
+        for received in batches.values():
+            (batch,) = received
+            assert batch["room"] == "game"
+            assert [(u["key"], u["message"]) for u in batch["updates"]] == [
+                ("pos", {"x": 99}),
+                ("score", 3),
+            ]
+        # Conflated updates are state, not chat: they don't fill the room's history.
+        assert tenants["/"].history.count("game") == 0
+
+    @pytest.mark.asyncio
+    async def test_conflated_rooms_key_by_sender(self, server, monkeypatch, connect):
+        conflator = tenants["/"].conflator
+        monkeypatch.setattr(conflator, "interval", 0.01)
+        monkeypatch.setattr(conflator, "rooms", ("game:",))
+        handler = server.handlers["/"]["room_message"]
+        alice = await connect("eio-a", "game:1")
+        await connect("eio-b", "game:1")
+        await handler(alice, {"room": "game:1", "message": 1})
+        await handler(alice, {"room": "game:1", "message": 2})
+        await asyncio.sleep(0.05)
+        (batch,) = updates(server)["eio-b"]
+        assert batch["updates"] == [{"from": alice, "key": alice, "message": 2}]
+
+    @pytest.mark.asyncio
+    async def test_unkeyed_messages_go_out_directly(self, server, connect):
+        handler = server.handlers["/"]["room_message"]
+        alice = await connect("eio-a", "lobby")
+        await connect("eio-b", "lobby")
+        ack = await handler(alice, {"room": "lobby", "message": "hi"})
+        assert ack == {"status": "sent", "room": "lobby"}
+        assert updates(server) == {}
+        assert [event for event, *_ in server.emitted if event == "room_message"] == [
+            "room_message"
+        ]
@@ -1,5 +1,6 @@
 import pytest
 
+from app.auth import Identity
 from app.connections import Connection, ConnectionManager
 
 
@@ -100,3 +101,126 @@ class TestConnectionManager:
         assert manager.count() == 2
         manager.remove("sid-1")
         assert manager.count() == 1
+
+
+class TestConnectionJournal:
+    def test_version_increments_on_changes(self):
+        manager = ConnectionManager()
+        assert manager.version == 0
+        manager.add("sid-1")
+        manager.add_room("sid-1", "room-1")
+        manager.remove_room("sid-1", "room-1")
+        manager.remove("sid-1")
+        assert manager.version == 4
+
+    def test_noop_changes_are_not_recorded(self):
+        manager = ConnectionManager()
+        manager.add("sid-1")
+        manager.add_room("sid-1", "room-1")
+        manager.add_room("sid-1", "room-1")
+        manager.remove_room("sid-1", "other")
+        manager.remove("nonexistent")
+        assert manager.version == 2
+
+    def test_changes_since(self):
+        manager = ConnectionManager()
+        manager.add("sid-1", "10.0.0.1")
+        manager.add_room("sid-1", "room-1")
+        manager.remove("sid-1")
+        changes = manager.changes_since(1)
+        assert [c["op"] for c in changes] == ["join", "remove"]
+        assert [c["v"] for c in changes] == [2, 3]
+        assert changes[0]["room"] == "room-1"
+
+    def test_changes_since_current_version_is_empty(self):
+        manager = ConnectionManager()
+        manager.add("sid-1")
+        assert manager.changes_since(manager.version) == []
+
+    def test_changes_since_truncated_journal(self):
+        manager = ConnectionManager(journal_size=2)
+        manager.add("sid-1")
+        manager.add("sid-2")
+        manager.add("sid-3")
+        assert manager.changes_since(0) is None
+        assert [c["sid"] for c in manager.changes_since(1)] == ["sid-2", "sid-3"]
+
+    def test_changes_since_future_version(self):
+        manager = ConnectionManager()
+        assert manager.changes_since(5) is None
+
+    def test_sync_snapshot_and_delta(self):
+        manager = ConnectionManager()
+        manager.add("sid-1")
+        snapshot = manager.sync()
+        assert snapshot["version"] == 1
+        assert [c["sid"] for c in snapshot["connections"]] == ["sid-1"]
+        manager.add("sid-2")
+        delta = manager.sync(since=1)
+        assert delta["version"] == 2
+        assert "connections" not in delta
+        assert delta["changes"][0]["sid"] == "sid-2"
+
+
+class TestConnectionIndexes:
+    def test_sids_by_ip(self):
+        manager = ConnectionManager()
+        manager.add("sid-1", "10.0.0.1")
+        manager.add("sid-2", "10.0.0.1")
+        manager.add("sid-3", "10.0.0.2")
+        assert sorted(manager.sids_by_ip("10.0.0.1")) == ["sid-1", "sid-2"]
+        manager.remove("sid-1")
+        assert manager.sids_by_ip("10.0.0.1") == ["sid-2"]
+        assert manager.sids_by_ip("10.0.0.9") == []
+
+    def test_sids_in_room(self):
+        manager = ConnectionManager()
+        manager.add("sid-1")
+        manager.add("sid-2")
+        manager.add_room("sid-1", "general")
+        manager.add_room("sid-2", "general")
+        manager.remove_room("sid-2", "general")
+        assert manager.sids_in_room("general") == ["sid-1"]
+        manager.remove("sid-1")
+        assert manager.sids_in_room("general") == []
+        assert manager.rooms() == {}
+
+    def test_rooms_counts(self):
+        manager = ConnectionManager()
+        manager.add("sid-1")
+        manager.add("sid-2")
+        manager.add_room("sid-1", "a")
+        manager.add_room("sid-2", "a")
+        manager.add_room("sid-2", "b")
+        assert manager.rooms() == {"a": 2, "b": 1}
+
+    def test_sids_for_user(self):
+        manager = ConnectionManager()
+        alice = Identity("alice")
+        manager.add("sid-1", identity=alice)
+        manager.add("sid-2", identity=alice)
+        manager.add("sid-3")
+        assert sorted(manager.sids_for_user("alice")) == ["sid-1", "sid-2"]
+        manager.remove("sid-1")
+        assert manager.sids_for_user("alice") == ["sid-2"]
+        manager.remove("sid-2")
+        assert manager.sids_for_user("alice") == []
+        assert manager._by_user == {}
+
+    def test_re_add_replaces_index_entries(self):
+        manager = ConnectionManager()
+        manager.add("sid-1", "10.0.0.1")
+        manager.add_room("sid-1", "general")
+        manager.add("sid-1", "10.0.0.2")
+        assert manager.sids_by_ip("10.0.0.1") == []
+        assert manager.sids_in_room("general") == []
+        assert manager.count() == 1
+
+    def test_clear(self):
+        manager = ConnectionManager()
+        manager.add("sid-1", "10.0.0.1")
+        manager.add_room("sid-1", "general")
+        manager.clear()
+        assert manager.count() == 0
+        assert manager.sids_by_ip("10.0.0.1") == []
+        assert manager.rooms() == {}
@@ -3,7 +3,12 @@ import json
 import pytest
 
 from app.connections import manager
-from app.dashboard import get_connections_json, get_dashboard_html, get_logs_json
+from app.dashboard import (
+    get_connections_json,
+    get_dashboard_html,
+    get_logs_json,
+    get_traces_json,
+)
 from app.message_log import msg_logger
 
 
@@ -70,6 +75,24 @@ class TestGetConnectionsJson:
         assert set(conn["rooms"]) == {"general", "chat"}
         manager._connections.clear()
 
+    def test_includes_version(self):
+        manager._connections.clear()
+        manager.add("sid-1")
+        data = json.loads(get_connections_json())
+        assert data["version"] == manager.version
+        manager._connections.clear()
+
+    def test_since_returns_changes(self):
+        manager._connections.clear()
+        since = manager.version
+        manager.add("sid-1")
+        manager.add_room("sid-1", "general")
+        data = json.loads(get_connections_json(since))
+        assert "connections" not in data
+        assert [c["op"] for c in data["changes"]] == ["add", "join"]
+        assert data["count"] == 1
+        manager._connections.clear()
+
 
 class TestGetDashboardHtmlNewFeatures:
     def test_includes_disconnect_button(self):
@@ -96,6 +119,16 @@ class TestGetDashboardHtmlNewFeatures:
         html = get_dashboard_html()
         assert "/api/logs" in html
 
+    def test_includes_delta_sync(self):
+        html = get_dashboard_html()
+        assert "admin:delta" in html
+        assert "admin:sync" in html
+
+    def test_includes_latency_tab(self):
+        html = get_dashboard_html()
+        assert "Latency" in html
+        assert "/api/traces" in html
+
     def test_includes_disconnect_api_endpoint(self):
         html = get_dashboard_html()
         assert "/api/disconnect/" in html
@@ -141,3 +174,10 @@ class TestGetLogsJson:
         log = data["logs"][0]
         assert log["room"] == "chat"
         msg_logger.clear()
+
+
+class TestGetTracesJson:
+    def test_traces_shape(self):
+        data = json.loads(get_traces_json())
+        assert "sample_rate" in data
+        assert isinstance(data["traces"], list)
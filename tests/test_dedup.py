@@ -0,0 +1,217 @@
+import asyncio
+
+import pytest
+
+from app.auth import Identity
+from app.config import settings
+from app.dedup import DedupCache
+from app.pipeline import EventError, EventSpec, compose
+from app.tenants import tenants
+from tests.conftest import make_handlers
+
+
+def message_id(data):
+    return data.get("message_id")
+
+
+def require_room(data):
+    if "room" not in data:
+        raise EventError("Missing room")
+    return data
+
+
+class Counter:
+    def __init__(self):
+        self.calls = 0
+        self.release = None
+
+    async def __call__(self, sid, data=None):
+        self.calls += 1
+        if self.release is not None:
+            await self.release.wait()
+        return {"status": "sent", "n": self.calls}
+
+
+SPEC = EventSpec("room_message", validate=require_room, room=lambda d: d["room"], dedup=message_id)
+
+
+class TestDedupCache:
+    @pytest.mark.asyncio
+    async def test_claim_returns_the_same_ack(self):
+        cache = DedupCache()
+        ack, first = cache.claim("k")
+        again, repeated = cache.claim("k")
+        assert first and not repeated
+        assert again is ack
+        assert cache.hits == 1
+
+    @pytest.mark.asyncio
+    async def test_entries_expire_and_are_bounded(self):
+        cache = DedupCache(ttl=0)
+        cache.claim("k")
+        assert cache.claim("k")[1]
+        cache = DedupCache(max_size=2)
+        for key in "abc":
+            cache.claim(key)
+        assert len(cache) == 2
+        assert cache.claim("a")[1]
+
+    @pytest.mark.asyncio
+    async def test_forget_cancels_waiters(self):
+        cache = DedupCache()
+        ack, _ = cache.claim("k")
+        cache.forget("k", ack)
+        assert ack.cancelled()
+        assert cache.claim("k")[1]
+
+    def test_unknown_scope(self):
+        with pytest.raises(ValueError):
+            DedupCache(scope="tenant")
+
+
+class TestCompose:
+    @pytest.mark.asyncio
+    async def test_retry_returns_original_ack_without_logging(self):
+        handlers = make_handlers(dedup_scope="user")
+        handler = Counter()
+        chain = compose(handlers, SPEC, handler)
+        data = {"room": "r", "message_id": "m1"}
+        first = await chain("sid-1", data)
+        assert await chain("sid-1", data) == first
+        assert handler.calls == 1
+        assert handlers.tenant.logs.count() == 1
+        assert handlers.tenant.stats.duplicates == 1
+        # Without an id every send goes through.
+        await chain("sid-1", {"room": "r"})
+        await chain("sid-1", {"room": "r"})
+        assert handler.calls == 3
+
+    @pytest.mark.asyncio
+    async def test_retry_in_flight_waits_for_the_original(self):
+        handlers = make_handlers(dedup_scope="user")
+        handler = Counter()
+        handler.release = asyncio.Event()
+        chain = compose(handlers, SPEC, handler)
+        data = {"room": "r", "message_id": "m1"}
+        original = asyncio.create_task(chain("sid-1", data))
+        retry = asyncio.create_task(chain("sid-1", data))
+        await asyncio.sleep(0)
+        handler.release.set()
+        assert await original == await retry == {"status": "sent", "n": 1}
+
+    @pytest.mark.asyncio
+    async def test_failed_original_lets_the_retry_through(self):
+        handlers = make_handlers(dedup_scope="user")
+        calls = []
+
+        async def flaky(sid, data=None):
+            calls.append(sid)
+            if len(calls) == 1:
+                raise RuntimeError("boom")
+            return {"status": "sent"}
+
+        chain = compose(handlers, SPEC, flaky)
+        data = {"room": "r", "message_id": "m1"}
+        with pytest.raises(RuntimeError):
+            await chain("sid-1", data)
+        assert await chain("sid-1", data) == {"status": "sent"}
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_invalid_payloads_are_not_remembered(self):
+        handlers = make_handlers(dedup_scope="user")
+        chain = compose(handlers, SPEC, Counter())
+        assert (await chain("sid-1", {"message_id": "m1"}))["status"] == "error"
+        assert len(handlers.dedup) == 0
+
+    @pytest.mark.asyncio
+    async def test_scopes(self):
+        handlers = make_handlers(dedup_scope="user")
+        handlers.tenant.manager.add("sid-1", identity=Identity("alice"))
+        handlers.tenant.manager.add("sid-2", identity=Identity("alice"))
+        handler = Counter()
+        chain = compose(handlers, SPEC, handler)
+        data = {"room": "r", "message_id": "m1"}
+        await chain("sid-1", data)
+        # A reconnected client retries from a new sid.
+        await chain("sid-2", data)
+        await chain("anon", data)
+        assert handler.calls == 2
+
+        handlers = make_handlers(dedup_scope="sid")
+        handler = Counter()
+        chain = compose(handlers, SPEC, handler)
+        await chain("sid-1", data)
+        await chain("sid-2", data)
+        assert handler.calls == 2
+
+        handlers = make_handlers(dedup_scope="room")
+        handler = Counter()
+        chain = compose(handlers, SPEC, handler)
+        await chain("sid-1", data)
+        await chain("sid-2", data)
+        await chain("sid-2", {"room": "other", "message_id": "m1"})
+        assert handler.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_room_scope_without_room_is_per_sender(self):
+        handlers = make_handlers(dedup_scope="room")
+        handler = Counter()
+        spec = EventSpec("broadcast", log=False, mirror=False, dedup=message_id)
+        chain = compose(handlers, spec, handler)
+        data = {"message": "hi", "message_id": "m1"}
+        await chain("sid-1", data)
+        await chain("sid-1", data)
+        await chain("sid-2", data)
+        assert handler.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_events_do_not_share_ids(self):
+        for scope in ("user", "sid", "room"):
+            handlers = make_handlers(dedup_scope=scope)
+            handler = Counter()
+            spec = EventSpec("broadcast", log=False, mirror=False, dedup=message_id)
+            await compose(handlers, SPEC, handler)("sid-1", {"room": "r", "message_id": "m1"})
+            await compose(handlers, spec, handler)("sid-1", {"room": "r", "message_id": "m1"})
+            assert handler.calls == 2
+
+    def test_disabled_cache_leaves_handler_unwrapped(self, monkeypatch):
+        monkeypatch.setattr(settings, "event_metrics", False)
+        handlers = make_handlers(dedup_scope="user")
+        handlers.dedup = None
+        handler = Counter()
+        spec = EventSpec("ping", log=False, mirror=False, dedup=message_id)
+        assert compose(handlers, spec, handler) is handler
+
+
+class TestEvents:
+    @pytest.mark.asyncio
+    async def test_room_message_retry_is_not_fanned_out_again(self, server, connect):
+        sid = await connect("eio-1")
+        handler = server.handlers["/"]["room_message"]
+        data = {"room": "r", "message": "hi", "message_id": "m1"}
+        ack = await handler(sid, data)
+        assert await handler(sid, data) == ack
+        sent = [payload for event, payload, *_ in server.emitted if event == "room_message"]
+        assert len(sent) == 1
+        assert sent[0]["message_id"] == "m1"
+        assert tenants["/"].logs.count() == 1
+
+    @pytest.mark.asyncio
+    async def test_broadcast_reads_the_id_from_the_payload(self, server, connect):
+        sid = await connect("eio-1")
+        handler = server.handlers["/"]["broadcast"]
+        for _ in range(2):
+            await handler(sid, {"text": "hi", "message_id": "b1"})
+        await handler(sid, {"text": "hi", "message_id": 5})
+        sent = [event for event, *_ in server.emitted if event == "broadcast"]
+        assert len(sent) == 2
+
+    @pytest.mark.asyncio
+    async def test_same_id_on_two_events_is_delivered_twice(self, server, connect):
+        sid = await connect("eio-1", "r")
+        handlers = server.handlers["/"]
+        await handlers["room_message"](sid, {"room": "r", "message": "hi", "message_id": "m1"})
+        await handlers["broadcast"](sid, {"text": "hi", "message_id": "m1"})
+        sent = [event for event, *_ in server.emitted if event in ("room_message", "broadcast")]
+        assert sent == ["room_message", "broadcast"]
@@ -0,0 +1,63 @@
+import pytest
+
+from app.connections import ADMIN_ROOM, manager
+from app.drain import DrainController
+
+pytestmark = pytest.mark.usefixtures("tenant")
+
+
+class TestDrainController:
+    def test_ready_until_draining(self):
+        drain = DrainController()
+        assert drain.ready
+        drain.draining = True
+        assert not drain.ready
+
+    @pytest.mark.asyncio
+    async def test_drain_disconnects_everyone_with_hint(self, fake_sio):
+        for i in range(5):
+            manager.add(f"sid-{i}")
+        drain = DrainController(window=0.01, batch_size=2, reconnect_jitter_ms=100)
+        drained = await drain.drain(fake_sio)
+        assert drained == 5
+        assert manager.count() == 0
+        assert sorted(fake_sio.disconnected) == [f"sid-{i}" for i in range(5)]
+        hints = [data for event, data, *_ in fake_sio.emitted if event == "server:reconnect"]
+        assert len(hints) == 5
+        assert all(0 <= h["delay_ms"] <= 100 for h in hints)
+
+    @pytest.mark.asyncio
+    async def test_admin_connections_drained_last(self, fake_sio):
+        manager.add("admin")
+        manager.add_room("admin", ADMIN_ROOM)
+        manager.add("client-1")
+        manager.add("client-2")
+        await DrainController(window=0.01, batch_size=1).drain(fake_sio)
+        assert fake_sio.disconnected[-1] == "admin"
+
+    @pytest.mark.asyncio
+    async def test_skips_already_gone_connections(self, fake_sio):
+        manager.add("sid-1")
+        manager.add("sid-2")
+        drain = DrainController(window=0.05, batch_size=1)
+        original = fake_sio.disconnect
+
+        async def disconnect(sid, namespace="/"):
+            await original(sid, namespace)
+            manager.remove("sid-2")
+
+        fake_sio.disconnect = disconnect
+        assert await drain.drain(fake_sio) == 1
+
+    @pytest.mark.asyncio
+    async def test_start_is_idempotent(self, fake_sio):
+        manager.add("sid-1")
+        drain = DrainController(window=0.01)
+        task = drain.start(fake_sio)
+        assert drain.start(fake_sio) is task
+        assert drain.draining
+        assert await task == 1
+
+    @pytest.mark.asyncio
+    async def test_empty_drain(self, fake_sio):
+        assert await DrainController().drain(fake_sio) == 0
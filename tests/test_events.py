@@ -1,13 +1,14 @@
+import json
+
 import pytest
 
+from app.auth import Identity
 from app.connections import manager
+from app.fanout import scheduler
+from app.history import history
+from app.tracing import tracer
 
-
-@pytest.fixture(autouse=True)
-def clear_manager():
-    manager._connections.clear()
-    yield
-    manager._connections.clear()
+pytestmark = pytest.mark.usefixtures("tenant")
 
 
 class TestEventLogic:
@@ -127,3 +128,174 @@ class TestRoomMessageResponse:
         response = {"status": "error", "message": "Missing room or message"}
         assert response["status"] == "error"
         assert "Missing" in response["message"]
+
+
+class TestRoomHistoryReplay:
+    @pytest.fixture(autouse=True)
+    def clear_history(self):
+        history.clear()
+        yield
+        history.clear()
+
+    @pytest.mark.asyncio
+    async def test_room_message_records_history(self, server, connect):
+        sid = await connect("eio-1")
+        ack = await server.handlers["/"]["room_message"](sid, {"room": "r", "message": "hi"})
+        assert ack["status"] == "sent"
+        assert history.count("r") == 1
+        event, data, to, _ = server.emitted[-1]
+        assert event == "room_message"
+        assert data["seq"] == 1
+
+    @pytest.mark.asyncio
+    async def test_join_with_history_replays_in_one_emit(self, server, connect):
+        sid = await connect("eio-1")
+        for i in range(3):
+            history.append("r", "other", i)
+        ack = await server.handlers["/"]["join_room"](sid, {"room": "r", "since": 1})
+        assert ack == {"status": "joined", "room": "r", "history": 2}
+        replays = [e for e in server.emitted if e[0] == "room_history"]
+        assert len(replays) == 1
+        _, data, to, _ = replays[0]
+        assert to == sid
+        assert [m["message"] for m in json.loads(data["messages"])] == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_plain_join_does_not_replay(self, server, connect):
+        sid = await connect("eio-1")
+        history.append("r", "other", "x")
+        ack = await server.handlers["/"]["join_room"](sid, "r")
+        assert ack == {"status": "joined", "room": "r"}
+        assert not [e for e in server.emitted if e[0] == "room_history"]
+
+    @pytest.mark.asyncio
+    async def test_join_without_room(self, server, connect):
+        sid = await connect("eio-1")
+        ack = await server.handlers["/"]["join_room"](sid, {"history": True})
+        assert ack["status"] == "error"
+
+
+class TestDeliveryTracing:
+    @pytest.fixture(autouse=True)
+    def sampled(self):
+        tracer.clear()
+        tracer.sample_rate = 1.0
+        yield
+        tracer.sample_rate = 0.0
+        tracer.clear()
+
+    @pytest.mark.asyncio
+    async def test_sampled_broadcast_uses_probes(self, server, connect):
+        sender = await connect("eio-1")
+        for i in range(2, 10):
+            await connect(f"eio-{i}")
+        await server.handlers["/"]["broadcast"](sender, "hello")
+        # One pass: every receiver gets exactly one packet, probes carry an ack id.
+        assert sorted(eio_sid for eio_sid, _ in server.sent) == [f"eio-{i}" for i in range(2, 10)]
+        probes = [eio_sid for eio_sid, pkt in server.sent if not pkt.data.startswith("2[")]
+        assert len(probes) == tracer.probes
+        trace = tracer.snapshot()[0]
+        assert trace["event"] == "broadcast"
+        assert trace["fanout"]["count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_unacked_probes_are_capped_per_sid(self, server, monkeypatch, connect):
+        monkeypatch.setattr(tracer, "probes", 1)
+        sender = await connect("eio-1")
+        receivers = [await connect(f"eio-{i}") for i in range(2, 5)]
+        for _ in range(10):
+            await server.handlers["/"]["broadcast"](sender, "hello")
+        callbacks = server.manager.callbacks
+        # Nobody acks: each receiver holds at most one pending callback.
+        assert sorted(callbacks) == sorted(receivers)
+        assert all(len(pending) == 2 for pending in callbacks.values())  # counter + 1
+        assert not tracer.probe_ready(receivers[0])
+        (ack_id,) = [key for key in callbacks[receivers[0]] if key]
+        await server.manager.trigger_callback(receivers[0], ack_id, [])
+        assert tracer.probe_ready(receivers[0])
+
+    @pytest.mark.asyncio
+    async def test_unsampled_emit_is_single(self, server, connect):
+        tracer.sample_rate = 0.0
+        sender = await connect("eio-1")
+        await connect("eio-2")
+        await server.handlers["/"]["broadcast"](sender, "hello")
+        assert len([e for e in server.emitted if e[0] == "broadcast"]) == 1
+        assert tracer.snapshot() == []
+
+    @pytest.mark.asyncio
+    async def test_large_audience_goes_through_the_scheduler(self, server, monkeypatch, connect):
+        tracer.sample_rate = 0.0
+        monkeypatch.setattr(scheduler, "slice_size", 2)
+        sender = await connect("eio-1")
+        for i in range(2, 7):
+            await connect(f"eio-{i}")
+        await server.handlers["/"]["broadcast"](sender, "hello")
+        assert not [e for e in server.emitted if e[0] == "broadcast"]
+        assert sorted(eio_sid for eio_sid, _ in server.sent) == [f"eio-{i}" for i in range(2, 7)]
+
+
+class TestDrainRejectsConnections:
+    @pytest.mark.asyncio
+    async def test_connect_refused_while_draining(self, server):
+        from app.drain import drain
+
+        drain.draining = True
+        try:
+            with pytest.raises(ConnectionRefusedError):
+                await server.handlers["/"]["connect"]("sid-x", {"REMOTE_ADDR": "1.2.3.4"}, None)
+        finally:
+            drain.reset()
+        assert manager.get("sid-x") is None
+
+
+class TestDirectMessage:
+    @pytest.mark.asyncio
+    async def test_routes_to_sid(self, server, connect):
+        sender = await connect("eio-1")
+        target = await connect("eio-2")
+        ack = await server.handlers["/"]["direct_message"](sender, {"to": target, "message": "hi"})
+        assert ack == {"status": "delivered", "to": f"sid:{target}", "sids": 1}
+        assert server.emitted[-1] == (
+            "direct_message",
+            {"from": sender, "user": None, "message": "hi"},
+            [target],
+            "/",
+        )
+
+    @pytest.mark.asyncio
+    async def test_routes_to_every_sid_of_a_user(self, server, connect):
+        sender = await connect("eio-1")
+        manager.add("sid-a", identity=Identity("alice"))
+        manager.add("sid-b", identity=Identity("alice"))
+        ack = await server.handlers["/"]["direct_message"](
+            sender, {"user": "alice", "message": "hi"}
+        )
+        assert ack["status"] == "delivered"
+        assert ack["sids"] == 2
+        assert sorted(server.emitted[-1][2]) == ["sid-a", "sid-b"]
+        assert manager.get("sid-a").rooms == set()
+
+    @pytest.mark.asyncio
+    async def test_offline_target(self, server, connect):
+        sender = await connect("eio-1")
+        handler = server.handlers["/"]["direct_message"]
+        assert (await handler(sender, {"to": "gone", "message": "hi"}))["status"] == "offline"
+        assert (await handler(sender, {"user": "bob", "message": "hi"}))["status"] == "offline"
+        assert not [e for e in server.emitted if e[0] == "direct_message"]
+
+    @pytest.mark.asyncio
+    async def test_is_logged_with_target(self, server, connect):
+        from app.message_log import msg_logger
+
+        msg_logger.clear()
+        sender = await connect("eio-1")
+        await server.handlers["/"]["direct_message"](sender, {"user": "bob", "message": "hi"})
+        entry = msg_logger.last()
+        assert (entry.event, entry.to_room, entry.data) == ("direct_message", "user:bob", "hi")
+
+    @pytest.mark.asyncio
+    async def test_invalid_payload(self, server, connect):
+        sender = await connect("eio-1")
+        ack = await server.handlers["/"]["direct_message"](sender, {"message": "hi"})
+        assert ack == {"status": "error", "message": "Missing recipient or message"}
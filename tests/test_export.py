@@ -0,0 +1,122 @@
+import gzip
+import json
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from app import export
+from app.dashboard import dashboard_app
+from app.export import parse_time, stream_logs
+from app.message_log import MessageLogger, msg_logger
+from app.routing import HTTPError
+
+START = datetime(2026, 1, 1, tzinfo=UTC)
+
+
+def filled(count):
+    logs = MessageLogger(max_size=count)
+    for i in range(count):
+        entry = logs.log("message", f"sid-{i}", "general", {"n": i})
+        entry.timestamp = START + timedelta(seconds=i)
+    return logs
+
+
+async def collect(app, path, query=b""):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "path": path, "method": "GET", "query_string": query, "headers": []}
+    await app(scope, receive, send)
+    start, *bodies = messages
+    return start["status"], dict(start["headers"]), bodies
+
+
+def records(body):
+    return [json.loads(line) for line in body.decode().splitlines()]
+
+
+class TestStreamLogs:
+    @pytest.mark.asyncio
+    async def test_gzip_ndjson_in_chunks(self, monkeypatch):
+        monkeypatch.setattr(export, "FLUSH_BYTES", 1)
+        logs = filled(600)
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        await stream_logs(send, logs.all(), "logs.ndjson.gz")
+        start, *bodies = messages
+        assert dict(start["headers"])[b"content-type"] == b"application/gzip"
+        # Compressed output goes out as it's produced; the last chunk ends the body.
+        assert len(bodies) > 1
+        assert all(body["more_body"] for body in bodies[:-1])
+        assert not bodies[-1].get("more_body", False)
+        lines = records(gzip.decompress(b"".join(body["body"] for body in bodies)))
+        assert len(lines) == 600
+        assert lines[599]["data"] == {"n": 599}
+        assert lines[0]["timestamp"] == START.isoformat()
+
+    @pytest.mark.asyncio
+    async def test_plain_and_empty(self):
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        await stream_logs(send, [], "logs.ndjson", compress=False)
+        assert dict(messages[0]["headers"])[b"content-type"] == b"application/x-ndjson"
+        assert messages[1]["body"] == b""
+
+
+class TestTimeRange:
+    def test_between(self):
+        logs = filled(10)
+        entries = logs.between(START + timedelta(seconds=3), START + timedelta(seconds=6))
+        assert [entry.data["n"] for entry in entries] == [3, 4, 5]
+        assert len(logs.between()) == 10
+
+    def test_parse_time(self):
+        assert parse_time("1767225600") == START
+        assert parse_time("2026-01-01T00:00:00") == START
+        assert parse_time("2026-01-01T01:00:00+01:00") == START
+        assert parse_time(None) is None
+        with pytest.raises(HTTPError):
+            parse_time("yesterday")
+
+    @pytest.mark.parametrize("value", ["1e20", "inf", "-inf", "nan"])
+    def test_out_of_range_timestamps(self, value):
+        with pytest.raises(HTTPError) as exc:
+            parse_time(value)
+        assert exc.value.status == 400
+
+
+class TestExportEndpoint:
+    @pytest.fixture(autouse=True)
+    def clean_logs(self):
+        msg_logger.clear()
+        yield
+        msg_logger.clear()
+
+    @pytest.mark.asyncio
+    async def test_filtered_export(self):
+        msg_logger.log("message", "sid-1", data="old").timestamp = START
+        msg_logger.log("message", "sid-1", data=b"\x00raw")
+        status, headers, bodies = await collect(
+            dashboard_app, "/api/logs/export", query=b"since=2026-01-02&gzip=0"
+        )
+        assert status == 200
+        assert headers[b"content-disposition"] == b'attachment; filename="logs-default.ndjson"'
+        (line,) = records(b"".join(body["body"] for body in bodies))
+        assert line["data"] == "b'\\x00raw'"
+
+    @pytest.mark.asyncio
+    async def test_invalid_time(self):
+        status, _, bodies = await collect(dashboard_app, "/api/logs/export", query=b"until=soon")
+        assert status == 400
+        assert b"Invalid time" in bodies[0]["body"]
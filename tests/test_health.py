@@ -0,0 +1,105 @@
+import asyncio
+import json
+
+import pytest
+
+from app.connections import manager
+from app.dashboard import dashboard_app
+from app.drain import drain
+from app.health import HealthMonitor, health
+
+
+async def call(path, method="GET"):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await dashboard_app({"type": "http", "path": path, "method": method}, receive, send)
+    return messages[0]["status"], messages[1]["body"]
+
+
+@pytest.fixture(autouse=True)
+def reset_state():
+    manager._connections.clear()
+    drain.reset()
+    yield
+    manager._connections.clear()
+    drain.reset()
+
+
+class TestHealthMonitor:
+    def test_ready_by_default(self):
+        monitor = HealthMonitor()
+        assert monitor.readiness()[0] == 200
+        assert monitor.liveness()[0] == 200
+
+    def test_not_ready_while_draining(self):
+        monitor = HealthMonitor()
+        drain.draining = True
+        status, body = monitor.readiness()
+        assert status == 503
+        assert json.loads(body)["reason"] == "draining"
+
+    def test_not_ready_when_lagging(self):
+        monitor = HealthMonitor(max_lag_ms=100)
+        monitor.observe_lag(500)
+        status, body = monitor.readiness()
+        assert status == 503
+        assert json.loads(body)["reason"] == "event_loop_lag"
+
+    def test_lag_decays(self):
+        monitor = HealthMonitor(max_lag_ms=100)
+        monitor.observe_lag(400)
+        for _ in range(3):
+            monitor.observe_lag(0)
+        assert monitor.lag_ms == 50
+        assert monitor.readiness()[0] == 200
+
+    def test_not_ready_at_capacity(self):
+        monitor = HealthMonitor(max_connections=2)
+        manager.add("sid-1")
+        assert monitor.readiness()[0] == 200
+        manager.add("sid-2")
+        status, body = monitor.readiness()
+        assert status == 503
+        assert json.loads(body)["reason"] == "capacity"
+
+    def test_unlimited_capacity(self):
+        monitor = HealthMonitor(max_connections=0)
+        for i in range(10):
+            manager.add(f"sid-{i}")
+        assert monitor.readiness()[0] == 200
+
+    @pytest.mark.asyncio
+    async def test_monitor_measures_lag(self):
+        monitor = HealthMonitor(interval=0.01)
+        monitor.start()
+        await asyncio.sleep(0.02)
+        await monitor.stop()
+        assert monitor.lag_ms >= 0
+        assert monitor._task is None
+
+
+class TestHealthEndpoints:
+    @pytest.mark.asyncio
+    async def test_healthz(self):
+        status, body = await call("/healthz")
+        assert status == 200
+        assert json.loads(body) == {"status": "ok"}
+
+    @pytest.mark.asyncio
+    async def test_readyz(self):
+        health.lag_ms = 0.0
+        status, body = await call("/readyz")
+        assert status == 200
+        assert json.loads(body) == {"status": "ready"}
+
+    @pytest.mark.asyncio
+    async def test_readyz_draining(self):
+        drain.draining = True
+        status, _ = await call("/readyz")
+        assert status == 503
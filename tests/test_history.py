@@ -0,0 +1,114 @@
+import json
+
+from app.history import RoomHistory
+
+
+class TestRoomHistory:
+    def test_append_returns_increasing_seq(self):
+        history = RoomHistory()
+        assert history.append("room-1", "sid-1", "a") == 1
+        assert history.append("room-1", "sid-1", "b") == 2
+        assert history.append("room-2", "sid-1", "c") == 1
+
+    def test_replay_decodes_to_messages(self):
+        history = RoomHistory()
+        history.append("room-1", "sid-1", {"text": "hello"})
+        history.append("room-1", "sid-2", "world")
+        replay = history.replay("room-1")
+        messages = json.loads(replay.frames)
+        assert replay.count == 2
+        assert replay.last_seq == 2
+        assert [m["message"] for m in messages] == [{"text": "hello"}, "world"]
+        assert messages[0]["from"] == "sid-1"
+        assert messages[0]["room"] == "room-1"
+
+    def test_replay_unknown_room(self):
+        history = RoomHistory()
+        replay = history.replay("missing")
+        assert replay.count == 0
+        assert json.loads(replay.frames) == []
+
+    def test_replay_since(self):
+        history = RoomHistory()
+        for i in range(5):
+            history.append("room-1", "sid-1", i)
+        messages = json.loads(history.replay("room-1", since=3).frames)
+        assert [m["seq"] for m in messages] == [4, 5]
+
+    def test_replay_limit_keeps_latest(self):
+        history = RoomHistory()
+        for i in range(5):
+            history.append("room-1", "sid-1", i)
+        messages = json.loads(history.replay("room-1", limit=2).frames)
+        assert [m["message"] for m in messages] == [3, 4]
+
+    def test_count_limit(self):
+        history = RoomHistory(max_messages=3)
+        for i in range(5):
+            history.append("room-1", "sid-1", i)
+        assert history.count("room-1") == 3
+        messages = json.loads(history.replay("room-1").frames)
+        assert [m["message"] for m in messages] == [2, 3, 4]
+
+    def test_byte_limit(self):
+        history = RoomHistory(max_bytes=300)
+        for _ in range(10):
+            history.append("room-1", "sid-1", "x" * 50)
+        replay = history.replay("room-1")
+        assert 0 < replay.count < 10
+        assert len(replay.frames) <= 300 + replay.count + 1
+
+    def test_oversized_message_not_stored(self):
+        history = RoomHistory(max_bytes=100)
+        seq = history.append("room-1", "sid-1", "x" * 200)
+        assert seq == 1
+        assert history.count("room-1") == 0
+
+    def test_room_limit_evicts_least_recent(self):
+        history = RoomHistory(max_rooms=2)
+        history.append("room-1", "sid-1", "a")
+        history.append("room-2", "sid-1", "b")
+        history.append("room-1", "sid-1", "c")
+        history.append("room-3", "sid-1", "d")
+        assert history.count("room-1") == 2
+        assert history.count("room-2") == 0
+        assert history.count("room-3") == 1
+
+    def test_seq_survives_eviction(self):
+        history = RoomHistory(max_rooms=1)
+        for message in ("a", "b", "c"):
+            history.append("room-1", "sid-1", message)
+        history.append("room-2", "sid-1", "x")
+        assert history.count("room-1") == 0
+        assert history.replay("room-1").last_seq == 3
+        assert history.append("room-1", "sid-1", "d") == 4
+        replay = history.replay("room-1", since=3)
+        assert replay.count == 1 and replay.last_seq == 4
+
+    def test_cleared_room_keeps_counting(self):
+        history = RoomHistory()
+        history.append("room-1", "sid-1", "a")
+        history.append("room-1", "sid-1", "b")
+        history.clear("room-1")
+        assert history.replay("room-1").last_seq == 2
+        assert history.append("room-1", "sid-1", "c") == 3
+
+    def test_unserializable_message_skipped(self):
+        history = RoomHistory()
+        assert history.append("room-1", "sid-1", b"binary") == 0
+        assert history.count("room-1") == 0
+
+    def test_disabled(self):
+        history = RoomHistory(max_messages=0)
+        assert not history.enabled
+        assert history.append("room-1", "sid-1", "a") == 0
+
+    def test_clear(self):
+        history = RoomHistory()
+        history.append("room-1", "sid-1", "a")
+        history.append("room-2", "sid-1", "b")
+        history.clear("room-1")
+        assert history.count("room-1") == 0
+        assert history.count("room-2") == 1
+        history.clear()
+        assert history.count("room-2") == 0
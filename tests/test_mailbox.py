@@ -0,0 +1,202 @@
+import asyncio
+
+import pytest
+
+from app.auth import sign_token
+from app.connections import ADMIN_ROOM
+from app.mailbox import MailboxStore
+from app.tenants import tenants
+from tests.conftest import SECRET
+
+
+def events(pending):
+    return [(m["event"], m["data"]) for m in pending["messages"]]
+
+
+class TestMailboxStore:
+    @pytest.mark.asyncio
+    async def test_take_returns_messages_in_order(self):
+        store = MailboxStore()
+        assert store.put(["alice", "bob"], "room_message", {"n": 1}) == 2
+        store.put(["alice"], "room_message", {"n": 2})
+        pending = await store.take("alice")
+        assert events(pending) == [("room_message", {"n": 1}), ("room_message", {"n": 2})]
+        assert pending["dropped"] == 0
+        assert await store.take("alice") is None
+        assert store.count() == 1
+
+    @pytest.mark.asyncio
+    async def test_count_quota_drops_oldest(self):
+        store = MailboxStore(max_messages=2)
+        for n in range(3):
+            store.put(["alice"], "e", n)
+        pending = await store.take("alice")
+        assert [m["data"] for m in pending["messages"]] == [1, 2]
+        assert pending["dropped"] == 1
+
+    @pytest.mark.asyncio
+    async def test_byte_quota(self):
+        store = MailboxStore(max_bytes=10)
+        assert store.put(["alice"], "e", "x" * 20) == 0
+        store.put(["alice"], "e", "abcd")
+        store.put(["alice"], "e", "efgh")
+        assert [m["data"] for m in (await store.take("alice"))["messages"]] == ["efgh"]
+
+    @pytest.mark.asyncio
+    async def test_ttl_expires_messages(self):
+        store = MailboxStore(ttl=0)
+        store.put(["alice"], "e", 1)
+        pending = await store.take("alice")
+        assert pending is None or pending["messages"] == []
+        assert store.expired == 1
+
+    @pytest.mark.asyncio
+    async def test_memory_limit_drops_from_idle_boxes(self):
+        # Each entry is 6 bytes of JSON, so only two fit.
+        store = MailboxStore(memory_bytes=12)
+        store.put(["idle"], "e", "aaaa")
+        store.put(["busy"], "e", "bbbb")
+        store.put(["busy"], "e", "cccc")
+        assert store.memory == 12
+        assert (await store.take("idle"))["messages"] == []
+        assert len((await store.take("busy"))["messages"]) == 2
+
+    @pytest.mark.asyncio
+    async def test_memory_limit_spills_to_disk(self, tmp_path):
+        store = MailboxStore(memory_bytes=10, spill_dir=tmp_path)
+        store.put(["idle"], "e", "aaaa")
+        store.put(["busy"], "e", "bbbb")
+        store.put(["busy"], "e", "cccc")
+        assert store.memory <= 10
+        # Written by the background writer, not inline on the loop.
+        assert not list(tmp_path.iterdir())
+        await asyncio.sleep(0.05)
+        assert list(tmp_path.iterdir())
+        assert events(await store.take("idle")) == [("e", "aaaa")]
+        assert len((await store.take("busy"))["messages"]) == 2
+        assert not list(tmp_path.iterdir())
+
+    @pytest.mark.asyncio
+    async def test_user_limit_evicts_least_recent_box(self):
+        store = MailboxStore(max_users=1)
+        store.put(["alice"], "e", 1)
+        store.put(["bob"], "e", 2)
+        assert await store.take("alice") is None
+        assert await store.take("bob") is not None
+
+    @pytest.mark.asyncio
+    async def test_parked_rooms(self):
+        store = MailboxStore()
+        store.park("alice", {"general", ADMIN_ROOM})
+        assert store.subscribers("general") == ["alice"]
+        assert store.subscribers(ADMIN_ROOM) == []
+        await store.take("alice")
+        assert store.subscribers("general") == []
+
+    def test_parked_rooms_expire(self):
+        store = MailboxStore(ttl=0)
+        store.park("alice", {"general"})
+        assert store.subscribers("general") == []
+
+    @pytest.mark.asyncio
+    async def test_take_includes_spills_not_yet_written(self, tmp_path):
+        store = MailboxStore(memory_bytes=6, spill_dir=tmp_path)
+        store.put(["alice"], "e", "aaaa")
+        store.put(["alice"], "e", "bbbb")
+        store.put(["bob"], "e", "cccc")
+        assert [m["data"] for m in (await store.take("alice"))["messages"]] == ["aaaa", "bbbb"]
+        await asyncio.sleep(0.05)
+        assert len(list(tmp_path.iterdir())) <= 1
+
+    @pytest.mark.asyncio
+    async def test_failed_spill_counts_drops(self, tmp_path):
+        blocker = tmp_path / "file"
+        blocker.write_text("")
+        store = MailboxStore(memory_bytes=6, spill_dir=blocker / "spill")
+        store.put(["alice"], "e", "aaaa")
+        store.put(["bob"], "e", "bbbb")
+        await asyncio.sleep(0.05)
+        assert store.dropped == 1
+        pending = await store.take("alice")
+        assert pending == {"messages": [], "dropped": 1, "expired": 0}
+
+    @pytest.mark.asyncio
+    async def test_evicted_spill_is_not_replayed(self, tmp_path):
+        store = MailboxStore(memory_bytes=6, max_users=2, spill_dir=tmp_path)
+        store.put(["alice"], "e", "old1")
+        store.put(["bob"], "e", "bbbb")
+        await asyncio.sleep(0.05)
+        store.put(["carol"], "e", "cccc")  # evicts alice's spilled box
+        store.put(["alice"], "e", "new1")
+        store.put(["dave"], "e", "dddd")
+        assert [m["data"] for m in (await store.take("alice"))["messages"]] == ["new1"]
+
+
+@pytest.fixture
+def delivery(tenant, auth_enabled, monkeypatch):
+    monkeypatch.setattr(tenant.mailboxes, "enabled", True)
+
+
+def auth(user):
+    return {"token": sign_token({"sub": user}, SECRET)}
+
+
+@pytest.mark.usefixtures("delivery")
+class TestMailboxDelivery:
+    @pytest.mark.asyncio
+    async def test_offline_room_messages_flush_on_reconnect(self, server, connect):
+        handlers = server.handlers["/"]
+        alice = await connect("eio-1", auth=auth("alice"))
+        bob = await connect("eio-2", auth=auth("bob"))
+        await handlers["join_room"](alice, "general")
+        await handlers["join_room"](bob, "general")
+        await handlers["disconnect"](alice)
+        for n in range(3):
+            await handlers["room_message"](bob, {"room": "general", "message": n})
+        server.emitted.clear()
+        alice = await connect("eio-3", auth=auth("alice"))
+        await asyncio.sleep(0)
+        batches = [(data, to) for event, data, to, _ in server.emitted if event == "mailbox"]
+        assert len(batches) == 1
+        data, to = batches[0]
+        assert to == alice
+        assert [m["data"]["message"] for m in data["messages"]] == [0, 1, 2]
+
+    @pytest.mark.asyncio
+    async def test_user_online_elsewhere_is_not_queued(self, server, connect):
+        handlers = server.handlers["/"]
+        first = await connect("eio-1", auth=auth("alice"))
+        await connect("eio-2", auth=auth("alice"))
+        bob = await connect("eio-3", auth=auth("bob"))
+        await handlers["join_room"](first, "general")
+        await handlers["disconnect"](first)
+        await handlers["room_message"](bob, {"room": "general", "message": "hi"})
+        assert tenants["/"].mailboxes.count() == 0
+
+    @pytest.mark.asyncio
+    async def test_direct_message_to_offline_user_is_queued(self, server, connect):
+        alice = await connect("eio-0", auth=auth("alice"))
+        await server.handlers["/"]["disconnect"](alice)
+        bob = await connect("eio-1", auth=auth("bob"))
+        ack = await server.handlers["/"]["direct_message"](bob, {"user": "alice", "message": "hi"})
+        assert ack == {"status": "queued", "to": "user:alice"}
+        server.emitted.clear()
+        await connect("eio-2", auth=auth("alice"))
+        await asyncio.sleep(0)
+        (data,) = [data for event, data, *_ in server.emitted if event == "mailbox"]
+        assert data["messages"][0]["event"] == "direct_message"
+        assert data["messages"][0]["data"]["user"] == "bob"
+
+    @pytest.mark.asyncio
+    async def test_unknown_users_cannot_evict_real_mailboxes(self, server, connect, monkeypatch):
+        handlers = server.handlers["/"]
+        monkeypatch.setattr(tenants["/"].mailboxes, "max_users", 1)
+        alice = await connect("eio-0", auth=auth("alice"))
+        await handlers["disconnect"](alice)
+        bob = await connect("eio-1", auth=auth("bob"))
+        await handlers["direct_message"](bob, {"user": "alice", "message": "hi"})
+        for n in range(3):
+            ack = await handlers["direct_message"](bob, {"user": f"ghost-{n}", "message": "x"})
+            assert ack == {"status": "offline", "to": f"user:ghost-{n}"}
+        assert tenants["/"].mailboxes.count() == 1
+        assert events(await tenants["/"].mailboxes.take("alice"))[0][0] == "direct_message"
@@ -1,9 +1,33 @@
-from app.main import app
+import subprocess
+import sys
+
+import socketio
+
+import app.main
 from app.config import settings
+from app.main import create_app
 
 
 def test_app_created():
-    assert app is not None
+    assert isinstance(create_app(), socketio.ASGIApp)
+
+
+def test_module_app_is_built_once_on_access():
+    assert app.main.app is app.main.app
+
+
+def test_import_has_no_side_effects():
+    code = (
+        "import sys, app.main\n"
+        "assert 'app' not in vars(app.main)\n"
+        "assert 'app.dashboard' not in sys.modules\n"
+        "assert 'uvicorn' not in sys.modules\n"
+        "subsystems = ('tenants', 'mailbox', 'transfer', 'topics', 'conflation', 'presence',\n"
+        "              'drain', 'snapshot', 'capture', 'health')\n"
+        "loaded = [m for m in subsystems if 'app.' + m in sys.modules]\n"
+        "assert not loaded, loaded\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
 
 
 def test_settings_defaults():
@@ -68,6 +68,24 @@ class TestMessageLogger:
         assert "msg1" not in events
         assert "msg4" in events
 
+    def test_since_returns_new_entries(self):
+        logger = MessageLogger(max_size=3)
+        logger.log(event="msg1")
+        mark = logger.appended
+        logger.log(event="msg2")
+        assert [e.event for e in logger.since(mark)] == ["msg2"]
+        assert logger.since(logger.appended) == []
+        for i in range(5):
+            logger.log(event=f"more{i}")
+        assert len(logger.since(mark)) == 3
+
+    def test_restore_keeps_newer_entries(self):
+        logger = MessageLogger(max_size=3)
+        logger.log(event="live")
+        logger.restore([MessageLog(event=f"old{i}") for i in range(3)])
+        assert [e.event for e in logger.all()] == ["old1", "old2", "live"]
+        assert logger.appended == 1
+
     def test_global_msg_logger(self):
         original_count = msg_logger.count()
         msg_logger.log(event="test_global")
@@ -0,0 +1,147 @@
+import pytest
+
+from app.config import settings
+from app.connections import ADMIN_ROOM
+from app.events import ChatHandlers
+from app.fanout import scheduler
+from app.pipeline import EventError, EventSpec, Handlers, compose, on
+from app.tracing import tracer
+from tests.conftest import make_handlers
+
+
+def room_of(data):
+    return data["room"]
+
+
+def message_of(data):
+    return data["message"]
+
+
+def require_room(data):
+    if not isinstance(data, dict) or "room" not in data:
+        raise EventError("Missing room")
+    return data
+
+
+class Recorder:
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, sid, data=None, start=None):
+        self.calls.append((sid, data, start))
+        return {"status": "ok"}
+
+
+class TestCompose:
+    def test_nothing_enabled_returns_handler(self, monkeypatch):
+        monkeypatch.setattr(settings, "event_metrics", False)
+        handler = Recorder()
+        spec = EventSpec("ping", log=False, mirror=False)
+        assert compose(make_handlers(), spec, handler) is handler
+
+    @pytest.mark.asyncio
+    async def test_validation_rejects_before_handler(self):
+        handlers = make_handlers()
+        handler = Recorder()
+        chain = compose(handlers, EventSpec("x", validate=require_room), handler)
+        assert await chain("sid-1", {}) == {"status": "error", "message": "Missing room"}
+        assert handler.calls == []
+        assert handlers.tenant.stats.rejected == 1
+        assert handlers.tenant.logs.count() == 0
+
+    @pytest.mark.asyncio
+    async def test_log_mirror_and_metrics(self):
+        handlers = make_handlers(admin=True)
+        handler = Recorder()
+        spec = EventSpec("room_message", room=room_of, data=message_of, count=True)
+        chain = compose(handlers, spec, handler)
+        ack = await chain("sid-1", {"room": "r", "message": "hi"})
+        assert ack == {"status": "ok"}
+        entry = handlers.tenant.logs.last()
+        assert (entry.event, entry.from_sid, entry.to_room, entry.data) == (
+            "room_message",
+            "sid-1",
+            "r",
+            "hi",
+        )
+        [(event, payload, to, _)] = handlers.sio.emitted
+        assert (event, to) == ("admin:message", ADMIN_ROOM)
+        assert payload == {
+            "event": "room_message",
+            "from": "sid-1",
+            "room": "r",
+            "data": "hi",
+            "timestamp": entry.timestamp.isoformat(),
+        }
+        assert handlers.tenant.stats.events["room_message"] == 1
+        assert handlers.tenant.stats.messages == 1
+
+    @pytest.mark.asyncio
+    async def test_mirror_skipped_without_admins(self):
+        handlers = make_handlers()
+        chain = compose(handlers, EventSpec("message"), Recorder())
+        await chain("sid-1", "hi")
+        assert handlers.sio.emitted == []
+        assert handlers.tenant.logs.count() == 1
+
+    @pytest.mark.asyncio
+    async def test_rate_limit(self, monkeypatch):
+        monkeypatch.setattr(settings, "rate_limit_events", 1.0)
+        monkeypatch.setattr(settings, "rate_limit_burst", 2)
+        handlers = make_handlers()
+        handler = Recorder()
+        chain = compose(handlers, EventSpec("message"), handler)
+        acks = [await chain("sid-1", i) for i in range(3)]
+        assert acks[2] == {"status": "error", "message": "Rate limit exceeded"}
+        assert len(handler.calls) == 2
+        assert handlers.tenant.stats.limited == 1
+
+    @pytest.mark.asyncio
+    async def test_trace_passes_sample_start(self, monkeypatch):
+        monkeypatch.setattr(tracer, "sample_rate", 1.0)
+        handler = Recorder()
+        chain = compose(make_handlers(), EventSpec("message", trace=True), handler)
+        await chain("sid-1", "hi")
+        assert handler.calls[0][2] is not None
+
+
+class TestHandlerClasses:
+    def test_register_uses_event_names(self):
+        class Custom(Handlers):
+            @on("custom:event", log=False, mirror=False)
+            async def custom(self, sid, data=None):
+                return data
+
+        handlers = make_handlers()
+        Custom(handlers.sio, handlers.tenant).register()
+        assert "custom:event" in handlers.sio.handlers
+
+    @pytest.mark.asyncio
+    async def test_priority_handlers_hold_the_control_lane(self):
+        seen = []
+
+        class Custom(Handlers):
+            @on("urgent", log=False, mirror=False, priority=True)
+            async def urgent(self, sid, data=None):
+                seen.append(scheduler._control)
+                return data
+
+        handlers = make_handlers()
+        Custom(handlers.sio, handlers.tenant).register()
+        assert await handlers.sio.handlers["urgent"]("sid-1", 1) == 1
+        assert seen == [1]
+        assert scheduler._control == 0
+
+    def test_chat_handlers_register_all_events(self):
+        handlers = make_handlers()
+        ChatHandlers(handlers.sio, handlers.tenant).register()
+        assert {"connect", "disconnect", "message", "newMessage", "join_room", "ping"} <= set(
+            handlers.sio.handlers
+        )
+
+    @pytest.mark.asyncio
+    async def test_leave_room_requires_room(self):
+        handlers = make_handlers()
+        ChatHandlers(handlers.sio, handlers.tenant).register()
+        ack = await handlers.sio.handlers["leave_room"]("sid-1", None)
+        assert ack == {"status": "error", "message": "Missing room"}
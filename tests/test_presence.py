@@ -0,0 +1,204 @@
+import asyncio
+import json
+
+import pytest
+
+from app import dashboard
+from app.presence import Presence
+from tests.test_routing import request
+
+
+@pytest.fixture(autouse=True)
+def presence(tenant, monkeypatch):
+    monkeypatch.setattr(tenant.presence, "debounce", 0.01)
+    return tenant.presence
+
+
+def presence_events(sio):
+    return [data for event, data, *_ in sio.emitted if event == "presence"]
+
+
+class TestPresence:
+    def test_user_with_several_sids_stays_online(self):
+        presence = Presence()
+        presence.connect("sid-1", "alice")
+        presence.connect("sid-2", "alice")
+        presence.disconnect("sid-1")
+        assert presence.is_online("alice")
+        assert presence.last_seen("alice") is None
+        presence.disconnect("sid-2")
+        assert not presence.is_online("alice")
+        assert presence.last_seen("alice") is not None
+
+    def test_reconnect_clears_last_seen(self):
+        presence = Presence()
+        presence.connect("sid-1", "alice")
+        presence.disconnect("sid-1")
+        presence.connect("sid-2", "alice")
+        assert presence.users(["alice", "bob"]) == {
+            "alice": {"online": True, "last_seen": None},
+            "bob": {"online": False, "last_seen": None},
+        }
+
+    def test_last_seen_is_bounded(self):
+        presence = Presence(max_users=2)
+        for i in range(3):
+            presence.connect(f"sid-{i}", f"user-{i}")
+            presence.disconnect(f"sid-{i}")
+        assert presence.last_seen("user-0") is None
+        assert presence.last_seen("user-2") is not None
+
+    def test_room_members_count_each_user_once(self):
+        presence = Presence()
+        presence.connect("sid-1", "alice")
+        presence.connect("sid-2", "alice")
+        presence.connect("sid-3", "bob")
+        for sid in ("sid-1", "sid-2", "sid-3"):
+            presence.join(sid, "general")
+        assert sorted(presence.room("general")["users"]) == ["alice", "bob"]
+        presence.leave("sid-1", "general")
+        assert sorted(presence.room("general")["users"]) == ["alice", "bob"]
+        presence.disconnect("sid-2", {"general"})
+        assert presence.room("general")["users"] == ["bob"]
+
+    def test_updates_coalesce_to_net_changes(self):
+        presence = Presence()
+        presence.connect("sid-1", "alice")
+        presence.join("sid-1", "general")
+        assert presence.updates() == [{"room": "general", "joined": ["alice"]}]
+        # A flapping connection inside one window produces nothing.
+        presence.disconnect("sid-1", {"general"})
+        presence.connect("sid-2", "alice")
+        presence.join("sid-2", "general")
+        assert presence.updates() == []
+        presence.leave("sid-2", "general")
+        assert presence.updates() == [{"room": "general", "left": ["alice"]}]
+
+    def test_typing_is_announced_once(self):
+        presence = Presence()
+        presence.connect("sid-1", "alice")
+        presence.join("sid-1", "general")
+        presence.updates()
+        for _ in range(10):
+            assert presence.typing("sid-1", "general", True)
+        assert presence.updates() == [{"room": "general", "typing": ["alice"]}]
+        presence.typing("sid-1", "general", True)
+        assert presence.updates() == []
+        presence.leave("sid-1", "general")
+        assert presence.updates() == [{"room": "general", "left": ["alice"], "idle": ["alice"]}]
+
+    def test_typing_requires_membership(self):
+        presence = Presence()
+        presence.connect("sid-1", "alice")
+        assert not presence.typing("sid-1", "general", True)
+        assert not presence.typing("sid-unknown", "general", True)
+
+    def test_typing_expires(self):
+        presence = Presence(typing_timeout=0)
+        presence.connect("sid-1", "alice")
+        presence.join("sid-1", "general")
+        presence.typing("sid-1", "general", True)
+        assert presence.updates() == [{"room": "general", "joined": ["alice"]}]
+        assert presence.room("general")["typing"] == []
+
+    @pytest.mark.asyncio
+    async def test_flush_emits_one_update_per_room(self, fake_sio):
+        presence = Presence("/chat", debounce=0.01)
+        presence.connect("sid-1", "alice")
+        presence.connect("sid-2", "bob")
+        presence.join("sid-1", "general")
+        presence.schedule(fake_sio)
+        presence.join("sid-2", "general")
+        presence.schedule(fake_sio)
+        await asyncio.sleep(0.05)
+        assert fake_sio.emitted == [
+            ("presence", {"room": "general", "joined": ["alice", "bob"]}, "general", "/chat")
+        ]
+
+    @pytest.mark.asyncio
+    async def test_join_is_not_held_back_by_a_typer(self, fake_sio):
+        presence = Presence("/chat", debounce=0.01, typing_timeout=5)
+        presence.connect("sid-1", "alice")
+        presence.connect("sid-2", "bob")
+        presence.join("sid-1", "general")
+        presence.typing("sid-1", "general", True)
+        presence.schedule(fake_sio)
+        await asyncio.sleep(0.05)
+        fake_sio.emitted.clear()
+        presence.join("sid-2", "other")
+        presence.schedule(fake_sio)
+        await asyncio.sleep(0.05)
+        assert fake_sio.emitted == [
+            ("presence", {"room": "other", "joined": ["bob"]}, "other", "/chat")
+        ]
+        # Lets the flush task finish instead of waiting out the typing timeout.
+        presence.typing("sid-1", "general", False)
+        presence.schedule(fake_sio)
+        await asyncio.sleep(0.05)
+
+
+class TestPresenceEvents:
+    @pytest.mark.asyncio
+    async def test_join_and_query(self, server, connect):
+        alice = await connect("eio-1", auth={"user": "alice"})
+        anonymous = await connect("eio-2")
+        handlers = server.handlers["/"]
+        await handlers["join_room"](alice, "general")
+        await handlers["join_room"](anonymous, "general")
+        result = await handlers["presence:query"](alice, "general")
+        assert result["status"] == "ok"
+        assert sorted(result["users"]) == sorted(["alice", anonymous])
+        await asyncio.sleep(0.05)
+        assert presence_events(server) == [{"room": "general", "joined": ["alice", anonymous]}]
+
+    @pytest.mark.asyncio
+    async def test_disconnect_records_last_seen(self, server, connect):
+        sid = await connect("eio-1", auth={"user": "alice"})
+        await server.handlers["/"]["disconnect"](sid)
+        result = await server.handlers["/"]["presence:query"](sid, {"users": ["alice"]})
+        assert result["presence"]["alice"]["online"] is False
+        assert result["presence"]["alice"]["last_seen"] is not None
+
+    @pytest.mark.asyncio
+    async def test_typing_is_debounced(self, server, connect):
+        sid = await connect("eio-1", auth={"user": "alice"})
+        handlers = server.handlers["/"]
+        await handlers["join_room"](sid, "general")
+        for _ in range(5):
+            assert (await handlers["typing"](sid, "general"))["status"] == "ok"
+        await asyncio.sleep(0.05)
+        assert presence_events(server) == [
+            {"room": "general", "joined": ["alice"], "typing": ["alice"]}
+        ]
+
+    @pytest.mark.asyncio
+    async def test_typing_outside_room_is_rejected(self, server, connect):
+        sid = await connect("eio-1", auth={"user": "alice"})
+        result = await server.handlers["/"]["typing"](sid, {"room": "general"})
+        assert result == {"status": "error", "message": "Not in room"}
+
+    @pytest.mark.asyncio
+    async def test_query_requires_target(self, server, connect):
+        sid = await connect("eio-1")
+        result = await server.handlers["/"]["presence:query"](sid, {})
+        assert result["status"] == "error"
+
+
+class TestPresenceEndpoint:
+    @pytest.mark.asyncio
+    async def test_room_presence(self, presence):
+        presence.connect("sid-1", "alice")
+        presence.join("sid-1", "general")
+        status, _, body = await request(
+            dashboard.dashboard_app, "/api/presence", query=b"room=general&users=alice,bob"
+        )
+        assert status == 200
+        data = json.loads(body)
+        assert data["online"] == 1
+        assert data["users"] == ["alice"]
+        assert data["presence"]["bob"]["online"] is False
+
+    @pytest.mark.asyncio
+    async def test_requires_room_or_users(self):
+        status, _, _ = await request(dashboard.dashboard_app, "/api/presence")
+        assert status == 400
@@ -0,0 +1,33 @@
+from app import ratelimit
+from app.ratelimit import RateLimiter
+
+
+class TestRateLimiter:
+    def test_allows_burst_then_limits(self, monkeypatch):
+        monkeypatch.setattr(ratelimit.time, "monotonic", lambda: 100.0)
+        limiter = RateLimiter(rate=1.0, burst=3)
+        assert [limiter.allow("a") for _ in range(4)] == [True, True, True, False]
+
+    def test_refills_over_time(self, monkeypatch):
+        now = [100.0]
+        monkeypatch.setattr(ratelimit.time, "monotonic", lambda: now[0])
+        limiter = RateLimiter(rate=2.0, burst=1)
+        assert limiter.allow("a")
+        assert not limiter.allow("a")
+        now[0] += 0.5
+        assert limiter.allow("a")
+
+    def test_clients_are_independent(self, monkeypatch):
+        monkeypatch.setattr(ratelimit.time, "monotonic", lambda: 100.0)
+        limiter = RateLimiter(rate=1.0, burst=1)
+        assert limiter.allow("a")
+        assert limiter.allow("b")
+        assert not limiter.allow("a")
+
+    def test_forget(self):
+        limiter = RateLimiter(rate=1.0, burst=1)
+        limiter.allow("a")
+        assert len(limiter) == 1
+        limiter.forget("a")
+        limiter.forget("missing")
+        assert len(limiter) == 0
@@ -0,0 +1,191 @@
+import json
+
+import pytest
+
+from app import dashboard
+from app.connections import manager
+from app.dashboard import dashboard_app
+from app.message_log import msg_logger
+from app.routing import HTTPError, Router, send_json
+
+
+async def request(app, path, method="GET", body=b"", query=b"", chunks=None, headers=()):
+    messages = []
+    pending = list(chunks) if chunks is not None else [body]
+
+    async def receive():
+        chunk = pending.pop(0)
+        return {"type": "http.request", "body": chunk, "more_body": bool(pending)}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http",
+        "path": path,
+        "method": method,
+        "query_string": query,
+        "headers": list(headers),
+    }
+    await app(scope, receive, send)
+    start, response = messages
+    return start["status"], dict(start["headers"]), response["body"]
+
+
+def echo_router():
+    router = Router()
+
+    @router.route("/static")
+    async def static(req, send):
+        await send_json(send, {"path": req.path})
+
+    @router.route("/items/{item_id}/tags/{tag}", methods=("GET", "DELETE"))
+    async def item(req, send):
+        await send_json(send, {"params": req.params, "method": req.method})
+
+    @router.route("/query")
+    async def query(req, send):
+        await send_json(send, req.query)
+
+    @router.route("/body", methods=("POST",))
+    async def body(req, send):
+        await send_json(send, await req.json())
+
+    @router.route("/teapot")
+    async def teapot(req, send):
+        raise HTTPError(418, "I'm a teapot")
+
+    return router
+
+
+class TestRouter:
+    @pytest.mark.asyncio
+    async def test_static_route(self):
+        status, _, body = await request(echo_router(), "/static")
+        assert status == 200
+        assert json.loads(body) == {"path": "/static"}
+
+    @pytest.mark.asyncio
+    async def test_parameterized_route(self):
+        status, _, body = await request(echo_router(), "/items/42/tags/red", "DELETE")
+        assert status == 200
+        assert json.loads(body) == {"params": {"item_id": "42", "tag": "red"}, "method": "DELETE"}
+
+    @pytest.mark.asyncio
+    async def test_parameter_must_not_be_empty(self):
+        status, _, _ = await request(echo_router(), "/items//tags/red")
+        assert status == 404
+
+    @pytest.mark.asyncio
+    async def test_not_found(self):
+        status, headers, body = await request(echo_router(), "/missing")
+        assert status == 404
+        assert body == b"Not Found"
+        assert headers[b"content-type"] == b"text/plain"
+
+    @pytest.mark.asyncio
+    async def test_method_not_allowed(self):
+        status, headers, _ = await request(echo_router(), "/items/1/tags/x", "POST")
+        assert status == 405
+        assert headers[b"allow"] == b"DELETE, GET"
+
+    @pytest.mark.asyncio
+    async def test_head_falls_back_to_get(self):
+        status, _, _ = await request(echo_router(), "/static", "HEAD")
+        assert status == 200
+
+    @pytest.mark.asyncio
+    async def test_query_parsing(self):
+        _, _, body = await request(echo_router(), "/query", query=b"a=1&b=two")
+        assert json.loads(body) == {"a": "1", "b": "two"}
+
+    @pytest.mark.asyncio
+    async def test_chunked_json_body(self):
+        _, _, body = await request(echo_router(), "/body", "POST", chunks=[b'{"a": ', b"1}"])
+        assert json.loads(body) == {"a": 1}
+
+    @pytest.mark.asyncio
+    async def test_empty_body_is_empty_dict(self):
+        _, _, body = await request(echo_router(), "/body", "POST")
+        assert json.loads(body) == {}
+
+    @pytest.mark.asyncio
+    async def test_invalid_json_is_400(self):
+        status, _, body = await request(echo_router(), "/body", "POST", body=b"{nope")
+        assert status == 400
+        assert json.loads(body)["status"] == "error"
+
+    @pytest.mark.asyncio
+    async def test_http_error(self):
+        status, _, body = await request(echo_router(), "/teapot")
+        assert status == 418
+        assert json.loads(body)["message"] == "I'm a teapot"
+
+    @pytest.mark.asyncio
+    async def test_ignores_non_http_scopes(self):
+        await echo_router()({"type": "lifespan"}, None, None)
+
+
+class TestDashboardRoutes:
+    @pytest.fixture(autouse=True)
+    def reset(self):
+        manager._connections.clear()
+        yield
+        manager._connections.clear()
+        dashboard.set_socketio_server(None)
+
+    @pytest.mark.asyncio
+    async def test_connections(self):
+        manager.add("sid-1")
+        status, _, body = await request(dashboard_app, "/api/connections")
+        assert status == 200
+        assert json.loads(body)["count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_connections_since(self):
+        since = manager.version
+        manager.add("sid-1")
+        query = f"since={since}".encode()
+        _, _, body = await request(dashboard_app, "/api/connections", query=query)
+        assert [c["sid"] for c in json.loads(body)["changes"]] == ["sid-1"]
+
+    @pytest.mark.asyncio
+    async def test_clear_logs(self):
+        msg_logger.log(event="message")
+        status, _, body = await request(dashboard_app, "/api/logs/clear", "POST")
+        assert status == 200
+        assert json.loads(body) == {"status": "cleared"}
+        assert msg_logger.count() == 0
+
+    @pytest.mark.asyncio
+    async def test_clear_logs_requires_post(self):
+        status, _, _ = await request(dashboard_app, "/api/logs/clear")
+        assert status == 405
+
+    @pytest.mark.asyncio
+    async def test_disconnect_without_server(self):
+        dashboard.set_socketio_server(None)
+        status, _, _ = await request(dashboard_app, "/api/disconnect/sid-1", "POST")
+        assert status == 500
+
+    @pytest.mark.asyncio
+    async def test_disconnect_unknown_client(self):
+        dashboard.set_socketio_server(object())
+        status, _, body = await request(dashboard_app, "/api/disconnect/sid-1", "POST")
+        assert status == 404
+        assert json.loads(body)["message"] == "Client not found"
+
+    @pytest.mark.asyncio
+    async def test_disconnect_client(self):
+        disconnected = []
+
+        class Sio:
+            async def disconnect(self, sid, namespace="/"):
+                disconnected.append(sid)
+
+        dashboard.set_socketio_server(Sio())
+        manager.add("sid-1")
+        status, _, body = await request(dashboard_app, "/api/disconnect/sid-1", "POST")
+        assert status == 200
+        assert json.loads(body) == {"status": "disconnected", "sid": "sid-1"}
+        assert disconnected == ["sid-1"]
@@ -0,0 +1,130 @@
+import pytest
+
+from app import schemas
+from app.events import ChatHandlers
+from app.pipeline import EventError
+from app.schemas import ROOM_MAX_LENGTH, check_limits
+from app.tenants import TenantRegistry
+
+
+def nested(depth):
+    value = []
+    for _ in range(depth - 1):
+        value = [value]
+    return value
+
+
+class TestCheckLimits:
+    def test_scalars_and_small_payloads_pass(self):
+        for data in (None, 1, 1.5, True, "hi", {"a": [1, "b", {"c": None}]}):
+            check_limits(data, max_bytes=100, max_depth=4)
+
+    def test_long_string(self):
+        with pytest.raises(EventError, match="too large"):
+            check_limits("x" * 101, max_bytes=100)
+
+    def test_large_nested_string(self):
+        with pytest.raises(EventError, match="too large"):
+            check_limits({"a": ["x" * 200]}, max_bytes=100)
+
+    def test_many_small_items(self):
+        with pytest.raises(EventError, match="too large"):
+            check_limits(list(range(100)), max_bytes=100)
+
+    def test_long_keys_count(self):
+        with pytest.raises(EventError, match="too large"):
+            check_limits({"k" * 200: 1}, max_bytes=100)
+
+    def test_depth(self):
+        check_limits(nested(4), max_depth=4)
+        with pytest.raises(EventError, match="nested"):
+            check_limits(nested(5), max_depth=4)
+
+
+class TestValidators:
+    def test_join_room_accepts_string_or_object(self):
+        assert schemas.join_room("lobby").room == "lobby"
+        options = schemas.join_room({"room": "lobby", "since": 3})
+        assert (options.room, options.since, options.replay) == ("lobby", 3, True)
+        assert not schemas.join_room({"room": "lobby"}).replay
+
+    @pytest.mark.parametrize(
+        "data",
+        [
+            None,
+            5,
+            {},
+            {"room": ""},
+            {"room": 5},
+            {"room": "r", "since": "3"},
+            {"room": "r", "limit": -1},
+            {"room": "x" * (ROOM_MAX_LENGTH + 1)},
+        ],
+    )
+    def test_join_room_rejects(self, data):
+        with pytest.raises(EventError, match="Missing room"):
+            schemas.join_room(data)
+
+    @pytest.mark.parametrize(
+        "data", ["hi", ["r", "hi"], {"room": "r"}, {"room": "r", "message": None}]
+    )
+    def test_room_message_rejects(self, data):
+        with pytest.raises(EventError, match="Missing room or message"):
+            schemas.room_message(data)
+
+    def test_room_message_keeps_any_message(self):
+        message = {"text": "hi", "meta": [1, 2]}
+        assert schemas.room_message({"room": "r", "message": message}).message == message
+
+    def test_admin_sync(self):
+        assert schemas.admin_sync(None).since is None
+        assert schemas.admin_sync({"since": 4}).since == 4
+        with pytest.raises(EventError):
+            schemas.admin_sync({"since": "x"})
+
+    def test_admin_broadcast(self):
+        data = schemas.admin_broadcast({"messages": [{"event": "a"}], "sids": ["s1"]})
+        assert data.sids == ["s1"]
+        with pytest.raises(EventError):
+            schemas.admin_broadcast({"messages": [], "sids": [1]})
+        with pytest.raises(EventError):
+            schemas.admin_broadcast({"messages": [{"event": "a"}], "room": "r", "sids": ["s1"]})
+
+    def test_direct_message(self):
+        assert schemas.direct_message({"to": "sid-1", "message": "hi"}).target == "sid:sid-1"
+        assert schemas.direct_message({"user": "alice", "message": 1}).target == "user:alice"
+        for bad in (
+            {"message": "hi"},
+            {"to": "sid-1", "user": "alice", "message": "hi"},
+            {"to": "sid-1"},
+            {"to": "", "message": "hi"},
+        ):
+            with pytest.raises(EventError):
+                schemas.direct_message(bad)
+
+    def test_limits_apply_before_schema(self):
+        with pytest.raises(EventError, match="too large"):
+            schemas.room_message({"room": "r", "message": "x" * 70000})
+
+
+class TestHandlerValidation:
+    @pytest.fixture
+    def handlers(self, fake_sio):
+        tenant = TenantRegistry().add("/test")
+        ChatHandlers(fake_sio, tenant).register()
+        return fake_sio, tenant
+
+    @pytest.mark.asyncio
+    async def test_non_dict_room_message_is_rejected(self, handlers):
+        sio, tenant = handlers
+        ack = await sio.handlers["room_message"]("sid-1", "not a dict")
+        assert ack == {"status": "error", "message": "Missing room or message"}
+
+    @pytest.mark.asyncio
+    async def test_oversized_message_rejected_before_log_and_fan_out(self, handlers):
+        sio, tenant = handlers
+        ack = await sio.handlers["broadcast"]("sid-1", {"blob": "x" * 70000})
+        assert ack == {"status": "error", "message": "Payload too large"}
+        assert tenant.logs.count() == 0
+        assert sio.emitted == []
+        assert tenant.stats.rejected == 1
@@ -0,0 +1,174 @@
+import asyncio
+
+import pytest
+
+from app.auth import Identity, sign_token
+from app.connections import ADMIN_ROOM, manager
+from app.snapshot import BASE, MAGIC, Snapshotter, decode_records, snapshotter
+from tests.conftest import SECRET
+
+pytestmark = pytest.mark.usefixtures("tenant")
+
+
+def register(sid, user, *rooms):
+    manager.add(sid, identity=Identity(user))
+    for room in rooms:
+        manager.add_room(sid, room)
+
+
+def restart(tenant, tmp_path, **kwargs):
+    # A fresh process: empty registry and log, then restore from disk.
+    manager.clear()
+    tenant.logs.clear()
+    restored = Snapshotter(tmp_path, **kwargs)
+    restored.restore()
+    return restored
+
+
+class TestSnapshotter:
+    @pytest.mark.asyncio
+    async def test_disabled_without_directory(self):
+        assert await Snapshotter().checkpoint() == 0
+
+    @pytest.mark.asyncio
+    async def test_restores_rooms_per_user_and_logs(self, tenant, tmp_path):
+        register("a1", "alice", "general", ADMIN_ROOM)
+        register("a2", "alice", "random")
+        register("b1", "bob")
+        manager.add("anon")
+        manager.add_room("anon", "general")
+        tenant.logs.log("message", from_sid="a1", data={"text": "hi", "raw": b"\x00"})
+        assert await Snapshotter(tmp_path).checkpoint() > 0
+
+        restored = restart(tenant, tmp_path)
+        assert restored.reclaim("/", "alice") == {"general", "random"}
+        assert restored.reclaim("/", "bob") == frozenset()
+        (entry,) = tenant.logs.all()
+        assert entry.data == {"text": "hi", "raw": b"\x00"}
+        assert entry.from_sid == "a1"
+        assert restored.to_dict()["restored_users"] == 1
+
+    @pytest.mark.asyncio
+    async def test_checkpoints_append_only_changes(self, tenant, tmp_path):
+        snapshots = Snapshotter(tmp_path)
+        register("a1", "alice", "general")
+        await snapshots.checkpoint()
+        assert await snapshots.checkpoint() == 0
+        size = snapshots.path("/").stat().st_size
+
+        manager.remove("a1")
+        register("b1", "bob", "random")
+        tenant.logs.log("message", from_sid="b1", data="one")
+        delta = await snapshots.checkpoint()
+        assert snapshots.path("/").stat().st_size == size + delta
+        records, clean = decode_records(snapshots.path("/").read_bytes())
+        assert clean
+        assert len(records) == 2
+
+        restored = restart(tenant, tmp_path)
+        assert restored.reclaim("/", "alice") == frozenset()
+        assert restored.reclaim("/", "bob") == {"random"}
+        assert [entry.data for entry in tenant.logs.all()] == ["one"]
+
+    @pytest.mark.asyncio
+    async def test_compacts_into_a_new_base(self, tenant, tmp_path):
+        snapshots = Snapshotter(tmp_path, max_deltas=2)
+        for n in range(4):
+            tenant.logs.log("message", data=n)
+            await snapshots.checkpoint()
+        # A base, two deltas, then the fourth checkpoint starts over.
+        records, _ = decode_records(snapshots.path("/").read_bytes())
+        assert [record[0] for record in records] == [BASE]
+        restart(tenant, tmp_path)
+        assert [entry.data for entry in tenant.logs.all()] == [0, 1, 2, 3]
+
+    @pytest.mark.asyncio
+    async def test_clearing_logs_rewrites_base(self, tenant, tmp_path):
+        snapshots = Snapshotter(tmp_path)
+        tenant.logs.log("message", data="old")
+        await snapshots.checkpoint()
+        tenant.logs.clear()
+        tenant.logs.log("message", data="new")
+        await snapshots.checkpoint()
+        restart(tenant, tmp_path)
+        assert [entry.data for entry in tenant.logs.all()] == ["new"]
+
+    @pytest.mark.asyncio
+    async def test_torn_tail_keeps_earlier_records(self, tenant, tmp_path):
+        snapshots = Snapshotter(tmp_path)
+        register("a1", "alice", "general")
+        await snapshots.checkpoint()
+        register("a2", "alice", "random")
+        await snapshots.checkpoint()
+        path = snapshots.path("/")
+        path.write_bytes(path.read_bytes()[:-3])
+
+        restored = restart(tenant, tmp_path)
+        assert restored.reclaim("/", "alice") == {"general"}
+        # The next checkpoint starts a new base instead of appending after the tear.
+        await restored.checkpoint()
+        records, clean = decode_records(path.read_bytes())
+        assert clean
+        assert [record[0] for record in records] == [BASE]
+
+    def test_unreadable_file_is_ignored(self, tenant, tmp_path):
+        (tmp_path / "default.snap").write_bytes(b"garbage")
+        restored = restart(tenant, tmp_path)
+        assert restored.reclaim("/", "alice") == frozenset()
+        (tmp_path / "default.snap").write_bytes(MAGIC)
+        restart(tenant, tmp_path)
+
+    @pytest.mark.asyncio
+    async def test_restored_users_survive_another_restart(self, tenant, tmp_path):
+        register("a1", "alice", "general")
+        await Snapshotter(tmp_path).checkpoint()
+        restored = restart(tenant, tmp_path)
+        tenant.logs.log("message", data="x")
+        await restored.checkpoint()
+        assert restart(tenant, tmp_path).reclaim("/", "alice") == {"general"}
+
+    @pytest.mark.asyncio
+    async def test_restore_window_expires(self, tenant, tmp_path):
+        register("a1", "alice", "general")
+        await Snapshotter(tmp_path).checkpoint()
+        assert restart(tenant, tmp_path, restore_window=0).reclaim("/", "alice") == set()
+
+    @pytest.mark.asyncio
+    async def test_freeze_ignores_drain_disconnects(self, tenant, tmp_path):
+        snapshots = Snapshotter(tmp_path)
+        register("a1", "alice", "general")
+        await snapshots.checkpoint(freeze=True)
+        manager.remove("a1")
+        tenant.logs.log("message", data="late")
+        await snapshots.checkpoint()
+        restored = restart(tenant, tmp_path)
+        assert restored.reclaim("/", "alice") == {"general"}
+        assert [entry.data for entry in tenant.logs.all()] == ["late"]
+
+
+@pytest.fixture
+def reset_snapshotter():
+    yield
+    snapshotter.reset()
+
+
+@pytest.mark.usefixtures("auth_enabled", "reset_snapshotter")
+class TestReconnect:
+    @pytest.mark.asyncio
+    async def test_reconnect_rejoins_restored_rooms(self, server, connect, tenant, tmp_path):
+        register("a1", "alice", "general", "random")
+        await Snapshotter(tmp_path).checkpoint()
+        manager.clear()
+        snapshotter.directory = tmp_path
+        try:
+            snapshotter.restore()
+        finally:
+            snapshotter.directory = None
+
+        sid = await connect("eio-1", auth={"token": sign_token({"sub": "alice"}, SECRET)})
+        await asyncio.sleep(0)
+        assert manager.get(sid).rooms == {"general", "random"}
+        assert sorted(room for _, room in server.entered) == ["general", "random"]
+        assert tenant.presence.room("general")["users"]
+        restored = [data for event, data, *_ in server.emitted if event == "rooms_restored"]
+        assert restored == [{"rooms": ["general", "random"]}]
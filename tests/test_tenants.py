@@ -0,0 +1,187 @@
+import asyncio
+import json
+
+import pytest
+
+from app import dashboard
+from app.config import Settings
+from app.connections import ADMIN_ROOM, ConnectionManager, manager
+from app.drain import DrainController
+from app.events import register_events
+from app.message_log import msg_logger
+from app.tenants import AdminDeltaPublisher, TenantRegistry, tenants
+from tests.test_routing import request
+
+NAMESPACE = "/tenant-a"
+
+
+@pytest.fixture(autouse=True)
+def clean_tenants(tenant, monkeypatch):
+    # Namespaces a test registers go away with the copy.
+    monkeypatch.setattr(tenants, "_tenants", dict(tenants._tenants))
+
+
+@pytest.fixture
+def server(server):
+    register_events(server, NAMESPACE)
+    return server
+
+
+class TestSettings:
+    def test_namespaces_list_always_includes_default(self):
+        assert Settings(namespaces="/").namespaces_list == ["/"]
+        assert Settings(namespaces="chat, /game,chat,").namespaces_list == ["/", "/chat", "/game"]
+
+
+class TestTenantRegistry:
+    def test_default_tenant_uses_singletons(self):
+        tenant = tenants["/"]
+        assert tenant.manager is manager
+        assert tenant.logs is msg_logger
+
+    def test_add_is_idempotent_and_isolated(self):
+        registry = TenantRegistry(max_connections=2)
+        a = registry.add("/a")
+        assert registry.add("/a") is a
+        b = registry.add("/b")
+        assert a.manager is not b.manager
+        assert a.logs is not b.logs
+        assert a.history is not b.history
+        a.manager.add("sid-1")
+        assert registry.connection_count() == 1
+        assert b.manager.count() == 0
+        assert a.max_connections == 2
+
+    def test_full(self):
+        tenant = TenantRegistry(max_connections=1).add("/a")
+        assert not tenant.full
+        tenant.manager.add("sid-1")
+        assert tenant.full
+
+
+class TestAdminDeltaPublisher:
+    @pytest.mark.asyncio
+    async def test_coalesces_changes_into_one_emit(self, fake_sio):
+        manager.add("admin-1")
+        manager.add_room("admin-1", ADMIN_ROOM)
+        publisher = AdminDeltaPublisher()
+        start = manager.version
+        manager.add("sid-1")
+        publisher.schedule(fake_sio)
+        manager.add_room("sid-1", "general")
+        publisher.schedule(fake_sio)
+        await asyncio.sleep(0.01)
+        assert len(fake_sio.emitted) == 1
+        event, data, to, namespace = fake_sio.emitted[0]
+        assert event == "admin:delta"
+        assert to == ADMIN_ROOM
+        assert namespace == "/"
+        assert data["from"] == start
+        assert data["version"] == start + 2
+        assert [c["op"] for c in data["changes"]] == ["add", "join"]
+
+    @pytest.mark.asyncio
+    async def test_no_emit_without_changes(self, fake_sio):
+        publisher = AdminDeltaPublisher()
+        publisher.schedule(fake_sio)
+        await asyncio.sleep(0.01)
+        assert fake_sio.emitted == []
+
+    @pytest.mark.asyncio
+    async def test_no_emit_without_an_admin(self, fake_sio):
+        publisher = AdminDeltaPublisher()
+        manager.add("sid-1")
+        publisher.schedule(fake_sio)
+        await asyncio.sleep(0.01)
+        assert fake_sio.emitted == []
+        # An admin joining later is sent changes from then on only.
+        manager.add("admin-1")
+        manager.add_room("admin-1", ADMIN_ROOM)
+        publisher.schedule(fake_sio)
+        await asyncio.sleep(0.01)
+        (delta,) = [data for _, data, *_ in fake_sio.emitted]
+        assert [c["op"] for c in delta["changes"]] == ["add", "join"]
+
+    @pytest.mark.asyncio
+    async def test_emits_to_its_namespace(self, fake_sio):
+        other = ConnectionManager()
+        other.add("admin-1")
+        other.add_room("admin-1", ADMIN_ROOM)
+        publisher = AdminDeltaPublisher(other, NAMESPACE)
+        other.add("sid-1")
+        publisher.schedule(fake_sio)
+        await asyncio.sleep(0.01)
+        assert fake_sio.emitted[0][3] == NAMESPACE
+
+
+class TestNamespaceIsolation:
+    @pytest.mark.asyncio
+    async def test_connections_and_logs_are_per_namespace(self, server, connect):
+        msg_logger.clear()
+        tenant = tenants[NAMESPACE]
+        sid = await connect("eio-1", namespace=NAMESPACE)
+        await server.handlers[NAMESPACE]["message"](sid, "hi")
+        assert tenant.manager.get(sid) is not None
+        assert manager.count() == 0
+        assert [log.event for log in tenant.logs.all()] == ["message"]
+        assert msg_logger.count() == 0
+        assert tenant.stats.connections == 1
+        assert tenant.stats.messages == 1
+        assert {namespace for *_, namespace in server.emitted} == {NAMESPACE}
+
+    @pytest.mark.asyncio
+    async def test_room_history_is_per_namespace(self, server, connect):
+        sid = await connect("eio-1", namespace=NAMESPACE)
+        await server.handlers[NAMESPACE]["room_message"](sid, {"room": "r", "message": "x"})
+        assert tenants[NAMESPACE].history.count("r") == 1
+        assert tenants["/"].history.count("r") == 0
+
+    @pytest.mark.asyncio
+    async def test_connect_refused_when_namespace_full(self, connect):
+        tenant = tenants[NAMESPACE]
+        tenant.max_connections = 1
+        await connect("eio-1", namespace=NAMESPACE)
+        with pytest.raises(ConnectionRefusedError):
+            await connect("eio-2", namespace=NAMESPACE)
+        assert tenant.stats.refused == 1
+        # The default namespace has its own limit.
+        await connect("eio-3")
+        assert manager.count() == 1
+
+    @pytest.mark.asyncio
+    async def test_drain_covers_every_namespace(self, server, fake_sio):
+        tenants[NAMESPACE].manager.add("sid-a")
+        manager.add("sid-b")
+        assert await DrainController(window=0.01).drain(fake_sio) == 2
+        assert sorted(fake_sio.disconnected) == ["sid-a", "sid-b"]
+        assert tenants[NAMESPACE].manager.count() == manager.count() == 0
+
+
+class TestNamespaceEndpoints:
+    @pytest.mark.asyncio
+    async def test_namespaces_summary(self, server):
+        tenants[NAMESPACE].manager.add("sid-a")
+        status, _, body = await request(dashboard.dashboard_app, "/api/namespaces")
+        assert status == 200
+        data = json.loads(body)
+        summary = {ns["namespace"]: ns for ns in data["namespaces"]}
+        assert summary[NAMESPACE]["connections"] == 1
+        assert summary["/"]["connections"] == 0
+
+    @pytest.mark.asyncio
+    async def test_connections_by_namespace(self, server):
+        tenants[NAMESPACE].manager.add("sid-a")
+        status, _, body = await request(
+            dashboard.dashboard_app, "/api/connections", query=b"namespace=/tenant-a"
+        )
+        assert status == 200
+        assert json.loads(body)["count"] == 1
+        _, _, body = await request(dashboard.dashboard_app, "/api/connections")
+        assert json.loads(body)["count"] == 0
+
+    @pytest.mark.asyncio
+    async def test_unknown_namespace(self):
+        status, _, _ = await request(
+            dashboard.dashboard_app, "/api/logs", query=b"namespace=/missing"
+        )
+        assert status == 404
@@ -0,0 +1,102 @@
+import pytest
+
+from app.tenants import tenants
+from app.topics import TopicError, TopicIndex, split_topic
+
+
+class TestSplitTopic:
+    def test_topics_and_patterns(self):
+        assert split_topic("region/eu/scores") == ["region", "eu", "scores"]
+        assert split_topic("scores.*", ".", pattern=True) == ["scores", "*"]
+        assert split_topic("region/#", pattern=True) == ["region", "#"]
+
+    @pytest.mark.parametrize(
+        "topic, pattern",
+        [
+            ("a//b", True),
+            ("a/*", False),
+            ("a/#/b", True),
+            ("a/b*", True),
+            ("/".join("x" * 17), True),
+        ],
+    )
+    def test_invalid(self, topic, pattern):
+        with pytest.raises(TopicError):
+            split_topic(topic, pattern=pattern)
+
+
+class TestTopicIndex:
+    def test_match(self):
+        index = TopicIndex()
+        index.subscribe("exact", "region/eu/scores")
+        index.subscribe("one", "region/*/scores")
+        index.subscribe("rest", "region/eu/#")
+        index.subscribe("all", "#")
+        index.subscribe("other", "region/us/#")
+        assert index.match("region/eu/scores") == {"exact", "one", "rest", "all"}
+        assert index.match("region/us/scores") == {"one", "other", "all"}
+        # ``#`` also matches its parent topic.
+        assert index.match("region/eu") == {"rest", "all"}
+        assert index.match("region/eu/scores/live") == {"rest", "all"}
+        assert index.match("weather") == {"all"}
+
+    def test_sid_matched_by_several_patterns_is_returned_once(self):
+        index = TopicIndex(separator=".")
+        index.subscribe("sid-1", "scores.*")
+        index.subscribe("sid-1", "scores.#")
+        assert index.match("scores.nba") == {"sid-1"}
+
+    def test_unsubscribe_prunes_the_trie(self):
+        index = TopicIndex()
+        assert index.subscribe("sid-1", "a/b/c")
+        assert not index.subscribe("sid-1", "a/b/c")
+        index.subscribe("sid-2", "a/*")
+        assert index.unsubscribe("sid-1", "a/b/c")
+        assert not index.unsubscribe("sid-1", "a/b/c")
+        assert list(index._root.children["a"].children) == ["*"]
+        assert index.remove("sid-2") == 1
+        assert not index._root.children
+        assert index.to_dict() == {"subscribers": 0, "subscriptions": 0}
+
+    def test_subscription_limit(self):
+        index = TopicIndex(max_subscriptions=1)
+        index.subscribe("sid-1", "a")
+        with pytest.raises(TopicError, match="Too many"):
+            index.subscribe("sid-1", "b")
+
+
+class TestTopicEvents:
+    @pytest.mark.asyncio
+    async def test_publish_reaches_matching_subscribers_once(self, server, connect):
+        handlers = server.handlers["/"]
+        alice = await connect("eio-a")
+        bob = await connect("eio-b")
+        carol = await connect("eio-c")
+        ack = await handlers["topic:subscribe"](alice, "scores/*")
+        assert ack == {"status": "subscribed", "pattern": "scores/*", "subscriptions": ["scores/*"]}
+        await handlers["topic:subscribe"](alice, {"pattern": "scores/#"})
+        await handlers["topic:subscribe"](bob, "weather/#")
+        await handlers["topic:subscribe"](carol, "scores/nba")
+
+        ack = await handlers["topic:publish"](carol, {"topic": "scores/nba", "message": "hi"})
+        assert ack == {"status": "published", "topic": "scores/nba", "recipients": 1}
+        assert [eio_sid for eio_sid, _ in server.sent] == ["eio-a"]
+        assert '"topic:message"' in server.sent[0][1].data
+        assert '"topic":"scores/nba"' in server.sent[0][1].data
+
+    @pytest.mark.asyncio
+    async def test_invalid_requests(self, server, connect):
+        handlers = server.handlers["/"]
+        sid = await connect("eio-a")
+        assert (await handlers["topic:subscribe"](sid, "a/#/b"))["status"] == "error"
+        ack = await handlers["topic:publish"](sid, {"topic": "a/*", "message": "x"})
+        assert ack["status"] == "error"
+        assert (await handlers["topic:unsubscribe"](sid, "a"))["message"] == "Not subscribed"
+
+    @pytest.mark.asyncio
+    async def test_disconnect_drops_subscriptions(self, server, connect):
+        handlers = server.handlers["/"]
+        sid = await connect("eio-a")
+        await handlers["topic:subscribe"](sid, "a/#")
+        await handlers["disconnect"](sid)
+        assert tenants["/"].topics.count() == 0
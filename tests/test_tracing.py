@@ -0,0 +1,67 @@
+import time
+
+from app.tracing import OTHER_ROOM, DeliveryTracer, Histogram
+
+
+class TestHistogram:
+    def test_empty(self):
+        hist = Histogram()
+        assert hist.percentile(0.5) == 0.0
+        assert hist.to_dict()["count"] == 0
+
+    def test_observe_buckets(self):
+        hist = Histogram()
+        for ms in (0.5, 3, 3, 40, 20000):
+            hist.observe(ms)
+        data = hist.to_dict()
+        assert data["count"] == 5
+        assert data["buckets"]["1"] == 1
+        assert data["buckets"]["5"] == 2
+        assert data["buckets"]["50"] == 1
+        assert data["buckets"]["inf"] == 1
+        assert data["max_ms"] == 20000
+
+    def test_percentiles(self):
+        hist = Histogram()
+        for _ in range(99):
+            hist.observe(4)
+        hist.observe(800)
+        assert hist.percentile(0.5) == 5.0
+        assert hist.percentile(0.99) == 5.0
+        assert hist.percentile(1.0) == 1000.0
+
+
+class TestDeliveryTracer:
+    def test_disabled_never_samples(self):
+        tracer = DeliveryTracer(sample_rate=0.0)
+        assert not tracer.enabled
+        assert all(tracer.sample() is None for _ in range(100))
+
+    def test_full_sampling(self):
+        tracer = DeliveryTracer(sample_rate=1.0)
+        assert tracer.sample() is not None
+
+    def test_record_and_snapshot(self):
+        tracer = DeliveryTracer(sample_rate=1.0)
+        start = time.perf_counter()
+        tracer.record("room_message", "general", "fanout", start)
+        tracer.ack_callback("room_message", "general", start)({"ok": True})
+        tracer.record("broadcast", None, "fanout", start)
+        snapshot = {(t["event"], t["room"]): t for t in tracer.snapshot()}
+        assert snapshot[("room_message", "general")]["fanout"]["count"] == 1
+        assert snapshot[("room_message", "general")]["ack"]["count"] == 1
+        assert snapshot[("broadcast", None)]["ack"]["count"] == 0
+
+    def test_key_limit_folds_into_other(self):
+        tracer = DeliveryTracer(sample_rate=1.0, max_keys=2)
+        start = time.perf_counter()
+        for room in ("a", "b", "c", "d"):
+            tracer.record("room_message", room, "fanout", start)
+        rooms = {t["room"]: t["fanout"]["count"] for t in tracer.snapshot()}
+        assert rooms == {"a": 1, "b": 1, OTHER_ROOM: 2}
+
+    def test_clear(self):
+        tracer = DeliveryTracer(sample_rate=1.0)
+        tracer.record("message", None, "fanout", time.perf_counter())
+        tracer.clear()
+        assert tracer.snapshot() == []
@@ -0,0 +1,205 @@
+import hashlib
+
+import pytest
+
+from app.tenants import tenants
+from app.transfer import TransferError, TransferStore
+
+PAYLOAD = bytes(range(256)) * 40  # 10240 bytes
+
+
+async def upload(store, transfer, data, chunk_size):
+    for offset in range(0, len(data), chunk_size):
+        async with store.slot(transfer):
+            await store.write(transfer, offset, data[offset : offset + chunk_size])
+
+
+class TestTransferStore:
+    @pytest.mark.asyncio
+    async def test_upload_and_read_back(self, tmp_path):
+        store = TransferStore(tmp_path, chunk_size=4096)
+        digest = hashlib.sha256(PAYLOAD).hexdigest()
+        transfer = await store.begin("sid-1", None, "data.bin", len(PAYLOAD), sha256=digest)
+        await upload(store, transfer, PAYLOAD, 4096)
+        assert transfer.complete
+        assert transfer.path.read_bytes() == PAYLOAD
+        chunks = [await store.read(transfer, offset) for offset in range(0, len(PAYLOAD), 4096)]
+        assert b"".join(chunks) == PAYLOAD
+        assert await store.read(transfer, len(PAYLOAD)) == b""
+        assert store.to_dict()["completed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_chunks_must_follow_the_committed_offset(self, tmp_path):
+        store = TransferStore(tmp_path, chunk_size=4)
+        transfer = await store.begin("sid-1", None, "a", 8)
+        await store.write(transfer, 0, b"abcd")
+        with pytest.raises(TransferError, match="offset"):
+            await store.write(transfer, 0, b"abcd")
+        with pytest.raises(TransferError, match="size"):
+            await store.write(transfer, 4, b"efghi")
+        await store.write(transfer, 4, b"efgh")
+        with pytest.raises(TransferError, match="complete"):
+            await store.write(transfer, 8, b"x")
+
+    @pytest.mark.asyncio
+    async def test_checksum_mismatch_discards_the_file(self, tmp_path):
+        store = TransferStore(tmp_path)
+        transfer = await store.begin("sid-1", None, "a", 4, sha256="0" * 64)
+        with pytest.raises(TransferError, match="Checksum"):
+            await store.write(transfer, 0, b"abcd")
+        assert transfer.id not in store
+        assert not transfer.path.exists()
+        assert store.reserved == 0
+
+    @pytest.mark.asyncio
+    async def test_window_limits_chunks_in_flight(self, tmp_path):
+        store = TransferStore(tmp_path, window=1)
+        transfer = await store.begin("sid-1", None, "a", 4)
+        async with store.slot(transfer):
+            with pytest.raises(TransferError, match="Window"):
+                async with store.slot(transfer):
+                    pass
+        async with store.reading("sid-1"):
+            with pytest.raises(TransferError, match="Window"):
+                async with store.reading("sid-1"):
+                    pass
+        async with store.slot(transfer):
+            pass
+
+    @pytest.mark.asyncio
+    async def test_limits(self, tmp_path):
+        store = TransferStore(tmp_path, max_size=10, max_bytes=15, max_active=1)
+        with pytest.raises(TransferError, match="too large"):
+            await store.begin("sid-1", None, "a", 11)
+        await store.begin("sid-1", "alice", "a", 10)
+        with pytest.raises(TransferError, match="Too many"):
+            await store.begin("sid-2", "alice", "b", 1)
+        with pytest.raises(TransferError, match="full"):
+            await store.begin("sid-3", None, "c", 6)
+
+    @pytest.mark.asyncio
+    async def test_disabled_without_directory(self):
+        with pytest.raises(TransferError, match="disabled"):
+            await TransferStore().begin("sid-1", None, "a", 1)
+
+    @pytest.mark.asyncio
+    async def test_expired_transfers_are_removed(self, tmp_path):
+        store = TransferStore(tmp_path, ttl=0)
+        transfer = await store.begin("sid-1", None, "a", 4)
+        with pytest.raises(TransferError, match="Unknown"):
+            await store.get(transfer.id)
+        assert not transfer.path.exists()
+        assert store.expired == 1
+
+    @pytest.mark.asyncio
+    async def test_leftover_files_are_removed(self, tmp_path):
+        (tmp_path / "transfer-stale").write_bytes(b"old")
+        (tmp_path / "notes.txt").write_bytes(b"keep")
+        transfer = await TransferStore(tmp_path).begin("sid-1", None, "a", 0)
+        assert not (tmp_path / "transfer-stale").exists()
+        assert (tmp_path / "notes.txt").exists()
+        assert transfer.path.exists()
+
+
+@pytest.fixture
+def transfers(tenant, tmp_path, monkeypatch):
+    monkeypatch.setattr(tenant.transfers, "directory", tmp_path)
+    return tenant.transfers
+
+
+@pytest.mark.usefixtures("transfers")
+class TestFileEvents:
+    @pytest.mark.asyncio
+    async def test_room_upload_is_relayed_and_downloadable(self, server, connect):
+        handlers = server.handlers["/"]
+        alice = await connect("eio-a", "files")
+        bob = await connect("eio-b", "files")
+        eve = await connect("eio-e")
+        ack = await handlers["file:begin"](
+            alice, {"name": "data.bin", "size": len(PAYLOAD), "room": "files"}
+        )
+        assert ack["status"] == "ok"
+        transfer_id = ack["id"]
+        offers = [data for event, data, *_ in server.emitted if event == "file:offer"]
+        assert offers[0]["name"] == "data.bin"
+        assert offers[0]["from"] == alice
+
+        assert ack["chunk_size"] == 65536
+        while ack["status"] == "ok":
+            offset = ack["offset"]
+            chunk = {"id": transfer_id, "offset": offset, "data": PAYLOAD[offset : offset + 4096]}
+            ack = await handlers["file:chunk"](alice, chunk)
+        assert ack["status"] == "complete"
+        assert any(event == "file:complete" for event, *_ in server.emitted)
+
+        # Relayed chunks went only to bob, each as a header plus the raw bytes.
+        assert {eio_sid for eio_sid, _ in server.sent} == {"eio-b"}
+        attachments = [pkt.data for _, pkt in server.sent if isinstance(pkt.data, bytes)]
+        assert b"".join(attachments) == PAYLOAD
+
+        received = b""
+        while True:
+            ack = await handlers["file:read"](bob, {"id": transfer_id, "offset": len(received)})
+            received += ack["data"]
+            if ack["eof"]:
+                break
+        assert received == PAYLOAD
+        assert (await handlers["file:read"](eve, transfer_id))["message"] == "Not allowed"
+
+    @pytest.mark.asyncio
+    async def test_resume_reports_the_committed_offset(self, server, connect):
+        handlers = server.handlers["/"]
+        sid = await connect("eio-a")
+        ack = await handlers["file:begin"](sid, {"name": "a", "size": 8})
+        await handlers["file:chunk"](sid, {"id": ack["id"], "offset": 0, "data": b"abcd"})
+        again = await handlers["file:chunk"](sid, {"id": ack["id"], "offset": 0, "data": b"abcd"})
+        assert again["status"] == "error"
+        assert again["offset"] == 4
+
+        resumed = await connect("eio-b")
+        ref = {"id": ack["id"], "token": ack["token"]}
+        assert (await handlers["file:resume"](resumed, ref))["offset"] == 4
+        done = await handlers["file:chunk"](resumed, {**ref, "offset": 4, "data": b"efgh"})
+        assert done["status"] == "complete"
+
+    @pytest.mark.asyncio
+    async def test_room_members_cannot_write_an_anonymous_upload(self, server, connect):
+        handlers = server.handlers["/"]
+        alice = await connect("eio-a", "files")
+        mallory = await connect("eio-m", "files")
+        ack = await handlers["file:begin"](alice, {"name": "a", "size": 4, "room": "files"})
+        (offer,) = [data for event, data, *_ in server.emitted if event == "file:offer"]
+        assert "token" not in offer
+        chunk = {"id": offer["id"], "offset": 0, "data": b"abcd"}
+        assert (await handlers["file:chunk"](mallory, chunk))["message"] == "Not the uploader"
+        forged = {**chunk, "token": offer["id"]}
+        assert (await handlers["file:chunk"](mallory, forged))["message"] == "Not the uploader"
+        assert (await handlers["file:resume"](mallory, offer["id"]))["status"] == "error"
+        assert (await handlers["file:abort"](mallory, offer["id"]))["status"] == "error"
+        assert (await tenants["/"].transfers.get(ack["id"])).offset == 0
+        assert (await handlers["file:chunk"](alice, chunk))["status"] == "complete"
+
+    @pytest.mark.asyncio
+    async def test_invalid_requests(self, server, connect):
+        handlers = server.handlers["/"]
+        sid = await connect("eio-a")
+        assert (await handlers["file:begin"](sid, {"name": "a"}))["status"] == "error"
+        ack = await handlers["file:begin"](sid, {"name": "a", "size": 1, "room": "elsewhere"})
+        assert ack["message"] == "Not in room"
+        oversized = {"id": "x", "offset": 0, "data": b"x" * 200_000}
+        assert (await handlers["file:chunk"](sid, oversized))["status"] == "error"
+        assert (await handlers["file:read"](sid, "missing"))["message"] == "Unknown transfer"
+
+    @pytest.mark.asyncio
+    async def test_abort_notifies_the_room(self, server, connect):
+        handlers = server.handlers["/"]
+        sid = await connect("eio-a", "files")
+        ack = await handlers["file:begin"](sid, {"name": "a", "size": 4, "room": "files"})
+        assert (await handlers["file:abort"](sid, ack["id"]))["status"] == "aborted"
+        assert (
+            "file:aborted",
+            {"id": ack["id"], "reason": "aborted"},
+            "files",
+            "/",
+        ) in server.emitted
+        assert tenants["/"].transfers.count() == 0